@@ -0,0 +1,123 @@
+'''
+Counts the ODBC connections :class:`.AccessDatabase` makes to run a pipeline of
+statements, with and without a persistent connection.
+
+pyodbc is replaced by a mock whose connect() sleeps for --connect-ms to stand
+in for the cost of a real ODBC connect, so this runs without Access or its
+driver installed. The statements are run through a :class:`.ConnectionManager`,
+as the queries in a MincePy run are.
+
+Usage: python access_connections.py [--statements N] [--connect-ms N]
+'''
+
+# core
+import argparse
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+
+class MockCursor(object):
+
+    rowcount = 1
+
+    def execute(self, sql, params=None):
+        return self
+
+
+    def executemany(self, sql, params):
+        return self
+
+
+class MockConnection(object):
+
+    connects = 0
+    commits = 0
+    connectSeconds = 0
+
+    def __init__(self, connectString):
+        MockConnection.connects += 1
+        time.sleep(MockConnection.connectSeconds)
+
+
+    def cursor(self):
+        return MockCursor()
+
+
+    def commit(self):
+        MockConnection.commits += 1
+
+
+    def rollback(self):
+        pass
+
+
+    def close(self):
+        pass
+
+
+def installMocks():
+    '''
+    Installs stand-ins for pyodbc and the Windows COM modules AccessDatabase
+    imports.
+    '''
+    pyodbc = types.ModuleType("pyodbc")
+    pyodbc.Error = Exception
+    pyodbc.SQL_DBMS_NAME = 17
+    pyodbc.connect = MockConnection
+    sys.modules["pyodbc"] = pyodbc
+
+    win32com = types.ModuleType("win32com")
+    win32com.client = types.ModuleType("win32com.client")
+    sys.modules["win32com"] = win32com
+    sys.modules["win32com.client"] = win32com.client
+    sys.modules["pywintypes"] = types.ModuleType("pywintypes")
+
+
+class AccessConnectionFactory(object):
+
+    def getConnection(self, **kwargs):
+        from database.AccessDatabase import AccessDatabase
+        return AccessDatabase(**kwargs)
+
+
+def run(name, numStatements, persistent):
+    from system.service.ConnectionManager import ConnectionManager
+
+    MockConnection.connects = 0
+    MockConnection.commits = 0
+    manager = ConnectionManager(AccessConnectionFactory())
+    connectionParameters = {"path": "bench.mdb", "persistent": persistent}
+
+    start = time.time()
+    for i in xrange(numStatements):
+        db = manager.open(**connectionParameters)
+        if i % 2:
+            db.executeMany("INSERT INTO bench VALUES (?)", [[1], [2]])
+        else:
+            db.execute("UPDATE bench SET x = ?", [i])
+    manager.closeAll()
+    seconds = time.time() - start
+
+    print "{0:<12} {1:>6,} connects {2:>6,} commits {3:>9.3f} sec".format(
+            name, MockConnection.connects, MockConnection.commits, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--statements", type=int, default=200,
+                        help="the number of statements to execute")
+    parser.add_argument("--connect-ms", type=float, default=20,
+                        help="the simulated time taken by each connect")
+    args = parser.parse_args()
+
+    installMocks()
+    MockConnection.connectSeconds = args.connect_ms / 1000.0
+
+    print "Executing {0:,} statements".format(args.statements)
+    run("default", args.statements, persistent=False)
+    run("persistent", args.statements, persistent=True)
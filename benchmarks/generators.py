@@ -0,0 +1,191 @@
+'''
+Synthetic data for the benchmarks: the same deterministic rows written as CSV,
+XLSX, DBF or SQLite sources, or fed directly to a database as a
+:class:`.DataImport`.
+
+Also writes a CSV file whose rows fill a varying number of 40 variable
+columns. Writers for formats whose libraries are not installed raise
+ImportError.
+'''
+
+# core
+import csv
+import os
+import random
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from dataimport.DataImport import DataImport
+
+COLUMNS = ["id", "name", "amount", "category", "quantity"]
+PY_TYPES = ["int", "str", "float", "str", "int"]
+CATEGORIES = ["alpha", "beta", "gamma", "delta", "epsilon"]
+
+# A file with a block of variable columns: each row holds an id, between none
+# and all of the variable columns, and a total.
+NUM_VARIABLE_COLUMNS = 40
+VARIABLE_COLUMNS = (["id"]
+                    + ["v{0}".format(i)
+                       for i in xrange(1, NUM_VARIABLE_COLUMNS + 1)]
+                    + ["total"])
+VARIABLE_RANGE = (1, NUM_VARIABLE_COLUMNS + 1)
+
+
+def generateRows(numRows, seed=0):
+    '''
+    :param numRows: the number of rows to generate
+    :type numRows: int
+    :param seed: optional - seed for the random values
+    :type seed: int
+    :returns: rows of values matching :data:`COLUMNS` and :data:`PY_TYPES`
+    :rtype: iterator of lists
+    '''
+    rand = random.Random(seed)
+    for i in xrange(numRows):
+        yield [i,
+               "name {0}".format(rand.randint(0, 100000)),
+               round(rand.random() * 1000, 4),
+               CATEGORIES[i % len(CATEGORIES)],
+               rand.randint(0, 500)]
+
+
+def writeCSV(path, numRows):
+    with open(path, "wb") as outFile:
+        writer = csv.writer(outFile)
+        writer.writerow(COLUMNS)
+        writer.writerows(generateRows(numRows))
+
+
+def writeVariableCSV(path, numRows):
+    with open(path, "wb") as outFile:
+        writer = csv.writer(outFile)
+        writer.writerow(VARIABLE_COLUMNS)
+        for i in xrange(numRows):
+            values = range(i % (NUM_VARIABLE_COLUMNS + 1))
+            writer.writerow([i] + values + [sum(values)])
+
+
+def writeXLSX(path, numRows):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="data")
+    ws.append(COLUMNS)
+    for row in generateRows(numRows):
+        ws.append(row)
+
+    wb.save(path)
+
+
+def writeDBF(path, numRows):
+    from dbfpy import dbf
+
+    db = dbf.Dbf(path, new=True)
+    try:
+        db.addField(("ID", "N", 10, 0),
+                    ("NAME", "C", 20),
+                    ("AMOUNT", "F", 12, 4),
+                    ("CATEGORY", "C", 10),
+                    ("QUANTITY", "N", 5, 0))
+        for row in generateRows(numRows):
+            record = db.newRecord()
+            for name, value in zip(("ID", "NAME", "AMOUNT", "CATEGORY",
+                                    "QUANTITY"), row):
+                record[name] = value
+            record.store()
+    finally:
+        db.close()
+
+
+def writeSQLite(path, numRows, table="data"):
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("CREATE TABLE {0} (id INTEGER, name TEXT, "
+                           "amount REAL, category TEXT, quantity INTEGER)"
+                           .format(table))
+        connection.executemany("INSERT INTO {0} VALUES (?, ?, ?, ?, ?)"
+                               .format(table), generateRows(numRows))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+WRITERS = {"csv"   : (writeCSV, ".csv"),
+           "csv-variable": (writeVariableCSV, ".csv"),
+           "xlsx"  : (writeXLSX, ".xlsx"),
+           "dbf"   : (writeDBF, ".dbf"),
+           "sqlite": (writeSQLite, ".db")}
+
+
+def getSource(kind, numRows, dataDir):
+    '''
+    Gets the path to a generated source file, writing it if it has not been
+    generated before.
+
+    :param kind: the format of the file: one of :data:`WRITERS`
+    :type kind: str
+    :param numRows: the number of rows in the file
+    :type numRows: int
+    :param dataDir: the directory to keep generated files in
+    :type dataDir: str
+    :rtype: str
+    :raises: :exc:`ImportError` if the library for the format is not installed
+    '''
+    write, extension = WRITERS[kind]
+    path = os.path.join(dataDir, "{0}_{1}{2}".format(kind, numRows, extension))
+    if not os.path.exists(path):
+        if not os.path.exists(dataDir):
+            os.makedirs(dataDir)
+
+        partialPath = path + ".partial" + extension
+        if os.path.exists(partialPath):
+            os.remove(partialPath)
+
+        write(partialPath, numRows)
+        os.rename(partialPath, path)
+
+    return path
+
+
+class GeneratedDataImport(DataImport):
+    '''
+    A data import of generated rows, for timing databases' imports without
+    reading a file.
+
+    :param numRows: the number of rows to import
+    :type numRows: int
+    :param destination: optional - the table to import the rows into
+    :type destination: str
+    '''
+
+    def __init__(self, numRows, destination="bench"):
+        self.__numRows = numRows
+        self.__destination = destination
+
+
+    def getName(self):
+        return self.__destination
+
+
+    def getDestination(self):
+        return self.__destination
+
+
+    def getTitleColumn(self):
+        return None
+
+
+    def getColumns(self):
+        return list(COLUMNS)
+
+
+    def getTypes(self):
+        return list(PY_TYPES)
+
+
+    def getRows(self):
+        return generateRows(self.__numRows)
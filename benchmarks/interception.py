@@ -0,0 +1,99 @@
+'''
+Compares the calls/sec of database methods called directly, through a
+:class:`.HookRegistry` wrapper, and through the springpython AOP proxy
+ConnectionFactory used before it (if springpython is installed).
+
+The database is a stand-in whose methods do nothing, so only the cost of the
+interception itself is measured.
+
+Usage: python interception.py [--calls N] [--repeat N]
+'''
+
+# core
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from aop.HookRegistry import HookRegistry
+
+
+class NullDatabase(object):
+
+    def query(self, sql, params=None, stream=False):
+        return None
+
+
+    def execute(self, sql, params=None):
+        return 0
+
+
+    def hasTable(self, tableName):
+        return True
+
+
+def passThrough(invocation):
+    return invocation.proceed()
+
+
+def makeTargets():
+    targets = [("direct", NullDatabase()),
+               ("no hooks", HookRegistry().wrap(NullDatabase()))]
+
+    hooks = HookRegistry()
+    hooks.register(passThrough, ".*query.*", ".*execute.*")
+    targets.append(("hooks", hooks.wrap(NullDatabase())))
+
+    try:
+        from springpython.aop import MethodInterceptor
+        from springpython.aop import ProxyFactoryObject
+        from springpython.aop import RegexpMethodPointcutAdvisor
+    except ImportError:
+        print "springpython is not installed: skipping the AOP proxy"
+    else:
+        class PassThroughInterceptor(MethodInterceptor):
+            def invoke(self, invocation):
+                return invocation.proceed()
+
+        advisor = RegexpMethodPointcutAdvisor(
+                advice=[PassThroughInterceptor()],
+                patterns=[".*query.*", ".*execute.*"])
+        targets.append(("springpython", ProxyFactoryObject(
+                target=NullDatabase(), interceptors=advisor)))
+
+    return targets
+
+
+def run(name, db, numCalls, repeat=3):
+    results = []
+    for method, call in (("query", lambda: db.query("SELECT 1")),
+                         ("execute", lambda: db.execute("DELETE FROM t", [1])),
+                         ("hasTable", lambda: db.hasTable("t"))):
+        seconds = None
+        for _ in range(repeat):
+            start = time.time()
+            for _ in xrange(numCalls):
+                call()
+            elapsed = time.time() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+        results.append("{0} {1:>12,.0f}".format(method, numCalls / seconds))
+
+    print "{0:<13} {1} calls/sec".format(name, "  ".join(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200000,
+                        help="the number of calls to make to each method")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="the number of times to run each method, keeping "
+                             "the fastest")
+    args = parser.parse_args()
+
+    for name, db in makeTargets():
+        run(name, db, args.calls, args.repeat)
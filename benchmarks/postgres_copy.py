@@ -0,0 +1,151 @@
+'''
+Compares the rows/sec of :class:`.PostgresCopyReader` in each COPY format with
+the line-at-a-time wrapper PostgresDatabase used before it.
+
+By default the rows are consumed by a stand-in for psycopg2's copy_expert,
+which reads the data in chunks of the requested size, so only the client-side
+formatting is measured. With --dsn, the rows are also copied into a temporary
+table on a real Postgres server.
+
+Usage: python postgres_copy.py [--rows N] [--repeat N]
+                               [--dsn "host=... dbname=..."]
+'''
+
+# core
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from database.PostgresCopyReader import PostgresCopyReader
+
+COLUMNS = ["id", "name", "amount", "comment"]
+PY_TYPES = ["int", "str", "float", "str"]
+SQL_TYPES = ["INTEGER", "TEXT", "REAL", "TEXT"]
+
+
+class LegacyFileProtocolWrapper(object):
+    '''
+    The previous PostgresDatabase import wrapper: one unescaped,
+    comma-separated row per read() regardless of the requested size.
+    '''
+
+    def __init__(self, rows, title=None):
+        self.__rows = rows
+        self.__title = title
+
+
+    def read(self, size=None):
+        return self.readline()
+
+
+    def readline(self, size=None):
+        try:
+            values = []
+            if self.__title:
+                values.append(self.__title)
+            values.extend(self.__rows.next())
+            row = "{}\n".format(",".join("{}".format(value)
+                                         if value is not None else ""
+                                         for value in values))
+            return row
+        except StopIteration:
+            return ""
+
+
+class FakeCopyCursor(object):
+    '''
+    Stands in for a psycopg2 cursor: reads the file like copy_expert does.
+    '''
+
+    def copy_expert(self, sql, file, size=8192):
+        numBytes = 0
+        numReads = 0
+        while True:
+            data = file.read(size)
+            if not data:
+                return numBytes, numReads
+
+            numBytes += len(data)
+            numReads += 1
+
+
+def generateRows(numRows, seed=0):
+    rand = random.Random(seed)
+    for i in xrange(numRows):
+        yield [i,
+               "name {0}".format(rand.randint(0, 1000)),
+               rand.random() * 1000,
+               None if i % 10 == 0 else "a comment, with\ttabs and \"quotes\""]
+
+
+def run(name, rows, makeReader, cursor, repeat=3):
+    numRows = len(rows)
+    seconds = None
+    for _ in range(repeat):
+        reader = makeReader(iter(rows))
+        start = time.time()
+        numBytes, numReads = cursor.copy_expert("COPY bench FROM STDIN", reader,
+                                                size=65536)
+        elapsed = time.time() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    print "{0:<8} {1:>12,.0f} rows/sec {2:>10,} bytes {3:>9,} reads".format(
+            name, numRows / seconds, numBytes, numReads)
+
+
+def runPostgres(name, numRows, makeReader, dsn):
+    import psycopg2
+
+    connection = psycopg2.connect(dsn)
+    try:
+        cur = connection.cursor()
+        cur.execute("CREATE TEMPORARY TABLE bench (id INTEGER, name TEXT, "
+                    "amount REAL, comment TEXT)")
+        reader = makeReader(generateRows(numRows))
+        sql = reader.getCopySql("bench", COLUMNS) if hasattr(reader, "getCopySql") \
+            else "COPY bench FROM STDIN WITH (FORMAT csv)"
+
+        start = time.time()
+        cur.copy_expert(sql, reader, size=65536)
+        connection.commit()
+        seconds = time.time() - start
+        print "{0:<8} {1:>12,.0f} rows/sec (Postgres)".format(
+                name, numRows / seconds)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000,
+                        help="the number of rows to copy")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="the number of times to run each reader, keeping "
+                             "the fastest")
+    parser.add_argument("--dsn", type=str, default=None,
+                        help="optional - a Postgres connection string to copy "
+                             "into a real server")
+    args = parser.parse_args()
+
+    readers = [("legacy", LegacyFileProtocolWrapper)]
+    for copyFormat in PostgresCopyReader.FORMATS:
+        readers.append((copyFormat,
+                        lambda rows, copyFormat=copyFormat: PostgresCopyReader(
+                                rows, SQL_TYPES, format=copyFormat)))
+
+    print "Copying {0:,} rows".format(args.rows)
+    rows = list(generateRows(args.rows))
+    for name, makeReader in readers:
+        run(name, rows, makeReader, FakeCopyCursor(), args.repeat)
+
+    if args.dsn:
+        # The legacy wrapper does not escape the commas, tabs and quotes in
+        # the generated comments, so it cannot load them into a real server.
+        for name, makeReader in readers[1:]:
+            runPostgres(name, args.rows, makeReader, args.dsn)
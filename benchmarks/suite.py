@@ -0,0 +1,422 @@
+'''
+Measures the throughput of each data import reader, database import backend
+and output handler on generated data, reporting rows/sec and peak RSS as JSON.
+
+Each case runs in its own process, so that its peak RSS is its own. Source
+files are generated once per size and kept in --data-dir. Cases whose
+libraries or platform are not available (i.e. Access on Linux) are reported
+as skipped. The PowerPoint output handler is not measured: it writes all of
+its rows into a single text box, so is never used for large results. The
+*-variable cases read a CSV file with 40 variable columns (see the columns
+option of data imports), i.e. --sizes 5m --cases "*-variable".
+
+Usage: python suite.py [--sizes 10k,1m,10m] [--cases PATTERN[,PATTERN...]]
+                       [--output results.json] [--compare previous.json]
+                       [--data-dir DIR] [--pg-host H --pg-db D --pg-user U
+                       --pg-pwd P]
+'''
+
+# core
+import argparse
+import datetime
+import fnmatch
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+import generators
+
+
+class _Skipped(Exception):
+    pass
+
+
+class _Factory(object):
+    '''
+    Creates file databases for a :class:`.ConnectionManager`, importing only
+    the database class needed, so that SQLite cases run without the Windows
+    libraries used by Access.
+    '''
+
+    def getConnection(self, **kwargs):
+        if kwargs["path"].endswith(".db"):
+            from database.SQLiteDatabase import SQLiteDatabase
+            return SQLiteDatabase(**kwargs)
+
+        from database.AccessDatabase import AccessDatabase
+        return AccessDatabase(**kwargs)
+
+
+def _count(rows):
+    numRows = 0
+    for _ in rows:
+        numRows += 1
+
+    return numRows
+
+
+def readCSV(source, numRows, workDir, args, engine="standard", processes=1,
+            memoryMap=False):
+    from dataimport.CSVDataImport import CSVDataImport
+
+    dataImport = CSVDataImport("bench", source, "bench", delimiter=",",
+                               engine=engine, processes=processes,
+                               memoryMap=memoryMap)
+    # The databases infer the types before reading the rows, and the fast
+    # engine uses them.
+    dataImport.getTypes()
+    return _count(dataImport.getRows())
+
+
+def readCSVFast(source, numRows, workDir, args):
+    try:
+        import numpy
+    except ImportError as e:
+        raise _Skipped(str(e))
+
+    return readCSV(source, numRows, workDir, args, engine="fast")
+
+
+def readCSVParallel(source, numRows, workDir, args):
+    if multiprocessing.cpu_count() < 2:
+        raise _Skipped("only one CPU")
+
+    return readCSV(source, numRows, workDir, args,
+                   processes=multiprocessing.cpu_count())
+
+
+def _createVariableCSVImport(source, titleColumn=None):
+    from dataimport.CSVDataImport import CSVDataImport
+
+    return CSVDataImport("bench", source, "bench", startLine=1,
+                         columns=generators.VARIABLE_COLUMNS,
+                         variableColumns=generators.VARIABLE_RANGE,
+                         delimiter=",", titleColumn=titleColumn)
+
+
+def readCSVVariable(source, numRows, workDir, args):
+    return _count(_createVariableCSVImport(source).getRows())
+
+
+def importSQLiteVariable(source, numRows, workDir, args):
+    from database.SQLiteDatabase import SQLiteDatabase
+
+    db = SQLiteDatabase(os.path.join(workDir, "import.db"), bulkLoad=True)
+    try:
+        db.importData(_createVariableCSVImport(source, titleColumn="source"))
+    finally:
+        db.close()
+
+    return numRows
+
+
+def readXLSX(source, numRows, workDir, args):
+    from dataimport.XLSDataImport import XLSDataImport
+
+    dataImport = XLSDataImport("bench", source, "bench", worksheet="data")
+    return _count(dataImport.getRows())
+
+
+def readDBF(source, numRows, workDir, args):
+    from dataimport.DBFDataImport import DBFDataImport
+
+    dataImport = DBFDataImport("bench", source, "bench")
+    return _count(dataImport.getRows())
+
+
+def readSQLite(source, numRows, workDir, args):
+    from dataimport.SQLDataImport import SQLDataImport
+    from system.service.ConnectionManager import ConnectionManager
+
+    connectionManager = ConnectionManager(_Factory())
+    try:
+        dataImport = SQLDataImport("bench", "bench", connectionManager,
+                                   {"path": source}, "SELECT * FROM data",
+                                   stream=True)
+        return _count(dataImport.getRows())
+    finally:
+        connectionManager.closeAll()
+
+
+def importSQLite(source, numRows, workDir, args, bulkLoad=False):
+    from database.SQLiteDatabase import SQLiteDatabase
+
+    db = SQLiteDatabase(os.path.join(workDir, "import.db"), bulkLoad=bulkLoad)
+    try:
+        db.importData(generators.GeneratedDataImport(numRows))
+    finally:
+        db.close()
+
+    return numRows
+
+
+def importSQLiteBulk(source, numRows, workDir, args):
+    return importSQLite(source, numRows, workDir, args, bulkLoad=True)
+
+
+def importPostgres(source, numRows, workDir, args, copyFormat="text"):
+    from database.PostgresDatabase import PostgresDatabase
+
+    if not args.pg_db:
+        raise _Skipped("no Postgres database given (--pg-db)")
+
+    db = PostgresDatabase(args.pg_host, args.pg_user, args.pg_pwd, args.pg_db,
+                          copyFormat=copyFormat)
+    try:
+        db.execute("DROP TABLE IF EXISTS bench")
+        db.importData(generators.GeneratedDataImport(numRows))
+        db.execute("DROP TABLE IF EXISTS bench")
+    finally:
+        db.close()
+
+    return numRows
+
+
+def importAccess(source, numRows, workDir, args):
+    from database.AccessDatabase import AccessDatabase
+    from system.service.DatabaseService import DatabaseService
+
+    path = os.path.join(workDir, "import.mdb")
+    DatabaseService().create(path)
+    db = AccessDatabase(path)
+    try:
+        db.importData(generators.GeneratedDataImport(numRows))
+    finally:
+        db.close()
+
+    return numRows
+
+
+def _queryOutput(source):
+    from database.SQLiteDatabase import SQLiteDatabase
+
+    db = SQLiteDatabase(source)
+    return db, db.query("SELECT * FROM data", stream=True)
+
+
+def outputXLSX(source, numRows, workDir, args):
+    from system.task.output.XlsOutputHandler import XlsOutputHandler
+
+    db, output = _queryOutput(source)
+    try:
+        XlsOutputHandler(os.path.join(workDir, "output.xlsx"), "data",
+                         header=True).handle("bench", output)
+    finally:
+        db.close()
+
+    return numRows
+
+
+def outputMdb(source, numRows, workDir, args):
+    from system.service.ConnectionManager import ConnectionManager
+    from system.service.DatabaseService import DatabaseService
+    from system.task.output.MdbOutputHandler import MdbOutputHandler
+
+    path = os.path.join(workDir, "output.mdb")
+    DatabaseService().create(path)
+    connectionManager = ConnectionManager(_Factory())
+    db, output = _queryOutput(source)
+    try:
+        MdbOutputHandler(connectionManager, path, "bench").handle("bench",
+                                                                  output)
+    finally:
+        db.close()
+        connectionManager.closeAll()
+
+    return numRows
+
+
+# The name, source format and function of each case.
+CASES = [("read.csv",                "csv",    readCSV),
+         ("read.csv-fast",           "csv",    readCSVFast),
+         ("read.csv-parallel",       "csv",    readCSVParallel),
+         ("read.csv-mmap",           "csv",
+          lambda *a: readCSV(*a, memoryMap=True)),
+         ("read.csv-variable",       "csv-variable", readCSVVariable),
+         ("read.xlsx",               "xlsx",   readXLSX),
+         ("read.dbf",                "dbf",    readDBF),
+         ("read.sqlite",             "sqlite", readSQLite),
+         ("import.sqlite",           None,     importSQLite),
+         ("import.sqlite-bulk",      None,     importSQLiteBulk),
+         ("import.sqlite-variable",  "csv-variable", importSQLiteVariable),
+         ("import.postgres-text",    None,     importPostgres),
+         ("import.postgres-csv",     None,
+          lambda *a: importPostgres(*a, copyFormat="csv")),
+         ("import.postgres-binary",  None,
+          lambda *a: importPostgres(*a, copyFormat="binary")),
+         ("import.access",           None,     importAccess),
+         ("output.xlsx",             "sqlite", outputXLSX),
+         ("output.mdb",              "sqlite", outputMdb)]
+
+
+def _getPeakRSS():
+    '''
+    :returns: the peak resident set size of this process in KB, or None if it
+        cannot be measured on this platform
+    :rtype: int
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on OS X, and KB elsewhere.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def runCase(name, source, numRows, args):
+    '''
+    Runs one case in the current process.
+
+    :returns: the result of the case
+    :rtype: dict
+    '''
+    func = dict((case[0], case[2]) for case in CASES)[name]
+    result = {"case": name, "rows": numRows, "status": "ok", "seconds": None,
+              "rows_per_sec": None, "peak_rss_kb": None, "error": None}
+    workDir = tempfile.mkdtemp(prefix="mincepy-bench")
+    try:
+        start = time.time()
+        processed = func(source, numRows, workDir, args)
+        result["seconds"] = round(time.time() - start, 4)
+        result["rows_per_sec"] = int(processed / max(result["seconds"], 1e-9))
+        if processed != numRows:
+            result["status"] = "error"
+            result["error"] = "processed {0} rows, expected {1}".format(
+                    processed, numRows)
+    except (ImportError, _Skipped) as e:
+        result["status"] = "skipped"
+        result["error"] = str(e)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = "{0}: {1}".format(e.__class__.__name__, e)
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    result["peak_rss_kb"] = _getPeakRSS()
+    return result
+
+
+def _runCaseProcess(name, kind, numRows, args):
+    result = {"case": name, "rows": numRows, "status": "skipped",
+              "seconds": None, "rows_per_sec": None, "peak_rss_kb": None,
+              "error": None}
+    source = None
+    if kind:
+        try:
+            source = generators.getSource(kind, numRows, args.data_dir)
+        except ImportError as e:
+            result["error"] = "cannot generate {0}: {1}".format(kind, e)
+            return result
+
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", name,
+               "--rows", str(numRows), "--source", source or ""]
+    for option in ("pg_host", "pg_db", "pg_user", "pg_pwd"):
+        if getattr(args, option):
+            command.extend(["--" + option.replace("_", "-"),
+                            getattr(args, option)])
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+    try:
+        return json.loads(output.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        result["status"] = "error"
+        result["error"] = "case exited with code {0}".format(process.returncode)
+        return result
+
+
+def _parseSize(size):
+    size = size.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(size[-1:], 1)
+    if multiplier > 1:
+        size = size[:-1]
+
+    return int(float(size) * multiplier)
+
+
+def _compare(results, previousPath):
+    with open(previousPath) as inFile:
+        previous = dict(((result["case"], result["rows"]), result)
+                        for result in json.load(inFile)["results"])
+
+    for result in results:
+        before = previous.get((result["case"], result["rows"]))
+        if before and before["rows_per_sec"] and result["rows_per_sec"]:
+            sys.stderr.write("{0:<24} {1:>10,} rows {2:>+8.1%}\n".format(
+                    result["case"], result["rows"],
+                    float(result["rows_per_sec"]) / before["rows_per_sec"] - 1))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10k",
+                        help="comma-separated numbers of rows, i.e. 10k,1m,10m")
+    parser.add_argument("--cases", default="*",
+                        help="comma-separated patterns of the cases to run, "
+                             "i.e. read.*,import.sqlite")
+    parser.add_argument("--output", default=None,
+                        help="optional - the file to write the JSON results "
+                             "to, instead of stdout")
+    parser.add_argument("--compare", default=None,
+                        help="optional - results of a previous run to compare "
+                             "with")
+    parser.add_argument("--data-dir", default=os.path.join(
+                                tempfile.gettempdir(), "mincepy-bench-data"),
+                        help="the directory to keep generated source files in")
+    parser.add_argument("--pg-host", default="localhost")
+    parser.add_argument("--pg-db", default=None)
+    parser.add_argument("--pg-user", default=None)
+    parser.add_argument("--pg-pwd", default=None)
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--source", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print json.dumps(runCase(args.run_case, args.source or None, args.rows,
+                                 args))
+        sys.exit(0)
+
+    patterns = args.cases.split(",")
+    results = []
+    for numRows in [_parseSize(size) for size in args.sizes.split(",")]:
+        for name, kind, _ in CASES:
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                continue
+
+            result = _runCaseProcess(name, kind, numRows, args)
+            results.append(result)
+            if result["status"] == "ok":
+                sys.stderr.write("{0:<24} {1:>10,} rows {2:>12,} rows/sec "
+                                 "{3:>9,} KB peak\n".format(
+                                         name, numRows, result["rows_per_sec"],
+                                         result["peak_rss_kb"] or 0))
+            else:
+                sys.stderr.write("{0:<24} {1:>10,} rows {2}: {3}\n".format(
+                        name, numRows, result["status"], result["error"]))
+
+    report = {"started": datetime.datetime.utcnow().isoformat(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "results": results}
+
+    if args.output:
+        with open(args.output, "w") as outFile:
+            json.dump(report, outFile, indent=2, sort_keys=True)
+    else:
+        print json.dumps(report, indent=2, sort_keys=True)
+
+    if args.compare:
+        _compare(results, args.compare)
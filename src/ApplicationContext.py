@@ -1,17 +1,19 @@
 # contrib
 from springpython.config import PythonConfig
 from springpython.config import Object
-from springpython.aop import RegexpMethodPointcutAdvisor
 
 # MincePy
 from Config import Config
+from aop.HookRegistry import HookRegistry
 from aop.QueryInterceptor import QueryInterceptor
 from database.ConnectionFactory import ConnectionFactory
+from database.PostgresCopyReader import PostgresCopyReader
 from domain.AccessDatabaseConfiguration import AccessDatabaseConfiguration
 from domain.SQLiteDatabaseConfiguration import SQLiteDatabaseConfiguration
 from domain.PostgresDatabaseConfiguration import PostgresDatabaseConfiguration
 from system.System import System
 from system.config.ConfigHelper import ConfigHelper
+from system.config.ConfigError import ConfigError
 from system.config.QueryFactory import QueryFactory
 from system.config.TemplatedQueryConfigurer import TemplatedQueryConfigurer
 from system.config.MultiNamedParametersQueryConfigurer import MultiNamedParametersQueryConfigurer
@@ -20,6 +22,9 @@ from system.config.DatabaseNamedParametersQueryConfigurer import DatabaseNamedPa
 from system.config.ReportingQueryConfigurer import ReportingQueryConfigurer
 from system.service.ConnectionManager import ConnectionManager
 from system.service.DatabaseService import DatabaseService
+from system.service.MetricsRecorder import MetricsRecorder
+from system.service.QueryFingerprints import QueryFingerprints
+from system.service.RunHistory import RunHistory
 from system.task.PreprocessorTask import PreprocessorTask
 from system.task.MincePyTask import MincePyTask
 from system.task.DataImporterTask import DataImporterTask
@@ -60,6 +65,25 @@ class ApplicationContext(PythonConfig):
         logPath    = appConfig["log_path"]
         logQueries = appConfig.as_bool("log_queries")
         overwrite  = appConfig.as_bool("overwrite_working_dbs")
+        maxWorkers = appConfig.as_int("max_workers") \
+            if "max_workers" in appConfig else 1
+        maxQueryWorkers = appConfig.as_int("max_query_workers") \
+            if "max_query_workers" in appConfig else 1
+        importBufferRows = appConfig.as_int("import_buffer_rows") \
+            if "import_buffer_rows" in appConfig else 100000
+        poolMinSize = appConfig.as_int("pool_min_size") \
+            if "pool_min_size" in appConfig else 0
+        poolMaxSize = appConfig.as_int("pool_max_size") \
+            if "pool_max_size" in appConfig else 0
+        poolIdleTimeout = appConfig.as_float("pool_idle_timeout") \
+            if "pool_idle_timeout" in appConfig else 300
+        metricsPath = appConfig.get("metrics_path") or None
+        runHistoryPath = appConfig.get("run_history_path") or None
+        regressionThreshold = appConfig.as_float("regression_threshold") \
+            if "regression_threshold" in appConfig else 2.0
+        regressionWindow = appConfig.as_int("regression_window") \
+            if "regression_window" in appConfig else 10
+        incrementalPath = appConfig.get("incremental_path") or None
 
         activeDBs = []
         for dbTitle, dbInfo in cfg["databases"].iteritems():
@@ -70,21 +94,34 @@ class ApplicationContext(PythonConfig):
                         db = SQLiteDatabaseConfiguration(
                                 title=dbTitle,
                                 workingDBPath=workingPath,
-                                originalDBPath=dbInfo.get("original_db_path"))
+                                originalDBPath=dbInfo.get("original_db_path"),
+                                bulkLoad=dbInfo.as_bool("bulk_load")
+                                         if "bulk_load" in dbInfo else False)
                     else:
                         db = AccessDatabaseConfiguration(
                                 dbService=self.databaseService(),
                                 title=dbTitle,
                                 workingDBPath=dbInfo["working_db_path"],
-                                originalDBPath=dbInfo.get("original_db_path"))
+                                originalDBPath=dbInfo.get("original_db_path"),
+                                persistent=dbInfo.as_bool("persistent_connection")
+                                           if "persistent_connection" in dbInfo
+                                           else False)
                 else:
+                    copyFormat = dbInfo.get("copy_format", "text")
+                    if copyFormat not in PostgresCopyReader.FORMATS:
+                        raise ConfigError(
+                                "Database '{0}': copy_format must be one of {1}."
+                                .format(dbTitle,
+                                        ", ".join(PostgresCopyReader.FORMATS)))
+
                     db = PostgresDatabaseConfiguration(
                             title=dbTitle,
                             host=dbInfo["host"],
                             db=dbInfo["db"],
                             user=dbInfo["user"],
                             pwd=dbInfo["pwd"],
-                            schema=dbInfo.get("schema"))
+                            schema=dbInfo.get("schema"),
+                            copyFormat=copyFormat)
                 
                 activeDBs.append(db)
             
@@ -92,7 +129,18 @@ class ApplicationContext(PythonConfig):
                       logPath=logPath,
                       logQueries=logQueries,
                       activeDBs=activeDBs,
-                      overwrite=overwrite)
+                      overwrite=overwrite,
+                      maxWorkers=maxWorkers,
+                      maxQueryWorkers=maxQueryWorkers,
+                      importBufferRows=importBufferRows,
+                      poolMinSize=poolMinSize,
+                      poolMaxSize=poolMaxSize,
+                      poolIdleTimeout=poolIdleTimeout,
+                      metricsPath=metricsPath,
+                      runHistoryPath=runHistoryPath,
+                      regressionThreshold=regressionThreshold,
+                      regressionWindow=regressionWindow,
+                      incrementalPath=incrementalPath)
     
     @Object(lazy_init=True)
     def system(self):
@@ -100,21 +148,44 @@ class ApplicationContext(PythonConfig):
         system.setConfig(self.config())
         system.setConnectionManager(self.connectionManager())
         system.setDatabaseService(self.databaseService())
+        system.setMetricsRecorder(self.metricsRecorder())
+        system.setRunHistory(self.runHistory())
+        system.setQueryFingerprints(self.queryFingerprints())
 
         return system
     
     @Object(lazy_init=True)
     def connectionFactory(self):
-        pointcutAdvisor = RegexpMethodPointcutAdvisor(
-                advice=[QueryInterceptor(self.config().isLoggingEnabled())],
-                patterns=[".*query.*",
-                          ".*execute.*"])
+        hooks = HookRegistry()
+        if self.config().isLoggingEnabled():
+            hooks.register(QueryInterceptor(), ".*query.*", ".*execute.*")
         
-        return ConnectionFactory(pointcutAdvisor)
+        return ConnectionFactory(hooks)
    
     @Object(lazy_init=True)
     def connectionManager(self):
-        return ConnectionManager(self.connectionFactory())
+        config = self.config()
+        return ConnectionManager(self.connectionFactory(),
+                                 minSize=config.getPoolMinSize(),
+                                 maxSize=config.getPoolMaxSize(),
+                                 maxIdleSeconds=config.getPoolIdleTimeout())
+    
+    @Object(lazy_init=True)
+    def metricsRecorder(self):
+        return MetricsRecorder(self.config().getMetricsPath())
+    
+    @Object(lazy_init=True)
+    def runHistory(self):
+        config = self.config()
+        return RunHistory(config.getRunHistoryPath(),
+                          configPath=self.__rootConfigFilePath,
+                          threshold=config.getRegressionThreshold(),
+                          window=config.getRegressionWindow())
+    
+    @Object(lazy_init=True)
+    def queryFingerprints(self):
+        return QueryFingerprints(self.config().getIncrementalPath(),
+                                 configPath=self.__rootConfigFilePath)
     
     @Object(lazy_init=True)
     def databaseService(self):
@@ -16,14 +16,60 @@ class Config(object):
     :param overwrite: flag controlling whether or not the working copies of the
         target databases should be overwritten, if they already exist
     :type overwrite: boolean
+    :param maxWorkers: the number of databases to process at the same time
+    :type maxWorkers: int
+    :param maxQueryWorkers: the number of independent queries to run at the
+        same time against each database which supports it
+    :type maxQueryWorkers: int
+    :param importBufferRows: the number of rows of each data import to hold in
+        memory while importing it into several databases
+    :type importBufferRows: int
+    :param poolMinSize: the number of idle connections to keep open for each
+        database
+    :type poolMinSize: int
+    :param poolMaxSize: the maximum number of connections open at once to each
+        database, or 0 for no limit
+    :type poolMaxSize: int
+    :param poolIdleTimeout: the number of seconds an unused connection is kept
+        open for
+    :type poolIdleTimeout: float
+    :param metricsPath: the file to record query timings in, or None
+    :type metricsPath: str
+    :param runHistoryPath: the SQLite database to keep the history of query
+        durations in, or None
+    :type runHistoryPath: str
+    :param regressionThreshold: how many times slower than its median duration
+        a query has to be to be flagged as a regression
+    :type regressionThreshold: float
+    :param regressionWindow: the number of previous runs to take the median
+        duration of
+    :type regressionWindow: int
+    :param incrementalPath: the SQLite database to keep query fingerprints in
+        for incremental runs, or None
+    :type incrementalPath: str
     '''
     
-    def __init__(self, outputPath, logPath, logQueries, activeDBs, overwrite):
+    def __init__(self, outputPath, logPath, logQueries, activeDBs, overwrite,
+                 maxWorkers=1, maxQueryWorkers=1, importBufferRows=100000,
+                 poolMinSize=0, poolMaxSize=0, poolIdleTimeout=300,
+                 metricsPath=None, runHistoryPath=None, regressionThreshold=2.0,
+                 regressionWindow=10, incrementalPath=None):
         self.__outputPath = outputPath
         self.__logPath = logPath
         self.__logQueries = logQueries
         self.__activeDBs = activeDBs
         self.__overwrite = overwrite
+        self.__maxWorkers = maxWorkers
+        self.__maxQueryWorkers = maxQueryWorkers
+        self.__importBufferRows = importBufferRows
+        self.__poolMinSize = poolMinSize
+        self.__poolMaxSize = poolMaxSize
+        self.__poolIdleTimeout = poolIdleTimeout
+        self.__metricsPath = metricsPath
+        self.__runHistoryPath = runHistoryPath
+        self.__regressionThreshold = regressionThreshold
+        self.__regressionWindow = regressionWindow
+        self.__incrementalPath = incrementalPath
 
 
     def __str__(self):
@@ -33,13 +79,31 @@ class Config(object):
                Log Path: %(logPath)s
                Log Queries: %(logQueries)s
                Overwrite Working DBs: %(overwrite)s
+               Max Workers: %(maxWorkers)s
+               Max Query Workers: %(maxQueryWorkers)s
+               Import Buffer Rows: %(importBufferRows)s
+               Connection Pool: min %(poolMinSize)s, max %(poolMaxSize)s, idle timeout %(poolIdleTimeout)ss
+               Metrics Path: %(metricsPath)s
+               Run History: %(runHistoryPath)s (regression threshold %(regressionThreshold)sx over %(regressionWindow)s runs)
+               Incremental: %(incrementalPath)s
                Target databases: %(activeDBs)s
                """ % {"outputPath": self.__outputPath,
                       "logPath"   : self.__logPath,
                       "logQueries": self.__logQueries,
                       "activeDBs" : os.linesep.join((str(db) for db
                                                      in self.__activeDBs)),
-                      "overwrite" : str(self.__overwrite)}
+                      "overwrite" : str(self.__overwrite),
+                      "maxWorkers": self.__maxWorkers,
+                      "maxQueryWorkers": self.__maxQueryWorkers,
+                      "importBufferRows": self.__importBufferRows,
+                      "poolMinSize": self.__poolMinSize,
+                      "poolMaxSize": self.__poolMaxSize or "unlimited",
+                      "poolIdleTimeout": self.__poolIdleTimeout,
+                      "metricsPath": self.__metricsPath or "<disabled>",
+                      "runHistoryPath": self.__runHistoryPath or "<disabled>",
+                      "regressionThreshold": self.__regressionThreshold,
+                      "regressionWindow": self.__regressionWindow,
+                      "incrementalPath": self.__incrementalPath or "<disabled>"}
 
 
     def getOutputPath(self):
@@ -81,4 +145,98 @@ class Config(object):
         :rtype: boolean
         '''
         return self.__overwrite
-    
\ No newline at end of file
+    
+    
+    def getMaxWorkers(self):
+        '''
+        :returns: the number of databases to process at the same time
+        :rtype: int
+        '''
+        return self.__maxWorkers
+    
+    
+    def getMaxQueryWorkers(self):
+        '''
+        :returns: the number of independent queries to run at the same time
+            against each database which supports it
+        :rtype: int
+        '''
+        return self.__maxQueryWorkers
+    
+    
+    def getImportBufferRows(self):
+        '''
+        :returns: the number of rows of each data import to hold in memory while
+            importing it into several databases; any further rows are spilled
+            to a temporary file
+        :rtype: int
+        '''
+        return self.__importBufferRows
+    
+    
+    def getPoolMinSize(self):
+        '''
+        :returns: the number of idle connections to keep open for each database
+        :rtype: int
+        '''
+        return self.__poolMinSize
+    
+    
+    def getPoolMaxSize(self):
+        '''
+        :returns: the maximum number of connections open at once to each
+            database, or 0 for no limit
+        :rtype: int
+        '''
+        return self.__poolMaxSize
+    
+    
+    def getPoolIdleTimeout(self):
+        '''
+        :returns: the number of seconds an unused connection is kept open for
+        :rtype: float
+        '''
+        return self.__poolIdleTimeout
+    
+    
+    def getMetricsPath(self):
+        '''
+        :returns: the file to record query timings in, or None if disabled
+        :rtype: str
+        '''
+        return self.__metricsPath
+    
+    
+    def getRunHistoryPath(self):
+        '''
+        :returns: the SQLite database to keep the history of query durations
+            in, or None if disabled
+        :rtype: str
+        '''
+        return self.__runHistoryPath
+    
+    
+    def getRegressionThreshold(self):
+        '''
+        :returns: how many times slower than its median duration a query has
+            to be to be flagged as a regression
+        :rtype: float
+        '''
+        return self.__regressionThreshold
+    
+    
+    def getRegressionWindow(self):
+        '''
+        :returns: the number of previous runs to take the median duration of
+        :rtype: int
+        '''
+        return self.__regressionWindow
+    
+    
+    def getIncrementalPath(self):
+        '''
+        :returns: the SQLite database to keep query fingerprints in for
+            incremental runs, or None if disabled
+        :rtype: str
+        '''
+        return self.__incrementalPath
@@ -16,6 +16,7 @@ from ApplicationContext import ApplicationContext
 from database.query.QueryError import QueryError
 from dataimport.DataImportError import DataImportError
 from system.config.ConfigError import ConfigError
+from util.Profiler import Profiler
 
 system = None
 log = None
@@ -53,6 +54,20 @@ if __name__ == "__main__":
     parser.add_argument("--config", type=str, required=False,
                         help="path to the script's configuration file",
                         default=r"..\examples\config.ini")
+    parser.add_argument("--profile", nargs="?", const="cprofile",
+                        choices=Profiler.MODES, default=None,
+                        help="profile each task with cProfile (the default) or "
+                             "the sampling profiler, writing the results to "
+                             "the log directory")
+    parser.add_argument("--profile-db", type=str, default=None,
+                        help="only profile the queries and data imports run "
+                             "against the database with this title")
+    parser.add_argument("--profile-query", type=str, default=None,
+                        help="only profile the query or data import with this "
+                             "title, separately for each database")
+    parser.add_argument("--profile-top", type=int, default=30,
+                        help="the number of functions to list in each profile "
+                             "summary")
     allArgs = parser.parse_known_args()
     args = allArgs[0]
     userArgs = _captureUserArgsToDict(allArgs)
@@ -77,6 +92,13 @@ if __name__ == "__main__":
         loggingConfig = applicationContext.get_object("loggingConfig")
         logging.config.dictConfig(loggingConfig)
     
+        if args.profile:
+            system.setProfiler(Profiler(logPath,
+                                        mode=args.profile,
+                                        top=args.profile_top,
+                                        dbTitle=args.profile_db,
+                                        queryTitle=args.profile_query))
+    
         log = logging.getLogger("app.MincePy")
         log.info("MincePy Configuration")
         log.info(system.getConfig())
@@ -84,7 +106,8 @@ if __name__ == "__main__":
         
         tasks = applicationContext.get_object("tasks")
         for task in tasks:
-            task.execute()
+            with system.getProfiler().profileTask(task.__class__.__name__):
+                task.execute()
             
         log.info("Completed successfully.")
 
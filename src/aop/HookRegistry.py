@@ -0,0 +1,152 @@
+# core
+import re
+
+class HookRegistry(object):
+    '''
+    Registers hooks to run around method calls on objects, i.e. to log every
+    query a database executes.
+
+    A hook is a callable taking one argument, the invocation, with the same
+    interface as springpython's MethodInvocation: ``instance``,
+    ``method_name``, ``args`` and ``kwargs`` describe the call, and
+    ``proceed()`` continues it, returning its result. Hooks are registered
+    against regular expressions matching method names, either with
+    :meth:`register` or as a decorator::
+
+        @registry.hook(".*query.*")
+        def logQuery(invocation):
+            log.debug(invocation.args[0])
+            return invocation.proceed()
+
+    Objects are only wrapped by :meth:`wrap` when hooks have been registered,
+    so there is no overhead at all otherwise.
+    '''
+
+    def __init__(self):
+        self.__hooks = []
+
+
+    def register(self, hook, *patterns):
+        '''
+        Registers a hook.
+
+        :param hook: the hook to call
+        :type hook: callable
+        :param patterns: regular expressions matching the names of the methods
+            to intercept
+        :type patterns: str
+        '''
+        self.__hooks.append((hook, [re.compile(pattern) for pattern in patterns]))
+
+
+    def hook(self, *patterns):
+        '''
+        Decorator which registers a function as a hook.
+
+        :param patterns: regular expressions matching the names of the methods
+            to intercept
+        :type patterns: str
+        '''
+        def decorator(hook):
+            self.register(hook, *patterns)
+            return hook
+
+        return decorator
+
+
+    def getHooks(self, methodName):
+        '''
+        :param methodName: the name of a method
+        :type methodName: str
+        :returns: the hooks to run around calls to the method, in the order they
+            were registered
+        :rtype: list of callables
+        '''
+        return [hook for hook, patterns in self.__hooks
+                if any(pattern.match(methodName) for pattern in patterns)]
+
+
+    def wrap(self, target):
+        '''
+        Applies the registered hooks to an object.
+
+        :param target: the object to intercept method calls on
+        :type target: object
+        :returns: the object itself if no hooks have been registered, or else a
+            wrapper which runs the hooks around calls to its methods
+        :rtype: object
+        '''
+        if not self.__hooks:
+            return target
+
+        return _InterceptedObject(target, self)
+
+
+class _InterceptedObject(object):
+    '''
+    Wraps an object, running a :class:`.HookRegistry`'s hooks around calls to
+    its methods. Each method is looked up once, then cached on the wrapper.
+    '''
+
+    def __init__(self, target, registry):
+        self.__dict__["_target"] = target
+        self.__dict__["_registry"] = registry
+
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        hooks = self._registry.getHooks(name)
+        if hooks:
+            attribute = _InterceptedMethod(self._target, name, attribute, hooks)
+
+        self.__dict__[name] = attribute
+        return attribute
+
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+    def __str__(self):
+        return str(self._target)
+
+
+class _InterceptedMethod(object):
+
+    def __init__(self, instance, name, method, hooks):
+        self.__instance = instance
+        self.__name = name
+        self.__method = method
+        self.__hooks = hooks
+
+
+    def __call__(self, *args, **kwargs):
+        return _Invocation(self.__instance, self.__name, self.__method,
+                           self.__hooks, args, kwargs).proceed()
+
+
+class _Invocation(object):
+    '''
+    A call to an intercepted method, passed to each hook in turn.
+    '''
+
+    def __init__(self, instance, methodName, method, hooks, args, kwargs):
+        self.instance = instance
+        self.method_name = methodName
+        self.args = args
+        self.kwargs = kwargs
+        self.__method = method
+        self.__hooks = iter(hooks)
+
+
+    def proceed(self):
+        '''
+        Runs the next hook, or the method itself after the last hook.
+        '''
+        for hook in self.__hooks:
+            return hook(self)
+
+        return self.__method(*self.args, **self.kwargs)
@@ -2,83 +2,130 @@
 import os
 import logging
 
-# contrib
-from springpython.aop import MethodInterceptor
-
-class QueryInterceptor(MethodInterceptor):
+class QueryInterceptor(object):
     '''
-    Logs every query executed by the system.
+    Logs every query executed by the system. Register it with a
+    :class:`.HookRegistry` to intercept database methods.
+
+    Queries are only formatted if the query logger is enabled for debug
+    messages, and then only when the log entry is written, so logging adds
+    little to the time taken to execute a query - especially when paired with
+    a :class:`.BackgroundFileHandler`, which writes log entries in another
+    thread. Only the first :attr:`maxParamSets` sets of parameters of a
+    statement executed many times are logged, followed by a count of the rest.
 
     :param enabled: flag turning on or off query logging
     :type enabled: boolean
     '''
-    
+
+    maxParamSets = 10
+    maxValueLength = 200
+
     def __init__(self, enabled=True):
-        super(QueryInterceptor, self).__init__()
         self.__enabled = enabled
         if enabled:
             self.__log = logging.getLogger("query_logger")
-        
-    
+
+
     def invoke(self, invocation):
         '''
-        See springpython.aop.MethodInterceptor_\.
-        
-        .. _springpython.aop.MethodInterceptor:
-            http://static.springsource.org/spring-python/1.2.x/pydoc/springpython.aop.html#MethodInterceptor
+        Logs a query, then executes it.
+
+        :param invocation: the intercepted call; see :class:`.HookRegistry`
+        :returns: the result of the call
         '''
-        if not self.__enabled:
+        if not self.__enabled or not self.__log.isEnabledFor(logging.DEBUG):
             return invocation.proceed()
-        
+
         # Query can come with or without a parameters array.
-        if len(invocation.args) == 1:
-            sql = invocation.args[0]
-            formattedQueries = [sql]
-        else:
-            sql, args = invocation.args
-            formattedQueries = self.__formatRecursive(sql, args)
-        
-        dbName = os.path.basename(str(invocation.instance))
-        logEntry = "\n".join((dbName, "\n".join(formattedQueries), "---"))
-        self.__log.debug(logEntry)
-        
+        sql = invocation.args[0]
+        params = invocation.args[1] if len(invocation.args) > 1 \
+            else invocation.kwargs.get("params")
+
+        self.__log.debug(_QueryLogEntry(invocation.instance, sql, params,
+                                        QueryInterceptor.maxParamSets,
+                                        QueryInterceptor.maxValueLength))
+
         return invocation.proceed()
-    
-    
-    def __formatRecursive(self, sql, args):
-        results = []
-        
-        logSql = sql
-        if isinstance(args, (list, tuple)):
-            for arg in args:
-                if isinstance(arg, (list, tuple)):
-                    results.extend(self.__formatRecursive(sql, arg))
-                else:
-                    logSql = self.__replaceParameter(logSql, arg)
+
+
+    __call__ = invoke
+
+
+class _QueryLogEntry(object):
+    '''
+    A query log message, formatted only when it is written. Keeps copies of
+    only the parameters which will be logged, since the caller is free to
+    change its parameters once the query has been executed.
+    '''
+
+    def __init__(self, db, sql, params, maxParamSets, maxValueLength):
+        self.__dbName = os.path.basename(str(db))
+        self.__sql = sql
+        self.__maxValueLength = maxValueLength
+        self.__numParamSets = 0
+        self.__paramSets = []
+
+        if params is None:
+            return
+
+        if not isinstance(params, (list, tuple)):
+            self.__paramSets = [[params]]
+            self.__numParamSets = 1
+        elif params and isinstance(params[0], (list, tuple)):
+            # Many sets of parameters, for executeMany.
+            self.__numParamSets = len(params)
+            self.__paramSets = [list(paramSet)
+                                for paramSet in params[:maxParamSets]]
+        elif params:
+            self.__paramSets = [list(params)]
+            self.__numParamSets = 1
+
+
+    def __str__(self):
+        if self.__paramSets:
+            lines = [self.__format(paramSet) for paramSet in self.__paramSets]
         else:
-            logSql = self.__replaceParameter(logSql, args)
-            
-        if logSql != sql:
-            results.append(logSql)
-            
-        return results
-    
-    
-    def __replaceParameter(self, sql, param):
-        return sql.replace("?", str(self.__wrap(param)), 1)
+            lines = [self.__sql]
+
+        numOmitted = self.__numParamSets - len(self.__paramSets)
+        if numOmitted > 0:
+            lines.append("... and {0:,} more sets of parameters".format(numOmitted))
+
+        return "\n".join([self.__dbName] + lines + ["---"])
+
+
+    def __format(self, params):
+        parts = self.__sql.split("?")
+        if len(parts) != len(params) + 1:
+            return "{0} -- parameters: {1}".format(
+                    self.__sql, ", ".join(self.__wrap(param) for param in params))
+
+        formatted = [parts[0]]
+        for param, part in zip(params, parts[1:]):
+            formatted.append(self.__wrap(param))
+            formatted.append(part)
+
+        return "".join(formatted)
 
 
     def __wrap(self, obj):
         '''
-        Converts a python string to a SQL string.
-        
+        Converts a python value to a SQL literal, shortening long values.
+
         :param obj: object to attempt to wrap in single quotes
         :type obj: object
-        :returns: the wrapped string or the original object if not a string
-        :rtype: str or object
+        :returns: the wrapped string or the original object as a string
+        :rtype: str
         '''
+        if isinstance(obj, unicode):
+            obj = obj.encode("utf-8")
+
+        value = str(obj)
+        if len(value) > self.__maxValueLength:
+            value = value[:self.__maxValueLength] + "..."
+
         if isinstance(obj, basestring):
-            return "'%s'" % obj
-        
-        return obj
-    
\ No newline at end of file
+            return "'%s'" % value
+
+        return value
@@ -1,9 +1,15 @@
+# core
+import itertools
+
 class AbstractCursor(object):
     '''
     Wraps a native database cursor to standardize the way MincePy modules
     interact with them.
     '''
     
+    batchSize = 10000
+    
+    
     def __iter__(self):
         return self
     
@@ -11,6 +17,28 @@ class AbstractCursor(object):
     def next(self):
         raise NotImplementedError
 
+
+    def iterBatches(self, size=None):
+        '''
+        Iterates over the remaining rows in batches, which is much faster than
+        iterating over them one at a time for large results. The rows in each
+        batch are sequences as returned by the underlying driver, not lists, so
+        must be copied before being modified.
+        
+        :param size: optional - the maximum number of rows in each batch;
+            defaults to :attr:`batchSize`
+        :type size: int
+        :returns: an iterator of non-empty lists of rows
+        :rtype: iterator of lists of sequences
+        '''
+        size = size or self.batchSize
+        while True:
+            batch = list(itertools.islice(self, size))
+            if not batch:
+                return
+            
+            yield batch
+
     
     def getColumns(self):
         raise NotImplementedError
@@ -10,7 +10,7 @@ class AbstractDatabase(object):
         raise NotImplementedError
             
     
-    def query(self, sql, params=None):
+    def query(self, sql, params=None, stream=False):
         '''
         Performs a read-only query.
 
@@ -18,6 +18,10 @@ class AbstractDatabase(object):
         :type sql: str
         :param params: SQL parameters
         :type params: list or None
+        :param stream: optional - whether to fetch the results from the server
+            as they are read, rather than loading them into memory when the
+            query runs; only makes a difference for server-based databases
+        :type stream: boolean
         :rtype: :class:`.AbstractCursor`
         '''
         raise NotImplementedError
@@ -61,6 +65,27 @@ class AbstractDatabase(object):
         raise NotImplementedError()
     
     
+    def isHealthy(self):
+        '''
+        Checks if the database connection is still usable, i.e. before reusing
+        a pooled connection. A connection which has not been opened yet is
+        healthy.
+        
+        :rtype: boolean
+        '''
+        return True
+    
+    
+    def supportsConcurrentQueries(self):
+        '''
+        Checks if the database can safely run queries on more than one
+        connection at the same time.
+        
+        :rtype: boolean
+        '''
+        return False
+    
+    
     def importData(self, dataImport):
         '''
         Imports data into the database.
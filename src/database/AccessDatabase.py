@@ -19,8 +19,15 @@ class AccessDatabase(AbstractDatabase):
     '''
     Holds a connection to a MS Access database.
 
+    By default the ODBC connection is closed after each statement is executed.
+    In persistent mode it is kept open and reused until :meth:`close` is
+    called, which saves reconnecting for every statement; each statement is
+    still committed as it is executed.
+
     :param dbPath: full path to .mdb file, ex: ``r"c:\sdms\mydb.mdb"``
     :type dbPath: str
+    :param persistent: optional - keep the connection open between statements
+    :type persistent: boolean
     :param connectParams: optional connection parameters
     :type connectParams: dict or None
     '''
@@ -35,9 +42,10 @@ class AccessDatabase(AbstractDatabase):
                     "memo"           : 12}
 
 
-    def __init__(self, path, **connectParams):
+    def __init__(self, path, persistent=False, **connectParams):
         self.__connection = None
         self.__dbPath = os.path.abspath(path)
+        self.__persistent = persistent
         self.__connectParams = connectParams
         self.__importedTables = []
         self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
@@ -87,6 +95,30 @@ class AccessDatabase(AbstractDatabase):
         return self.__connection
     
     
+    def __commit(self):
+        self.__getConnection().commit()
+        if not self.__persistent:
+            self.close()
+            
+            
+    def __rollback(self):
+        # Leaves a persistent connection ready for the next statement.
+        if self.__connection is not None:
+            try:
+                self.__connection.rollback()
+            except pyodbc.Error as e:
+                self.__log.warning("Error rolling back %s: %s", self.__dbPath, e)
+                self.close()
+    
+    
+    def isPersistent(self):
+        '''
+        :returns: whether the connection is kept open between statements
+        :rtype: boolean
+        '''
+        return self.__persistent
+    
+    
     def close(self):
         '''
         Closes the database connection.
@@ -96,14 +128,17 @@ class AccessDatabase(AbstractDatabase):
             self.__connection = None
             
     
-    def query(self, sql, params=None):
+    def query(self, sql, params=None, stream=False):
         '''
-        Performs a read-only query.
+        Performs a read-only query. pyodbc always reads the results as they are
+        needed, so stream has no effect.
 
         :param sql: SQL to execute
         :type sql: str
         :param params: SQL parameters
         :type params: list or None
+        :param stream: ignored
+        :type stream: boolean
         :rtype: list of Row_\s
         
         .. _Row: http://code.google.com/p/pyodbc/wiki/Rows
@@ -137,10 +172,10 @@ class AccessDatabase(AbstractDatabase):
             else:
                 rowCount = self.__getConnection().cursor().execute(sql).rowcount
         except pyodbc.Error as e:
+            self.__rollback()
             raise QueryError(e)
             
-        self.__getConnection().commit()
-        self.close()
+        self.__commit()
         
         return rowCount
     
@@ -157,11 +192,26 @@ class AccessDatabase(AbstractDatabase):
         try:
             self.__getConnection().cursor().executemany(sql, params)
         except pyodbc.Error as e:
+            self.__rollback()
             raise QueryError(e)
         
-        self.__getConnection().commit()
-        self.close()
+        self.__commit()
+        
+    
+    def isHealthy(self):
+        '''
+        See :meth:`.AbstractDatabase.isHealthy`.
+        '''
+        if self.__connection is None:
+            return True
+        
+        try:
+            self.__connection.getinfo(pyodbc.SQL_DBMS_NAME)
+        except pyodbc.Error:
+            return False
         
+        return True
+    
     
     def hasTable(self, tableName):
         '''
@@ -178,7 +228,8 @@ class AccessDatabase(AbstractDatabase):
         except pyodbc.Error as e:
             raise QueryError(e)
 
-        self.close()
+        if not self.__persistent:
+            self.close()
 
         return hasTable
 
@@ -209,6 +260,10 @@ class AccessDatabase(AbstractDatabase):
         if titleColumn:
             columnTypes.insert(0, "str")
 
+        # DAO opens the database separately; Jet caches pages per connection,
+        # so an open ODBC connection would not see the new table straight away.
+        self.close()
+
         dbEngine = win32com.client.Dispatch("DAO.DBEngine.120")
         db = dbEngine.OpenDatabase(self.__dbPath)
         recordSet = None
@@ -217,20 +272,25 @@ class AccessDatabase(AbstractDatabase):
     
             recordSet = db.OpenRecordset(tableName)
             fields = self.__extractFields(recordSet, columnNames)
+            # The title, if any, goes in the first field, and each row's values
+            # in the fields after it.
+            title = dataImport.getName() if titleColumn else None
+            firstField = 1 if titleColumn else 0
             count = 0
             for count, row in enumerate(dataImport.getRows(), 1):
-                if titleColumn:
-                    row.insert(0, dataImport.getName())
-                    
-                if len(row) > len(fields):
+                if len(row) + firstField > len(fields):
                     raise DataImportError(
                             "Error processing data import '{0}': {1} columns "
                             "expected, but data contains {2}. Check configured "
                             "column names.".format(dataImport.getName(),
-                                                   len(fields), len(row)))
+                                                   len(fields),
+                                                   len(row) + firstField))
                 
                 recordSet.AddNew()
-                for i, value in enumerate(row):
+                if titleColumn:
+                    fields[0].Value = title
+                
+                for i, value in enumerate(row, firstField):
                     if self.__isSpace(value):
                         continue
                     fields[i].Value = value
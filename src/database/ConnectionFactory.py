@@ -1,6 +1,3 @@
-# contrib
-from springpython.aop import ProxyFactoryObject
-
 # MincePy
 from AccessDatabase import AccessDatabase
 from PostgresDatabase import PostgresDatabase
@@ -8,40 +5,37 @@ from SQLiteDatabase import SQLiteDatabase
 
 class ConnectionFactory(object):
     '''
-    Spring-python factory for database connections.
+    Factory for database connections.
 
-    :param interceptors: interceptor(s) to apply to returned connections
-    :type interceptors: one or a list of springpython.aop.MethodInterceptor_\s
-    
-    .. _springpython.aop.MethodInterceptor:
-        http://static.springsource.org/spring-python/1.2.x/pydoc/springpython.aop.html#MethodInterceptor
+    :param hooks: optional - hooks to run around calls to the returned
+        connections' methods
+    :type hooks: :class:`.HookRegistry`
     '''
        
-    def __init__(self, interceptors):
-        self.__interceptors = interceptors
+    def __init__(self, hooks=None):
+        self.__hooks = hooks
         
     
     def getConnection(self, **kwargs):
         '''
-        Gets an aop proxy wrapping a database connection, applying any
-        interceptors passed into the factory's constructor.
+        Gets a database connection, wrapped to run any hooks passed into the
+        factory's constructor. Without hooks the database is returned directly.
 
         :param kwargs: connection parameters
         :type kwargs: dict or None
-        :returns: a proxy wrapping a database connection
-        :rtype: springpython.aop.ProxyFactoryObject_
-        
-        .. _springpython.aop.ProxyFactoryObject:
-            http://static.springsource.org/spring-python/1.2.x/pydoc/springpython.aop.html#ProxyFactoryObject
+        :returns: a database connection
+        :rtype: :class:`.AbstractDatabase`
         '''
         path = kwargs.get("path")
         if path:
             if path.endswith(".db"):
-                return ProxyFactoryObject(target=SQLiteDatabase(**kwargs),
-                                          interceptors=self.__interceptors)
-                
-            return ProxyFactoryObject(target=AccessDatabase(**kwargs),
-                                      interceptors=self.__interceptors)
-        
-        return ProxyFactoryObject(target=PostgresDatabase(**kwargs),
-                                  interceptors=self.__interceptors)
+                db = SQLiteDatabase(**kwargs)
+            else:
+                db = AccessDatabase(**kwargs)
+        else:
+            db = PostgresDatabase(**kwargs)
+
+        if self.__hooks is None:
+            return db
+
+        return self.__hooks.wrap(db)
@@ -0,0 +1,45 @@
+# MincePy
+from database.AbstractCursor import AbstractCursor
+
+class CountingCursor(AbstractCursor):
+    '''
+    Wraps a cursor to count the rows read from it.
+
+    :param cursor: the cursor to wrap
+    :type cursor: :class:`.AbstractCursor`
+    '''
+
+    def __init__(self, cursor):
+        self.__cursor = cursor
+        self.__numRows = 0
+
+
+    def next(self):
+        row = self.__cursor.next()
+        self.__numRows += 1
+        return row
+
+
+    def iterBatches(self, size=None):
+        '''
+        See :meth:`.AbstractCursor.iterBatches`.
+        '''
+        for batch in self.__cursor.iterBatches(size):
+            self.__numRows += len(batch)
+            yield batch
+
+
+    def getColumns(self):
+        return self.__cursor.getColumns()
+
+
+    def getTypes(self):
+        return self.__cursor.getTypes()
+
+
+    def getRowCount(self):
+        '''
+        :returns: the number of rows read so far
+        :rtype: int
+        '''
+        return self.__numRows
@@ -19,7 +19,21 @@ class DBAPICompliantDatabaseCursor(AbstractCursor):
             self.__cur.close()
             raise StopIteration()
         
-        return [row[i] for i in range(len(self.__columns))]
+        return list(row)
+        
+    
+    def iterBatches(self, size=None):
+        '''
+        See :meth:`.AbstractCursor.iterBatches`.
+        '''
+        size = size or self.batchSize
+        while True:
+            batch = self.__cur.fetchmany(size)
+            if not batch:
+                self.__cur.close()
+                return
+            
+            yield batch
         
     
     def getColumns(self):
@@ -0,0 +1,308 @@
+# core
+import re
+import struct
+
+# MincePy
+from dataimport.DataImportError import DataImportError
+
+class PostgresCopyReader(object):
+    '''
+    A read-only file-like object which formats rows for Postgres' COPY FROM
+    STDIN, for use with psycopg2's ``cursor.copy_expert``. Rows are formatted
+    as they are read, in chunks of the size requested by the caller, so the
+    data is never held in memory all at once.
+
+    Supported formats:
+        text   - tab-separated, with backslash escapes and NULL as \\N
+        csv    - comma-separated, with strings quoted and NULL left empty
+        binary - Postgres' binary COPY format, which the server does not need
+                 to parse; values must fit the column types exactly, so
+                 INTEGER columns reject fractions and values outside 32 bits
+
+    In every format, blank strings - empty or only whitespace - are copied as
+    NULL, as :class:`.SQLiteDatabase` imports them.
+
+    :param rows: the rows to copy
+    :type rows: iterator of lists
+    :param sqlTypes: the Postgres types of the columns, in the same order as the
+        values in each row (see :attr:`.PostgresDatabase.pyToSqlTypes`)
+    :type sqlTypes: list of str
+    :param title: optional - a value to insert before the other values in each
+        row, i.e. the name of the data import for its title column
+    :type title: str
+    :param format: optional - the COPY format to use; defaults to text
+    :type format: str
+    :raises: :exc:`ValueError` if the format is not supported; rows which
+        cannot be formatted raise :exc:`.DataImportError` as they are read
+    '''
+
+    FORMATS = ("text", "csv", "binary")
+
+    _BINARY_HEADER = "PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+    _BINARY_TRAILER = struct.pack(">h", -1)
+    _BINARY_NULL = struct.pack(">i", -1)
+    _MIN_INTEGER = -2 ** 31
+    _MAX_INTEGER = 2 ** 31 - 1
+
+    def __init__(self, rows, sqlTypes, title=None, format="text"):
+        if format not in PostgresCopyReader.FORMATS:
+            raise ValueError("Unsupported COPY format '{0}': expected one of {1}"
+                             .format(format, ", ".join(PostgresCopyReader.FORMATS)))
+
+        self.__rows = iter(rows)
+        self.__format = format
+        self.__title = title
+        self.__buffer = []
+        self.__bufferSize = 0
+        self.__finished = False
+        self.__numRows = 0
+        self.__error = None
+
+        if format == "binary":
+            self.__formatRow = self.__formatBinaryRow
+            self.__binaryEncoders = [self.__getBinaryEncoder(sqlType)
+                                     for sqlType in sqlTypes]
+            if title is not None:
+                self.__binaryEncoders.insert(0, self.__encodeBinaryText)
+            self.__append(PostgresCopyReader._BINARY_HEADER)
+        elif format == "csv":
+            self.__formatRow = self.__formatCSVRow
+        else:
+            self.__formatRow = self.__formatTextRow
+
+
+    def __append(self, data):
+        self.__buffer.append(data)
+        self.__bufferSize += len(data)
+
+
+    def __fill(self, size):
+        rows = self.__rows
+        formatRow = self.__formatRow
+        title = self.__title
+        buffer = self.__buffer
+        bufferSize = self.__bufferSize
+        while not self.__finished and (size < 0 or bufferSize < size):
+            try:
+                row = rows.next()
+            except StopIteration:
+                self.__finished = True
+                if self.__format == "binary":
+                    buffer.append(PostgresCopyReader._BINARY_TRAILER)
+                    bufferSize += len(PostgresCopyReader._BINARY_TRAILER)
+                break
+
+            if title is not None:
+                row = [title] + list(row)
+
+            self.__numRows += 1
+            try:
+                data = formatRow(row)
+            except (TypeError, ValueError) as e:
+                # Kept, as the caller of read() may replace the error.
+                self.__error = DataImportError("Cannot copy row {0}: {1}"
+                                               .format(self.__numRows, e))
+                raise self.__error
+
+            buffer.append(data)
+            bufferSize += len(data)
+
+        self.__bufferSize = bufferSize
+
+
+    def __take(self, size):
+        data = "".join(self.__buffer)
+        if size < 0 or size >= len(data):
+            self.__buffer = []
+            self.__bufferSize = 0
+            return data
+
+        self.__buffer = [data[size:]]
+        self.__bufferSize = len(data) - size
+        return data[:size]
+
+
+    def __formatTextRow(self, row):
+        encoders = _TEXT_ENCODERS
+        return "\t".join([encoders.get(type(value), _toStr)(value)
+                          for value in row]) + "\n"
+
+
+    def __formatCSVRow(self, row):
+        encoders = _CSV_ENCODERS
+        return ",".join([encoders.get(type(value), _toStr)(value)
+                         for value in row]) + "\n"
+
+
+    def __getBinaryEncoder(self, sqlType):
+        if sqlType == "INTEGER":
+            return self.__encodeBinaryInteger
+        if sqlType == "REAL":
+            return self.__encodeBinaryReal
+
+        return self.__encodeBinaryText
+
+
+    @staticmethod
+    def __encodeBinaryInteger(value):
+        valueType = type(value)
+        if valueType is float:
+            if not value.is_integer():
+                raise ValueError("{0!r} is not an integer".format(value))
+            value = int(value)
+        elif valueType is str or valueType is unicode:
+            value = int(value)
+        elif valueType is not int and valueType is not long \
+                and valueType is not bool:
+            raise TypeError("{0!r} is not an integer".format(value))
+
+        if not PostgresCopyReader._MIN_INTEGER <= value \
+                <= PostgresCopyReader._MAX_INTEGER:
+            raise ValueError("{0} is out of range for type integer"
+                             .format(value))
+
+        return struct.pack(">ii", 4, value)
+
+
+    @staticmethod
+    def __encodeBinaryReal(value):
+        valueType = type(value)
+        if valueType is str or valueType is unicode:
+            value = float(value)
+        elif valueType is not float and valueType is not int \
+                and valueType is not long and valueType is not bool:
+            raise TypeError("{0!r} is not a number".format(value))
+
+        try:
+            return struct.pack(">if", 4, value)
+        except (OverflowError, struct.error):
+            raise ValueError("{0!r} is out of range for type real"
+                             .format(value))
+
+
+    @staticmethod
+    def __encodeBinaryText(value):
+        value = _toStr(value)
+        return struct.pack(">i", len(value)) + value
+
+
+    def __formatBinaryRow(self, row):
+        fields = [struct.pack(">h", len(row))]
+        for encode, value in zip(self.__binaryEncoders, row):
+            valueType = type(value)
+            if value is None or ((valueType is str or valueType is unicode)
+                                 and not value.strip()):
+                fields.append(PostgresCopyReader._BINARY_NULL)
+            else:
+                fields.append(encode(value))
+
+        return "".join(fields)
+
+
+    def getError(self):
+        '''
+        :returns: the error raised formatting a row, if any
+        :rtype: :class:`.DataImportError`
+        '''
+        return self.__error
+
+
+    def getFormat(self):
+        '''
+        :returns: the COPY format the rows are written in
+        :rtype: str
+        '''
+        return self.__format
+
+
+    def getCopySql(self, tableName, columnNames):
+        '''
+        :param tableName: the table to copy the rows into
+        :type tableName: str
+        :param columnNames: the columns to copy the rows into, including the
+            title column, if any
+        :type columnNames: list of str
+        :returns: the COPY statement which reads this object's data
+        :rtype: str
+        '''
+        return "COPY {0} ({1}) FROM STDIN WITH (FORMAT {2})".format(
+                tableName, ", ".join(columnNames), self.__format)
+
+
+    def read(self, size=-1):
+        '''
+        Reads formatted rows.
+
+        :param size: optional - the maximum number of bytes to read; by default
+            all of the remaining rows are read
+        :type size: int
+        :returns: up to size bytes of data, or an empty string once all of
+            the rows have been read
+        :rtype: str
+        '''
+        if size is None:
+            size = -1
+
+        self.__fill(size)
+        return self.__take(size)
+
+
+def _toStr(value):
+    if type(value) is unicode:
+        return value.encode("utf-8")
+
+    return str(value)
+
+
+_TEXT_SPECIAL_CHARS = re.compile(r"[\\\t\n\r]")
+
+
+def _escapeText(value):
+    # Most values contain nothing to escape, so checks before substituting.
+    if _TEXT_SPECIAL_CHARS.search(value) is None:
+        return value
+
+    # Backslash first, so that the escapes added below are not escaped again.
+    return (value.replace("\\", "\\\\").replace("\t", "\\t")
+                 .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _encodeText(value):
+    if not value.strip():
+        return "\\N"
+
+    if type(value) is unicode:
+        value = value.encode("utf-8")
+
+    return _escapeText(value)
+
+
+def _encodeCSV(value):
+    # Strings are always quoted, so that delimiters and line breaks in them
+    # need no other escaping.
+    if not value.strip():
+        return ""
+
+    if type(value) is unicode:
+        value = value.encode("utf-8")
+
+    return '"' + value.replace('"', '""') + '"'
+
+
+# Floats are imported into REAL columns, for which str()'s 12 significant digits
+# are more than enough, and str() is much faster than repr().
+_TEXT_ENCODERS = {type(None): lambda value: "\\N",
+                  int       : str,
+                  long      : str,
+                  float     : str,
+                  bool      : lambda value: "1" if value else "0",
+                  str       : _encodeText,
+                  unicode   : _encodeText}
+
+_CSV_ENCODERS = {type(None): lambda value: "",
+                 int       : str,
+                 long      : str,
+                 float     : str,
+                 bool      : lambda value: "1" if value else "0",
+                 str       : _encodeCSV,
+                 unicode   : _encodeCSV}
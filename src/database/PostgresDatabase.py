@@ -1,5 +1,6 @@
 # core
 import logging
+import itertools
 
 # contrib
 import psycopg2
@@ -7,6 +8,7 @@ import psycopg2
 # MincePy
 from database.AbstractDatabase import AbstractDatabase
 from database.PostgresDatabaseCursor import PostgresDatabaseCursor
+from database.PostgresCopyReader import PostgresCopyReader
 from database.query.QueryError import QueryError
 from dataimport.DataImportError import DataImportError
 
@@ -24,6 +26,9 @@ class PostgresDatabase(AbstractDatabase):
     :type db: str
     :param schema: optional - the schema to execute queries against
     :type schema: str
+    :param copyFormat: optional - the COPY format used to import data: text
+        (the default), csv, or binary; see :class:`.PostgresCopyReader`
+    :type copyFormat: str
     '''
 
     pyToSqlTypes = {"unicode"        : "TEXT",
@@ -33,15 +38,24 @@ class PostgresDatabase(AbstractDatabase):
                     "str"            : "TEXT",
                     "bool"           : "INTEGER",
                     "memo"           : "TEXT"}
+
+    copyBufferSize = 65536
+    
+    # The number of rows fetched at a time from server-side cursors.
+    streamBatchSize = 10000
+    
+    __cursorNames = itertools.count(1)
     
 
-    def __init__(self, host, user, pwd, db, schema=None):
+    def __init__(self, host, user, pwd, db, schema=None, copyFormat="text"):
         self.__connection = None
         self.__host = host
         self.__user = user
         self.__pwd = pwd
         self.__db = db
         self.__schema = schema
+        self.__copyFormat = copyFormat
+        self.__typeNames = {}
         self.__importedTables = []
         self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
         
@@ -50,7 +64,7 @@ class PostgresDatabase(AbstractDatabase):
         return "{0}:{1}@{2}".format(self.__db, self.__schema, self.__host)
         
 
-    def __getCursor(self):
+    def __getCursor(self, name=None):
         if not self.__connection:
             self.__connection = psycopg2.connect(
                    "host='{host}' dbname='{db}' user='{user}' password='{pwd}'"
@@ -58,10 +72,18 @@ class PostgresDatabase(AbstractDatabase):
                            pwd=self.__pwd))
             
         cur = self.__connection.cursor()
-        cur.itersize = 10000
+        cur.itersize = PostgresDatabase.streamBatchSize
         if self.__schema:
             cur.execute("SET search_path = {0}".format(self.__schema))
 
+        if name:
+            # A named cursor can only execute a single query, so the search
+            # path is set on an unnamed one first. The cursor is held open
+            # across commits, i.e. when importing into the same database.
+            cur.close()
+            cur = self.__connection.cursor(name=name, withhold=True)
+            cur.itersize = PostgresDatabase.streamBatchSize
+
         return cur
     
     
@@ -79,31 +101,6 @@ class PostgresDatabase(AbstractDatabase):
             self.__importedTables.append(tableName)
             
             
-    class __FileProtocolWrapper(object):
-        
-        def __init__(self, rows, title=None):
-            self.__rows = rows
-            self.__title = title
-            
-        
-        def read(self, size=None):
-            return self.readline()
-        
-        
-        def readline(self, size=None):
-            try:
-                values = []
-                if self.__title:
-                    values.append(self.__title)
-                values.extend(self.__rows.next())
-                row = "{}\n".format(",".join("{}".format(value)
-                                             if value is not None else ""
-                                             for value in values))
-                return row
-            except StopIteration:
-                return ""
-            
-    
     def close(self):
         '''
         See :meth:`.AbstractDatabase.close'.
@@ -111,22 +108,34 @@ class PostgresDatabase(AbstractDatabase):
         if self.__connection is not None:
             self.__connection.close()
             self.__connection = None
+            self.__typeNames = {}
             
     
-    def query(self, sql, params=None):
+    def query(self, sql, params=None, stream=False):
         '''
-        See :meth:`.AbstractDatabase.query'.
+        See :meth:`.AbstractDatabase.query'. When streaming, the query runs in
+        a named server-side cursor and rows are fetched
+        :attr:`streamBatchSize` at a time, instead of the whole result set
+        being loaded into memory when the query runs.
         '''
-        try:        
-            cur = self.__getCursor()
+        name = "mincepy_{0}".format(next(PostgresDatabase.__cursorNames)) \
+            if stream else None
+            
+        try:
+            cur = self.__getCursor(name)
             if params is not None:
                 cur.execute(sql, params)
             else:
                 cur.execute(sql)
+            
+            # A server-side cursor's description is only available once rows
+            # have been fetched from it.
+            peekedRows = cur.fetchmany(PostgresDatabase.streamBatchSize) \
+                if stream else None
         except psycopg2.ProgrammingError as e:
             raise QueryError(e)
             
-        return PostgresDatabaseCursor(self.__connection, cur, cur.description)
+        return PostgresDatabaseCursor(self, cur, cur.description, peekedRows)
     
         
     def execute(self, sql, params=None):
@@ -201,6 +210,60 @@ class PostgresDatabase(AbstractDatabase):
             raise QueryError(e)
 
 
+    def getTypeNames(self, oids):
+        '''
+        Looks up the names of Postgres types, i.e. for the type codes in a
+        cursor's description. Names are cached for the life of the connection,
+        so each type is only looked up once.
+
+        :param oids: the OIDs of the types to look up
+        :type oids: list of int
+        :returns: the type names by OID; OIDs not found in pg_type are left out
+        :rtype: dict of int to str
+        '''
+        missing = set(oids).difference(self.__typeNames)
+        if missing:
+            try:
+                with self.__getCursor() as cur:
+                    cur.execute("SELECT oid, typname FROM pg_type WHERE oid IN %s",
+                                (tuple(missing),))
+                    self.__typeNames.update(cur.fetchall())
+            except psycopg2.ProgrammingError as e:
+                raise QueryError(e)
+
+            for oid in missing.difference(self.__typeNames):
+                self.__log.debug("No pg_type entry for type OID %s.", oid)
+
+        return dict((oid, self.__typeNames.get(oid)) for oid in oids
+                    if oid in self.__typeNames)
+
+
+    def isHealthy(self):
+        '''
+        See :meth:`.AbstractDatabase.isHealthy`.
+        '''
+        if self.__connection is None:
+            return True
+        
+        if self.__connection.closed:
+            return False
+        
+        try:
+            with self.__connection.cursor() as cur:
+                cur.execute("SELECT 1")
+        except psycopg2.Error:
+            return False
+        
+        return True
+
+
+    def supportsConcurrentQueries(self):
+        '''
+        See :meth:`.AbstractDatabase.supportsConcurrentQueries`.
+        '''
+        return True
+
+
     def importData(self, dataImport):
         '''
         Imports data into the database.
@@ -222,17 +285,29 @@ class PostgresDatabase(AbstractDatabase):
         if titleColumn:
             columnNames.insert(0, titleColumn)
         
-        columnTypes = dataImport.getTypes()
+        dataTypes = list(dataImport.getTypes())
+        columnTypes = list(dataTypes)
         if titleColumn:
             columnTypes.insert(0, "str")
 
         self.__initializeTable(tableName, columnNames, columnTypes)
 
-        with self.__getCursor() as cur:
-            cur.copy_from(file=self.__FileProtocolWrapper(
-                                  dataImport.getRows(),
-                                  title=dataImport.getName() if titleColumn else None),
-                          table=tableName,
-                          sep=",",
-                          columns=columnNames,
-                          null="")
+        reader = PostgresCopyReader(
+                dataImport.getRows(),
+                [PostgresDatabase.pyToSqlTypes[colType] for colType in dataTypes],
+                title=dataImport.getName() if titleColumn else None,
+                format=self.__copyFormat)
+
+        try:
+            with self.__getCursor() as cur:
+                cur.copy_expert(reader.getCopySql(tableName, columnNames), reader,
+                                size=PostgresDatabase.copyBufferSize)
+        except (psycopg2.Error, DataImportError) as e:
+            self.__connection.rollback()
+            # psycopg2 may replace an error raised formatting a row with its
+            # own, which does not say what was wrong with the row.
+            raise DataImportError(
+                    "Error processing data import '{0}': {1}".format(
+                            dataImport.getName(), reader.getError() or e))
+
+        self.__connection.commit()
@@ -5,32 +5,76 @@ class PostgresDatabaseCursor(AbstractCursor):
     '''
     Wraps a Postgres database cursor to standardize the way MincePy modules
     interact with them.
+
+    :param db: the database the cursor belongs to, which looks up the names of
+        the column types
+    :type db: :class:`.PostgresDatabase`
+    :param cursor: the psycopg2 cursor
+    :param description: the cursor's description
+    :type description: list of tuples
+    :param peekedRows: optional - rows already fetched from the cursor, which
+        are returned before any further rows
+    :type peekedRows: list of tuples
     '''
 
     pgToPyTypes = {"bool"   : "bool",
+                   "int2"   : "int",
                    "int4"   : "int",
+                   "int8"   : "int",
+                   "float4" : "float",
                    "float8" : "float",
+                   "numeric": "decimal.Decimal",
                    "text"   : "str",
                    "varchar": "str",
+                   "bpchar" : "str",
                    "name"   : "str",
                    "unknown": "str"}
 
+    # The python type of columns whose Postgres type has no mapping.
+    defaultPyType = "str"
+
     
-    def __init__(self, db, cursor, description):
+    def __init__(self, db, cursor, description, peekedRows=None):
         self.__db = db
         self.__cur = cursor
         self.__description = description
         self.__columns = []
         self.__types = []
+        self.__peekedRows = list(reversed(peekedRows or []))
+        # Iterating fetches itersize rows at a time from server-side cursors,
+        # where fetchone() would make a round trip per row.
+        self.__rows = iter(cursor)
         
     
     def next(self):
-        row = self.__cur.fetchone()
+        if self.__peekedRows:
+            return list(self.__peekedRows.pop())
+        
+        row = next(self.__rows, None)
         if row is None:
             self.__cur.close()
             raise StopIteration()
         
-        return [row[i] for i in range(len(self.__columns))]
+        return list(row)
+        
+    
+    def iterBatches(self, size=None):
+        '''
+        See :meth:`.AbstractCursor.iterBatches`.
+        '''
+        size = size or self.batchSize
+        peekedRows = list(reversed(self.__peekedRows))
+        self.__peekedRows = []
+        for i in xrange(0, len(peekedRows), size):
+            yield peekedRows[i:i + size]
+        
+        while True:
+            batch = self.__cur.fetchmany(size)
+            if not batch:
+                self.__cur.close()
+                return
+            
+            yield batch
         
     
     def getColumns(self):
@@ -42,19 +86,12 @@ class PostgresDatabaseCursor(AbstractCursor):
     
     def getTypes(self):
         if self.__description and not self.__types:
-            typeIds = [col[1] for col in self.__description]
-            self.__types = []
-            for oid in typeIds:
-                cur = self.__db.cursor()
-                cur.execute("SELECT typname FROM pg_type WHERE oid = {0}"
-                            .format(oid))
-                
-                pgType = cur.fetchone()[0]
-                cur.close()
-                if pgType not in PostgresDatabaseCursor.pgToPyTypes:
-                    raise KeyError("No python type mapping for pg type: {0}"
-                                   .format(pgType))
-                
-                self.__types.append(PostgresDatabaseCursor.pgToPyTypes[pgType])
+            typeNames = self.__db.getTypeNames(
+                    [col[1] for col in self.__description])
+            self.__types = [
+                    PostgresDatabaseCursor.pgToPyTypes.get(
+                            typeNames.get(col[1]),
+                            PostgresDatabaseCursor.defaultPyType)
+                    for col in self.__description]
 
         return self.__types
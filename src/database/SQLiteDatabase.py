@@ -1,7 +1,9 @@
 # core
 import os
 import re
+import sys
 import logging
+import itertools
 
 # contrib
 import sqlite3
@@ -18,8 +20,11 @@ class SQLiteDatabase(AbstractDatabase):
 
     :param dbPath: full path to .db file, ex: ``r"c:\sdms\mydb.db"``
     :type dbPath: str
-    :param connectParams: optional connection parameters
-    :type connectParams: dict or None
+    :param bulkLoad: optional - whether to import data in bulk-load mode: each
+        data import runs in a single transaction with journaling and syncing
+        turned off, which is much faster but can leave the database corrupt if
+        the import fails or the process is killed part-way through
+    :type bulkLoad: boolean
     '''
 
     pyToSqlTypes = {"unicode"        : "TEXT",
@@ -29,11 +34,26 @@ class SQLiteDatabase(AbstractDatabase):
                     "str"            : "TEXT",
                     "bool"           : "INTEGER",
                     "memo"           : "TEXT"}
+
+    # Settings applied for the duration of a bulk load. The cache size is in
+    # KiB when negative.
+    bulkLoadPragmas = [("journal_mode", "OFF"),
+                       ("synchronous" , "OFF"),
+                       ("cache_size"  , "-131072")]
+    
+    importBatchSize = 10000
+    
+    # The maximum number of rows read ahead to find each column's type.
+    typeSampleRows = 100
+    
+    # The column types last found for each SQL query, shared by all databases.
+    __typeCache = {}
     
 
-    def __init__(self, path):
+    def __init__(self, path, bulkLoad=False):
         self.__connection = None
         self.__dbPath = os.path.abspath(path)
+        self.__bulkLoad = bulkLoad
         self.__importedTables = []
         self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
         
@@ -53,7 +73,9 @@ class SQLiteDatabase(AbstractDatabase):
         :rtype: connection
         '''
         try:
-            connection = sqlite3.connect(dbPath)
+            # Pooled connections can be used by more than one thread, although
+            # never by two at once.
+            connection = sqlite3.connect(dbPath, check_same_thread=False)
         except sqlite3.Error as detail:
             raise Exception("Error connecting to %s: %s" % (dbPath, detail))
             
@@ -80,11 +102,8 @@ class SQLiteDatabase(AbstractDatabase):
     
     
     def __isSpace(self, value):
-        if isinstance(value, str):
-            return str(value).isspace() or str(value) == ""
-        if isinstance(value, unicode):
-            return unicode(value).isspace() or unicode(value) == ""
-        return False
+        valueType = type(value)
+        return (valueType is str or valueType is unicode) and not value.strip()
     
     
     def __initializeTable(self, tableName, columnNames, columnTypes):
@@ -101,23 +120,37 @@ class SQLiteDatabase(AbstractDatabase):
             self.__importedTables.append(tableName)
     
     
-    def __getMetadata(self, sql, params=None):
-        firstRowSql = "SELECT * FROM ({}) LIMIT 1".format(sql)
-        try:
-            if params is not None:
-                cur = self.__getConnection().cursor().execute(firstRowSql, params)
-            else:
-                cur = self.__getConnection().cursor().execute(firstRowSql)
-        except sqlite3.Error as e:
-            raise QueryError(e)
+    def __getMetadata(self, sql, cur):
+        '''
+        Gets the column names and python types of a query's results from the
+        query's open cursor. The types are taken from the first non-null value
+        in each column among the first few rows, which are returned to be
+        replayed; any types not found that way come from the last time the
+        same SQL returned them, or default to str.
+        '''
+        cols = [col[0] for col in cur.description or []]
+        types = [None] * len(cols)
+        peekedRows = []
+        while None in types and len(peekedRows) < SQLiteDatabase.typeSampleRows:
+            row = cur.fetchone()
+            if row is None:
+                break
+            
+            peekedRows.append(row)
+            for i, value in enumerate(row):
+                if types[i] is None and value is not None:
+                    types[i] = str(type(value)).split("'")[1]
 
-        description = cur.description
-        firstRow = cur.fetchone()
-        cols = [col[0] for col in description]
-        types = [str(type(firstRow[i])).split("'")[1] for i in range(len(cols))]
-        cur.close()
+        cachedTypes = SQLiteDatabase.__typeCache.get(sql)
+        if None not in types:
+            SQLiteDatabase.__typeCache[sql] = types
+        elif cachedTypes and len(cachedTypes) == len(types):
+            types = [cachedType if colType is None else colType
+                     for colType, cachedType in zip(types, cachedTypes)]
         
-        return (cols, types)
+        types = ["str" if colType is None else colType for colType in types]
+        
+        return (cols, types, peekedRows)
     
     
     def close(self):
@@ -129,14 +162,17 @@ class SQLiteDatabase(AbstractDatabase):
             self.__connection = None
     
     
-    def query(self, sql, params=None):
+    def query(self, sql, params=None, stream=False):
         '''
-        Performs a read-only query.
+        Performs a read-only query. SQLite always reads the results as they
+        are needed, so stream has no effect.
 
         :param sql: SQL to execute
         :type sql: str
         :param params: SQL parameters
         :type params: list or None
+        :param stream: ignored
+        :type stream: boolean
         :rtype: list of rows
         '''
         try:
@@ -144,12 +180,12 @@ class SQLiteDatabase(AbstractDatabase):
                 cur = self.__getConnection().cursor().execute(sql, params)
             else:
                 cur = self.__getConnection().cursor().execute(sql)
+        
+            cols, types, peekedRows = self.__getMetadata(sql, cur)
         except sqlite3.Error as e:
             raise QueryError(e)
         
-        cols, types = self.__getMetadata(sql, params)
-        
-        return SQLiteDatabaseCursor(cur, cols, types)
+        return SQLiteDatabaseCursor(cur, cols, types, peekedRows)
     
         
     def execute(self, sql, params=None):
@@ -211,6 +247,36 @@ class SQLiteDatabase(AbstractDatabase):
             raise QueryError(e)
 
 
+    def isHealthy(self):
+        '''
+        See :meth:`.AbstractDatabase.isHealthy`.
+        '''
+        if self.__connection is None:
+            return True
+        
+        try:
+            self.__connection.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        
+        return True
+
+
+    def supportsConcurrentQueries(self):
+        '''
+        See :meth:`.AbstractDatabase.supportsConcurrentQueries`. SQLite only
+        allows other connections to read while one connection is writing when
+        the database is in WAL journal mode.
+        '''
+        try:
+            journalMode = self.__getConnection().execute(
+                    "PRAGMA journal_mode").fetchone()[0]
+        except sqlite3.Error as e:
+            raise QueryError(e)
+        
+        return journalMode.lower() == "wal"
+    
+    
     def importData(self, dataImport):
         '''
         Imports data into the database.
@@ -233,7 +299,7 @@ class SQLiteDatabase(AbstractDatabase):
             columnNames.insert(0, titleColumn)
         columnNames = self.__cleanColumnNames(columnNames)
         
-        columnTypes = dataImport.getTypes()
+        columnTypes = list(dataImport.getTypes())
         if titleColumn:
             columnTypes.insert(0, "str")
 
@@ -243,32 +309,128 @@ class SQLiteDatabase(AbstractDatabase):
             .format(table=tableName,
                     columns=",".join(columnNames),
                     placeholders=",".join("?" * len(columnNames)))
-            
-        batch = []
-        for count, row in enumerate(dataImport.getRows(), 1):
-            if titleColumn:
-                row.insert(0, dataImport.getName())
+
+        rows = self.__prepareRows(dataImport, len(columnNames))
+        if self.__bulkLoad:
+            self.__bulkInsert(tableName, insertSql, rows)
+        else:
+            while True:
+                batch = list(itertools.islice(rows, SQLiteDatabase.importBatchSize))
+                if not batch:
+                    break
                 
-            if len(row) > len(columnNames):
+                self.executeMany(insertSql, batch)
+
+
+    def __prepareRows(self, dataImport, numColumns):
+        # The title, if any, is added to each row as it is copied, rather than
+        # inserted in front of its values.
+        titleValues = [dataImport.getName()] if dataImport.getTitleColumn() \
+            else []
+        numValues = numColumns - len(titleValues)
+        isSpace = self.__isSpace
+        chain = itertools.chain
+        count = 0
+        for count, row in enumerate(dataImport.getRows(), 1):
+            if len(row) > numValues:
                 raise DataImportError(
                         "Error processing data import '{0}': {1} columns "
                         "expected, but data contains {2}. Check configured "
                         "column names.".format(dataImport.getName(),
-                                               len(columnNames), len(row)))
+                                               numColumns,
+                                               len(row) + len(titleValues)))
             
-            data = []
-            for value in row:
-                if self.__isSpace(value):
-                    data.append(None)
-                data.append(value)
-            batch.append(data)
+            values = chain(titleValues, row) if titleValues else row
+            yield [None if isSpace(value) else value for value in values]
             
-            if count % 10000 == 0:
-                if batch:
-                    self.executeMany(insertSql, batch)
-                    self.__log.info("Imported %d rows." % count)
-                    batch = []
+            if count % SQLiteDatabase.importBatchSize == 0:
+                self.__log.info("Imported %d rows." % count)
         
-        if batch:
-            self.executeMany(insertSql, batch)
+        if count % SQLiteDatabase.importBatchSize:
             self.__log.info("Imported %d rows." % count)
+
+
+    def __getPragma(self, name):
+        return self.__getConnection().execute(
+                "PRAGMA {0}".format(name)).fetchone()[0]
+
+
+    def __bulkInsert(self, tableName, insertSql, rows):
+        '''
+        Inserts rows in a single transaction, with the bulk-load pragmas
+        applied and the table's indexes dropped until all of the rows are in.
+        If the insert fails, the transaction is rolled back and any of the
+        table's indexes still missing are created again.
+        '''
+        connection = self.__getConnection()
+        try:
+            connection.commit()
+            originalPragmas = [(name, self.__getPragma(name))
+                               for name, _ in SQLiteDatabase.bulkLoadPragmas]
+            for name, value in SQLiteDatabase.bulkLoadPragmas:
+                # A database in WAL mode already allows fast appends, and
+                # leaving WAL requires exclusive access to the database.
+                if name == "journal_mode" \
+                and dict(originalPragmas)[name].lower() == "wal":
+                    continue
+                
+                connection.execute("PRAGMA {0} = {1}".format(name, value))
+
+            indexes = connection.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                    "AND tbl_name = ? AND sql IS NOT NULL", [tableName]).fetchall()
+        except sqlite3.Error as e:
+            raise QueryError(e)
+
+        # The sqlite3 module commits before DROP INDEX and CREATE INDEX unless
+        # it is left to the caller to manage transactions.
+        isolationLevel = connection.isolation_level
+        connection.isolation_level = None
+        try:
+            try:
+                connection.execute("BEGIN")
+                for name, _ in indexes:
+                    connection.execute("DROP INDEX {0}".format(name))
+                    
+                connection.executemany(insertSql, rows)
+                
+                for _, sql in indexes:
+                    connection.execute(sql)
+
+                connection.execute("COMMIT")
+            except:
+                error = sys.exc_info()
+                self.__abortBulkInsert(tableName, indexes)
+                raise error[0], error[1], error[2]
+        except sqlite3.Error as e:
+            raise QueryError(e)
+        finally:
+            connection.isolation_level = isolationLevel
+            try:
+                for name, value in originalPragmas:
+                    connection.execute("PRAGMA {0} = {1}".format(name, value))
+            except sqlite3.Error as e:
+                raise QueryError(e)
+
+
+    def __abortBulkInsert(self, tableName, indexes):
+        # With journaling off a rollback may not undo anything, so the indexes
+        # are checked for afterwards. Errors here are only logged, so as not to
+        # hide the error that caused the insert to fail.
+        connection = self.__getConnection()
+        try:
+            connection.execute("ROLLBACK")
+        except sqlite3.Error as e:
+            self.__log.debug("Error rolling back bulk insert into %s: %s",
+                             tableName, e)
+        
+        try:
+            existing = set(name for name, in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' "
+                    "AND tbl_name = ?", [tableName]))
+            for name, sql in indexes:
+                if name not in existing:
+                    connection.execute(sql)
+        except sqlite3.Error as e:
+            self.__log.error("Error restoring the indexes of %s: %s",
+                             tableName, e)
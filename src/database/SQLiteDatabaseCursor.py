@@ -5,21 +5,53 @@ class SQLiteDatabaseCursor(AbstractCursor):
     '''
     Wraps a SQLite cursor to standardize the way MincePy modules interact
     with them.
+    
+    :param cursor: the SQLite cursor
+    :param cols: the names of the columns in the results
+    :type cols: list of str
+    :param types: the python types of the columns in the results
+    :type types: list of str
+    :param peekedRows: optional - rows already read from the cursor, which are
+        returned before any further rows
+    :type peekedRows: list of tuples
     '''
     
-    def __init__(self, cursor, cols, types):
+    def __init__(self, cursor, cols, types, peekedRows=None):
         self.__columns = cols
         self.__types = types
         self.__cur = cursor
+        self.__peekedRows = list(reversed(peekedRows or []))
         
     
     def next(self):
+        if self.__peekedRows:
+            return list(self.__peekedRows.pop())
+        
         row = self.__cur.fetchone()
         if row is None:
             self.__cur.close()
             raise StopIteration()
         
-        return [row[i] for i in range(len(self.__columns))]
+        return list(row)
+        
+    
+    def iterBatches(self, size=None):
+        '''
+        See :meth:`.AbstractCursor.iterBatches`.
+        '''
+        size = size or self.batchSize
+        peekedRows = list(reversed(self.__peekedRows))
+        self.__peekedRows = []
+        for i in xrange(0, len(peekedRows), size):
+            yield peekedRows[i:i + size]
+        
+        while True:
+            batch = self.__cur.fetchmany(size)
+            if not batch:
+                self.__cur.close()
+                return
+            
+            yield batch
         
     
     def getColumns(self):
@@ -19,3 +19,13 @@ class AbstractQueryFeature(object):
             ahead of time.
         '''
         raise NotImplementedError
+
+    
+    def writesSharedOutput(self):
+        '''
+        :returns: whether this feature makes the query write to an output which
+            is shared by every database, and so must not be run against more
+            than one database at a time
+        :rtype: boolean
+        '''
+        return False
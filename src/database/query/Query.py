@@ -21,6 +21,8 @@ class Query(object):
         self.__sql = sql
         self.__features = []
         self.__outputHandler = None
+        self.__dependencies = None
+        self.__streamed = False
 
 
     def addFeature(self, feature):
@@ -54,6 +56,57 @@ class Query(object):
         return self.__outputHandler
         
     
+    def setDependencies(self, dependencies):
+        '''
+        Sets the titles of the queries which must finish before this query can
+        run. Queries with no declared dependencies wait for every query before
+        them in the configured order.
+        
+        :param dependencies: the titles of the queries this query depends on
+        :type dependencies: list of str
+        '''
+        self.__dependencies = list(dependencies)
+        
+    
+    def getDependencies(self):
+        '''
+        :returns: the titles of the queries which must finish before this query
+            can run, or None if the query did not declare any
+        :rtype: list of str
+        '''
+        return self.__dependencies
+        
+    
+    def setStreamed(self, streamed):
+        '''
+        Sets whether the query's results are fetched from the database as they
+        are read, instead of all at once, for queries returning more rows than
+        fit in memory. See :meth:`.AbstractDatabase.query`.
+        
+        :param streamed: whether to stream the query's results
+        :type streamed: boolean
+        '''
+        self.__streamed = streamed
+        
+    
+    def isStreamed(self):
+        '''
+        :returns: whether the query's results are fetched from the database as
+            they are read
+        :rtype: boolean
+        '''
+        return self.__streamed
+        
+    
+    def writesSharedOutput(self):
+        '''
+        :returns: whether any of this query's features write to an output shared
+            by every database, i.e. a reporting table
+        :rtype: boolean
+        '''
+        return any(feature.writesSharedOutput() for feature in self.__features)
+        
+    
     def getTitle(self):
         '''
         :returns: the title of this query
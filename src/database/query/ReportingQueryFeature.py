@@ -42,6 +42,14 @@ class ReportingQueryFeature(AbstractQueryFeature):
         return sql
 
 
+    def writesSharedOutput(self):
+        '''
+        See :meth:`.AbstractQueryFeature.writesSharedOutput`. The output table
+        is created by whichever database runs the query first.
+        '''
+        return True
+
+
     def __tableExistsOrCreatePending(self):
         if self.__outputTable in self.__pendingNewTables:
             return True
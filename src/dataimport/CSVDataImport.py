@@ -1,8 +1,18 @@
 # MincePy
 from DataImport import DataImport
+from DataImportError import DataImportError
 
 # core
+import collections
+import cStringIO
 import csv
+import itertools
+import mmap
+import multiprocessing
+import os
+import Queue
+import random
+import re
 
 class CSVDataImport(DataImport):
     '''
@@ -17,14 +27,68 @@ class CSVDataImport(DataImport):
     :param titleColumn: the name of the identifier column if multiple data
         imports are being stored in the same table
     :type titleColumn: str
+    :param engine: optional - "standard" converts the values of each row as it
+        is read; "fast" converts a block of rows at a time, a whole column at
+        once, with NumPy (see :class:`.ColumnarConverter`). Both produce the
+        same rows.
+    :type engine: str
+    :param inferTypes: optional - if ``types`` is not given, how the type of
+        each column is inferred: from the first ``inferRows`` rows ("head"), a
+        random sample of ``inferRows`` rows from the whole file ("sample"), or
+        every row ("full"). A column is an int if all of its inferred values
+        are ints, a float if they are all numbers, and otherwise a str.
+    :type inferTypes: str
+    :param inferRows: optional - the number of rows to infer types from
+    :type inferRows: int
+    :param typeCache: optional - where to cache inferred types, so that the
+        file is not scanned again until it changes
+    :type typeCache: :class:`.TypeCache`
+    :param processes: optional - the number of processes to read the file
+        with. If more than one, the file after ``startLine`` is split into
+        chunks of about ``chunkBytes`` at line boundaries, which are read on a
+        process pool; values must not contain line breaks.
+    :type processes: int
+    :param ordered: optional - whether rows read by several processes are
+        returned in the order of the file, or each chunk as soon as it is read
+    :type ordered: boolean
+    :param chunkBytes: optional - the size of the chunks read by each process
+    :type chunkBytes: int
+    :param memoryMap: optional - whether to read the file through memory-mapped
+        windows, rather than buffered reads: the lines before ``startLine`` are
+        skipped by searching the mapped buffer for line breaks, without being
+        read into strings
+    :type memoryMap: boolean
+    :raises: :exc:`ValueError` if the engine or type inference is not supported
     '''
     
     WHITESPACE_DELIMITER = "whitespace"
+    ENGINES = ("standard", "fast")
+    INFER_TYPES = ("head", "sample", "full")
+    
+    # Inferred types, from narrowest to widest.
+    TYPE_ORDER = ("int", "float", "str")
+    
+    # The size of each memory-mapped window of the file. Files are mapped a
+    # window at a time, so that files larger than the address space of 32-bit
+    # Python can be mapped.
+    MAP_WINDOW_BYTES = 1024 * 1024
 
     
     def __init__(self, name, path, destination, startLine=0, columns=None,
                  variableColumns=None, types=None, delimiter=None,
-                 nullValues=None, dbNull=None, titleColumn=None):
+                 nullValues=None, dbNull=None, titleColumn=None,
+                 engine="standard", inferTypes="head", inferRows=1000,
+                 typeCache=None, processes=1, ordered=True,
+                 chunkBytes=16 * 1024 * 1024, memoryMap=False):
+        if engine not in CSVDataImport.ENGINES:
+            raise ValueError("Unsupported CSV engine '{0}': expected one of {1}"
+                             .format(engine, ", ".join(CSVDataImport.ENGINES)))
+        
+        if inferTypes not in CSVDataImport.INFER_TYPES:
+            raise ValueError("Unsupported type inference '{0}': expected one "
+                             "of {1}".format(inferTypes, ", ".join(
+                                     CSVDataImport.INFER_TYPES)))
+
         self.__name = name
         self.__path = path
         self.__destination = destination
@@ -36,7 +100,29 @@ class CSVDataImport(DataImport):
         self.__nullValues = nullValues or []
         self.__dbNull = dbNull
         self.__titleColumn = titleColumn
+        self.__engine = engine
+        self.__inferTypes = inferTypes
+        self.__inferRows = inferRows
+        self.__typeCache = typeCache
+        self.__processes = processes
+        self.__ordered = ordered
+        self.__chunkBytes = chunkBytes
+        self.__memoryMap = memoryMap
         self.__useFirstLineAsHeader = columns is None
+        self.__fillLayout = self.__getFillLayout()
+        # Copied, as the columns and types are filled in from the file when not
+        # configured.
+        self.__options = {"startLine": startLine,
+                          "columns": list(columns) if columns else None,
+                          "variableColumns": list(variableColumns)
+                                             if variableColumns else None,
+                          "types": list(types) if types else None,
+                          "delimiter": delimiter,
+                          "nullValues": self.__nullValues,
+                          "dbNull": dbNull,
+                          "titleColumn": titleColumn,
+                          "inferTypes": inferTypes,
+                          "inferRows": inferRows}
         self.__registerDialect()
             
             
@@ -48,6 +134,20 @@ class CSVDataImport(DataImport):
         csv.register_dialect(self.__delimiter, delimiter=self.__delimiter)
 
 
+    def __getstate__(self):
+        # Sent to the processes reading chunks of the file, which do not need
+        # the type cache.
+        state = self.__dict__.copy()
+        state["_CSVDataImport__typeCache"] = None
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Dialects are registered in each process.
+        self.__registerDialect()
+
+
     def __inferType(self, value):
         if type(value) == type(0):
             return "int"
@@ -58,6 +158,90 @@ class CSVDataImport(DataImport):
         return "str"
     
     
+    def __inferTypesFromFile(self):
+        '''
+        Infers the type of each column from the rows selected by the type
+        inference option, widening it as each row is read. Blank values, which
+        every database imports as null (see :class:`.PostgresCopyReader`), and
+        columns missing from short rows do not count towards a column's type;
+        columns without any values are typed str.
+        '''
+        columns = self.getColumns()
+        options = {"inferTypes": self.__inferTypes,
+                   "inferRows": self.__inferRows,
+                   "startLine": self.__startLine,
+                   "header": self.__useFirstLineAsHeader,
+                   "columns": columns,
+                   "variableColumns": self.__variableColumns,
+                   "delimiter": self.__delimiter,
+                   "nullValues": self.__nullValues,
+                   "dbNull": self.__dbNull}
+        if self.__typeCache:
+            types = self.__typeCache.get(self.__path, options)
+            if types:
+                return types
+
+        startLine = self.__startLine
+        if self.__useFirstLineAsHeader:
+            startLine += 1
+        
+        widest = len(CSVDataImport.TYPE_ORDER) - 1
+        ranks = [-1] * len(columns)
+        with open(self.__path, "rb") as inFile:
+            for line in self.__sampleLines(self.__getReader(inFile, startLine)):
+                values = self.__processLine(line)
+                if self.__variableColumns:
+                    values = self.__fillVariableColumns(values)
+                
+                if len(values) > len(ranks):
+                    ranks.extend([-1] * (len(values) - len(ranks)))
+                
+                for i, value in enumerate(values):
+                    if ranks[i] < widest and value is not None \
+                            and (type(value) is not str or value.strip()):
+                        ranks[i] = max(ranks[i], CSVDataImport.TYPE_ORDER.index(
+                                self.__inferType(value)))
+                
+                # Nothing is wider than str, so a full scan can stop early.
+                if self.__inferTypes == "full" and ranks \
+                        and min(ranks) == widest:
+                    break
+
+        types = [CSVDataImport.TYPE_ORDER[rank] if rank >= 0 else "str"
+                 for rank in ranks]
+        if types and self.__typeCache:
+            self.__typeCache.put(self.__path, options, types)
+        
+        return types
+    
+    
+    def __sampleLines(self, reader):
+        '''
+        :returns: the lines to infer types from, before their values are
+            converted, so that lines which are not sampled are only split
+        :rtype: iterator of lists of str
+        '''
+        if self.__inferTypes == "head":
+            return itertools.islice(reader, self.__inferRows)
+        
+        if self.__inferTypes == "full":
+            return reader
+        
+        # Reservoir sampling: keeps each line with equal probability, reading
+        # the file once. Seeded, so that the same file gives the same types.
+        rand = random.Random(0)
+        sample = []
+        for i, line in enumerate(reader):
+            if i < self.__inferRows:
+                sample.append(line)
+            else:
+                j = rand.randint(0, i)
+                if j < self.__inferRows:
+                    sample[j] = line
+        
+        return sample
+    
+    
     def __transformValue(self, value):
         if value is None or value in self.__nullValues:
             value = self.__dbNull
@@ -76,38 +260,259 @@ class CSVDataImport(DataImport):
     
     
     def __processLine(self, line):
-        if self.__delimiter == CSVDataImport.WHITESPACE_DELIMITER:
-            return [self.__transformValue(value) for value in line.split()]
-        
         return [self.__transformValue(value) for value in line]
     
     
-    def __getReader(self, inFile, startLine):
+    def __getFillLayout(self):
+        '''
+        :returns: for each number of values a row can be missing, the position
+            to fill them in at - the end of the variable columns that are
+            present - and the None values to fill in
+        :rtype: list of tuples
+        '''
+        if not self.__variableColumns:
+            return None
+        
+        numColumns = len(self.__columns)
+        end = self.__variableColumns[1]
+        layout = []
+        for numMissing in xrange(numColumns + 1):
+            position = end - numMissing
+            if position < 0:
+                # Rows missing more values than there are variable columns are
+                # filled where inserting at the negative position would.
+                position = max(numColumns - numMissing + position, 0)
+            
+            layout.append((position, [None] * numMissing))
+        
+        return layout
+    
+    
+    def __fillVariableColumns(self, values):
+        valuesToFill = len(self.__columns) - len(values)
+        if valuesToFill > 0:
+            # Fills in all of the missing values in one move of the values
+            # after them.
+            position, missing = self.__fillLayout[valuesToFill]
+            values[position:position] = missing
+        
+        return values
+    
+    
+    def __convertRows(self, lines):
+        '''
+        Converts rows read with the fast engine, filling any variable columns
+        first: the None values filled in are kept as they are.
+        '''
+        try:
+            from ColumnarConverter import ColumnarConverter
+        except ImportError as e:
+            raise DataImportError("The fast CSV engine requires NumPy: {0}"
+                                  .format(e))
+        
+        if self.__variableColumns:
+            lines = (self.__fillVariableColumns(line) for line in lines)
+        
+        converter = ColumnarConverter(self.__types, self.__nullValues,
+                                      self.__dbNull)
+        return converter.convertRows(lines)
+    
+    
+    def __getMappedBlocks(self, inFile, skipLines=0, start=0, end=None):
+        '''
+        :returns: the whole lines in each memory-mapped window of the file
+            between the byte offsets ``start`` and ``end``, after the first
+            ``skipLines``
+        :rtype: iterator of str
+        '''
+        if end is None:
+            end = os.fstat(inFile.fileno()).st_size
+        
+        windowBytes = CSVDataImport.MAP_WINDOW_BYTES
+        pos = start
+        while pos < end:
+            # Windows must start at a multiple of the allocation granularity.
+            offset = pos - pos % mmap.ALLOCATIONGRANULARITY
+            length = min(offset + windowBytes, end) - offset
+            atEnd = offset + length == end
+            buf = mmap.mmap(inFile.fileno(), length, access=mmap.ACCESS_READ,
+                            offset=offset)
+            try:
+                i = pos - offset
+                if skipLines:
+                    # Counts the lines to skip in each window, and finds the end
+                    # of the last with a single match, without reading any of
+                    # them as lines.
+                    numLines = buf[i:].count("\n")
+                    if numLines < skipLines:
+                        skipLines -= numLines
+                        pos = offset + length
+                        continue
+                    
+                    i = re.compile(r"(?:[^\n]*\n){%d}" % skipLines).match(
+                            buf, i).end()
+                    skipLines = 0
+                
+                last = length if atEnd else buf.rfind("\n", i) + 1
+                if last <= i:
+                    # A line longer than the window.
+                    windowBytes *= 2
+                    pos = offset + i
+                    continue
+                
+                # Copies all of the window's whole lines at once.
+                block = buf[i:last]
+                pos = offset + last
+            finally:
+                buf.close()
+            
+            yield block
+    
+    
+    def __getReader(self, inFile, startLine, start=0, end=None):
+        '''
+        :returns: the lines of the file after ``startLine``, or in the byte
+            range from ``start`` to ``end``, split into values
+        :rtype: iterator of lists of str
+        '''
+        if self.__memoryMap:
+            # Each block is split into lines as a file would be.
+            lines = itertools.chain.from_iterable(itertools.imap(
+                    cStringIO.StringIO, self.__getMappedBlocks(
+                            inFile, startLine, start, end)))
+            startLine = 0
+        elif end is not None:
+            inFile.seek(start)
+            lines = cStringIO.StringIO(inFile.read(end - start))
+        else:
+            lines = inFile
+        
         if self.__delimiter == CSVDataImport.WHITESPACE_DELIMITER:
-            reader = inFile
+            reader = lines
         else:
-            reader = csv.reader(inFile, dialect=self.__delimiter)
+            reader = csv.reader(lines, dialect=self.__delimiter)
             
         for _ in xrange(startLine):
             reader.next()
+        
+        if self.__delimiter == CSVDataImport.WHITESPACE_DELIMITER:
+            return (line.split() for line in reader)
             
         return reader
 
     
-    def __readFile(self, startLine):
+    def __readLines(self, reader, engine):
+        if engine == "fast":
+            for values in self.__convertRows(reader):
+                yield values
+            return
+        
+        for line in reader:
+            values = self.__processLine(line)
+            if not self.__variableColumns:
+                yield values
+            else:
+                yield self.__fillVariableColumns(values)
+    
+    
+    def __readFile(self, startLine, engine="standard"):
         with open(self.__path, "rb") as inFile:
-            reader = self.__getReader(inFile, startLine)
-            for line in reader:
-                values = self.__processLine(line)
-                if not self.__variableColumns:
-                    yield values
-                else:
-                    valuesToFill = len(self.__columns) - len(values)
-                    fillFromPosition = self.__variableColumns[1] - valuesToFill
-                    for _ in xrange(valuesToFill):
-                        values.insert(fillFromPosition, None)
-                    
+            for values in self.__readLines(self.__getReader(inFile, startLine),
+                                           engine):
+                yield values
+    
+    
+    def __getChunks(self, startLine):
+        '''
+        :returns: the byte ranges of the file after ``startLine``, each ending
+            at the end of a line
+        :rtype: list of tuples
+        '''
+        size = os.path.getsize(self.__path)
+        chunks = []
+        with open(self.__path, "rb") as inFile:
+            for _ in xrange(startLine):
+                inFile.readline()
+            
+            start = inFile.tell()
+            while start < size:
+                # Reads on to the end of the line the chunk ends in.
+                inFile.seek(start + self.__chunkBytes - 1)
+                inFile.readline()
+                end = min(inFile.tell(), size)
+                chunks.append((start, end))
+                start = end
+        
+        return chunks
+    
+    
+    def __readParallel(self, startLine):
+        chunks = self.__getChunks(startLine)
+        if len(chunks) < 2:
+            for values in self.__readFile(startLine, self.__engine):
+                yield values
+            return
+        
+        pool = multiprocessing.Pool(min(self.__processes, len(chunks)))
+        try:
+            for rows in self.__readChunks(pool, chunks):
+                for values in rows:
                     yield values
+        finally:
+            pool.terminate()
+            pool.join()
+    
+    
+    def __readChunks(self, pool, chunks):
+        '''
+        Reads chunks of the file on a process pool, keeping two chunks per
+        process queued, so that the rows read ahead are bounded.
+        
+        :returns: the rows of each chunk, in the order of the file if ordered,
+            otherwise as each chunk is read
+        :rtype: iterator of lists of lists
+        '''
+        tasks = ((self, start, end) for start, end in chunks)
+        finished = Queue.Queue()
+        callback = None if self.__ordered else finished.put
+        pending = collections.deque()
+        for task in itertools.islice(tasks, self.__processes * 2):
+            pending.append(pool.apply_async(_readChunk, (task,),
+                                            callback=callback))
+        
+        while pending:
+            if self.__ordered:
+                rows, error = pending.popleft().get()
+            else:
+                pending.pop()
+                rows, error = finished.get()
+            
+            if error:
+                raise DataImportError("Error reading {0}: {1}".format(
+                        self.__path, error))
+            
+            for task in itertools.islice(tasks, 1):
+                pending.append(pool.apply_async(_readChunk, (task,),
+                                                callback=callback))
+            
+            yield rows
+    
+    
+    def readChunk(self, start, end):
+        '''
+        Reads the rows in a byte range of the file, which must start and end at
+        line boundaries. Used by the processes reading the file in parallel.
+        
+        :param start: the offset of the first byte to read
+        :type start: int
+        :param end: the offset after the last byte to read
+        :type end: int
+        :returns: the rows in the range
+        :rtype: list of lists
+        '''
+        with open(self.__path, "rb") as inFile:
+            return list(self.__readLines(
+                    self.__getReader(inFile, 0, start, end), self.__engine))
     
     
     def getName(self):
@@ -131,6 +536,20 @@ class CSVDataImport(DataImport):
         return self.__titleColumn
 
 
+    def getSourcePath(self):
+        '''
+        See :meth:`.DataImport.getSourcePath`.
+        '''
+        return self.__path
+
+
+    def getOptions(self):
+        '''
+        See :meth:`.DataImport.getOptions`.
+        '''
+        return self.__options
+
+
     def getColumns(self):
         '''
         See :meth:`.DataImport.getColumns`.
@@ -148,8 +567,11 @@ class CSVDataImport(DataImport):
         startLine = self.__startLine
         if self.__useFirstLineAsHeader:
             startLine += 1
-           
-        return self.__readFile(startLine)
+        
+        if self.__processes > 1:
+            return self.__readParallel(startLine)
+        
+        return self.__readFile(startLine, self.__engine)
 
 
     def getTypes(self):
@@ -157,7 +579,18 @@ class CSVDataImport(DataImport):
         See :meth:`.DataImport.getTypes`.
         '''
         if not self.__types:
-            firstRow = self.getRows().next()
-            self.__types = [self.__inferType(value) for value in firstRow]
+            self.__types = self.__inferTypesFromFile()
             
         return self.__types
+
+
+def _readChunk(args):
+    '''
+    Reads a chunk of a file in a worker process. Errors are returned rather
+    than raised, as the pool does not call back for results which fail.
+    '''
+    dataImport, start, end = args
+    try:
+        return dataImport.readChunk(start, end), None
+    except Exception as e:
+        return None, "{0}: {1}".format(e.__class__.__name__, e)
@@ -0,0 +1,182 @@
+# core
+import itertools
+import re
+
+# contrib
+import numpy as np
+
+class ColumnarConverter(object):
+    '''
+    Converts the values of delimited text rows to numbers a block of rows and a
+    whole column at a time with NumPy, for the "fast" engine of
+    :class:`.CSVDataImport`.
+
+    Every value is converted exactly as the standard engine converts it: to an
+    int if ``int()`` accepts it, otherwise to a float if ``float()`` accepts
+    it, otherwise it is kept as a string. The column types are used to parse
+    whole columns at once: int columns with NumPy's parser, once a single
+    match of the joined values shows they are all plain integers, and float
+    columns with a NumPy cast, after which only whole numbers are checked
+    for ints. Columns whose values do not all parse as their type, and
+    columns without a numeric type, are converted a value at a time.
+
+    :param types: optional - the type of each column; the converted values
+        are the same for any types, but are only parsed a column at a time
+        for int and float columns
+    :type types: list of str
+    :param nullValues: optional - values to replace with ``dbNull``
+    :type nullValues: list of str
+    :param dbNull: optional - the value to replace null values with
+    :type dbNull: str
+    :param blockRows: optional - the number of rows to convert at a time
+    :type blockRows: int
+    '''
+
+    # What int() accepts: a sign may be followed by whitespace.
+    INT_PATTERN = re.compile(r"\s*[-+]?\s*\d+\s*\Z")
+
+    # What float() accepts.
+    FLOAT_PATTERN = re.compile(r"\s*[-+]?(?:(?:\d+\.?\d*|\.\d+)"
+                               r"(?:[eE][-+]?\d+)?|nan|inf(?:inity)?)\s*\Z",
+                               re.IGNORECASE)
+
+    # Ints longer than this may not fit in 64 bits.
+    MAX_INT_LENGTH = 18
+
+    # Comma-separated ints which NumPy parses exactly as int() does.
+    INT_COLUMN_PATTERN = re.compile(r"[-+]?\d{{1,{0}}}(?:,[-+]?\d{{1,{0}}})*\Z"
+                                    .format(MAX_INT_LENGTH))
+
+    def __init__(self, types=None, nullValues=None, dbNull=None,
+                 blockRows=10000):
+        self.__types = types or []
+        self.__nullValues = set(nullValues or [])
+        self.__dbNull = dbNull
+        self.__blockRows = blockRows
+
+
+    def convertRows(self, rows):
+        '''
+        :param rows: rows of string values; missing values may be None, and
+            rows may have different lengths
+        :type rows: iterator of lists
+        :returns: the rows, with their values converted
+        :rtype: iterator of lists
+        '''
+        rows = iter(rows)
+        while True:
+            block = list(itertools.islice(rows, self.__blockRows))
+            if not block:
+                return
+
+            for row in self.__convertBlock(block):
+                yield row
+
+
+    def __convertBlock(self, block):
+        lengths = [len(row) for row in block]
+        numColumns = max(lengths)
+        ragged = min(lengths) != numColumns
+        if ragged:
+            # Pads short rows with None, which converts to None, then trims
+            # each row back to its length.
+            block = [row + [None] * (numColumns - len(row)) for row in block]
+
+        columns = [self.__convertColumn(list(column), i)
+                   for i, column in enumerate(itertools.izip(*block))]
+
+        rows = map(list, itertools.izip(*columns)) if columns \
+            else [[] for _ in block]
+        if ragged:
+            rows = [row[:length] for row, length in itertools.izip(rows,
+                                                                   lengths)]
+
+        return rows
+
+
+    def __convertColumn(self, values, index):
+        '''
+        Converts the values of a column, leaving any None values as they are.
+        '''
+        if self.__nullValues:
+            values = [self.__dbNull if value in self.__nullValues else value
+                      for value in values]
+
+        if None not in values:
+            return self.__convertText(values, index)
+
+        present = [i for i, value in enumerate(values) if value is not None]
+        result = [None] * len(values)
+        for i, value in itertools.izip(present, self.__convertText(
+                [values[i] for i in present], index)):
+            result[i] = value
+
+        return result
+
+
+    def __convertText(self, values, index):
+        columnType = self.__types[index] if index < len(self.__types) else None
+        result = None
+        if values and columnType == "int":
+            result = self.__parseInts(values)
+            if result is None:
+                result = self.__parseFloats(values)
+        elif values and columnType == "float":
+            result = self.__parseFloats(values)
+
+        if result is None:
+            return self.__convertMixed(values)
+
+        return result
+
+
+    def __parseInts(self, values):
+        '''
+        :returns: the values as ints, or None if any are not plain integers
+        :rtype: list of int
+        '''
+        # NumPy stops parsing silently at a value it does not accept, and
+        # accepts partial values such as "1_0" or "-", so the values are
+        # checked first; a value containing the separator adds to the count.
+        text = ",".join(values)
+        if not ColumnarConverter.INT_COLUMN_PATTERN.match(text):
+            return None
+
+        ints = np.fromstring(text, dtype=np.int64, sep=",")
+        if len(ints) != len(values):
+            return None
+
+        return ints.tolist()
+
+
+    def __parseFloats(self, values):
+        '''
+        :returns: the values as numbers, or None if ``float()`` does not accept
+            them all
+        :rtype: list of float or int
+        '''
+        # The cast calls float() on each value.
+        try:
+            floats = np.array(values, dtype=object).astype(np.float64)
+        except (TypeError, ValueError):
+            return None
+
+        result = floats.tolist()
+        whole = np.isfinite(floats)
+        whole[whole] = np.floor(floats[whole]) == floats[whole]
+        for i in np.flatnonzero(whole):
+            # A whole number without a point or exponent is one int() accepts.
+            value = values[i]
+            if "." not in value and "e" not in value and "E" not in value:
+                result[i] = int(value)
+
+        return result
+
+
+    def __convertMixed(self, values):
+        isInt = ColumnarConverter.INT_PATTERN.match
+        isFloat = ColumnarConverter.FLOAT_PATTERN.match
+        return [int(value) if isInt(value)
+                else float(value) if isFloat(value)
+                else value
+                for value in values]
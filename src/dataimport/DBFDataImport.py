@@ -68,6 +68,20 @@ class DBFDataImport(DataImport):
         return self.__titleColumn
     
     
+    def getSourcePath(self):
+        '''
+        See :meth:`.DataImport.getSourcePath`.
+        '''
+        return self.__path
+    
+    
+    def getOptions(self):
+        '''
+        See :meth:`.DataImport.getOptions`.
+        '''
+        return {"titleColumn": self.__titleColumn}
+    
+    
     def getColumns(self):
         '''
         See :meth:`.DataImport.getColumns`.
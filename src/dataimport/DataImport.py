@@ -55,3 +55,22 @@ class DataImport(object):
         :rtype: list of str
         '''
         raise NotImplementedError()
+
+
+    def getSourcePath(self):
+        '''
+        :returns: the file the data is read from, if any, for detecting whether
+            it has changed since the last run
+        :rtype: str or None
+        '''
+        return None
+
+
+    def getOptions(self):
+        '''
+        :returns: the configured options which change the imported data, for
+            detecting whether they have changed since the last run, or None
+            if they are not known
+        :rtype: dict
+        '''
+        return None
@@ -0,0 +1,18 @@
+# MincePy
+from DataImportError import DataImportError
+
+class DataImportCancelledError(DataImportError):
+    '''
+    Raised when a data import is abandoned part-way through because another
+    data import running at the same time has failed.
+    
+    :param name: the name of the cancelled data import
+    :type name: str
+    '''
+    
+    def __init__(self, name):
+        self.name = name
+        
+    
+    def __str__(self):
+        return "Data import '{0}' was cancelled.".format(self.name)
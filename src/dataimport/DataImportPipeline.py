@@ -0,0 +1,267 @@
+# core
+import sys
+import threading
+import Queue
+
+# MincePy
+from DataImport import DataImport
+from DataImportCancelledError import DataImportCancelledError
+
+class DataImportPipeline(object):
+    '''
+    Reads a :class:`.DataImport` once and streams its rows to any number of
+    consumers, so that one thread can parse the source file while other threads
+    write the rows into the target databases. Each consumer is a
+    :class:`.DataImport` which can be passed to :meth:`.AbstractDatabase.importData`.
+
+    Each consumer buffers a limited number of rows; the reader waits for the
+    slowest consumer to catch up rather than holding the whole import in memory.
+    Each consumer must be released with :meth:`release` once its import has
+    finished, whether or not it read every row, so that the reader does not
+    wait for it.
+
+    :param dataImport: the data import to read
+    :type dataImport: :class:`.DataImport`
+    :param numConsumers: the number of consumers which will read the rows
+    :type numConsumers: int
+    :param bufferSize: the maximum number of rows to buffer for each consumer
+    :type bufferSize: int
+    :param batchSize: the number of rows passed to the consumers at a time
+    :type batchSize: int
+    '''
+
+    _END = object()
+
+
+    def __init__(self, dataImport, numConsumers, bufferSize=10000,
+                 batchSize=1000):
+        self.__dataImport = dataImport
+        self.__batchSize = batchSize
+        self.__queues = [Queue.Queue(max(1, bufferSize // batchSize))
+                         for _ in range(numConsumers)]
+        self.__consumers = [_PipelineConsumer(self, queue)
+                            for queue in self.__queues]
+        self.__released = [threading.Event() for _ in range(numConsumers)]
+        self.__columns = None
+        self.__types = None
+        self.__error = None
+        self.__started = threading.Event()
+        self.__cancelled = threading.Event()
+
+
+    def __put(self, item):
+        for queue, released in zip(self.__queues, self.__released):
+            while not released.is_set():
+                if self.isCancelled():
+                    raise DataImportCancelledError(self.getName())
+                try:
+                    queue.put(item, timeout=0.5)
+                    break
+                except Queue.Full:
+                    pass
+
+
+    def getName(self):
+        '''
+        :returns: the name of the data import being read
+        :rtype: str
+        '''
+        return self.__dataImport.getName()
+
+
+    def getDataImport(self):
+        '''
+        :returns: the data import being read
+        :rtype: :class:`.DataImport`
+        '''
+        return self.__dataImport
+
+
+    def getConsumer(self, i):
+        '''
+        :param i: the index of the consumer
+        :type i: int
+        :returns: a data import which reads the rows passed to the i-th consumer
+        :rtype: :class:`.DataImport`
+        '''
+        return self.__consumers[i]
+
+
+    def release(self, i):
+        '''
+        Stops passing rows to the i-th consumer and discards the rows it has
+        not read, i.e. once its import has finished.
+
+        :param i: the index of the consumer
+        :type i: int
+        '''
+        self.__released[i].set()
+        queue = self.__queues[i]
+        while True:
+            try:
+                queue.get_nowait()
+            except Queue.Empty:
+                return
+
+
+    def read(self):
+        '''
+        Reads the data import, passing its rows to every consumer which has not
+        been released. Blocks while any such consumer's buffer is full.
+
+        :raises: :exc:`.DataImportCancelledError` if the pipeline is cancelled
+            while reading
+        '''
+        try:
+            self.__columns = list(self.__dataImport.getColumns() or [])
+            self.__types = list(self.__dataImport.getTypes() or [])
+            self.__started.set()
+
+            batch = []
+            for row in self.__dataImport.getRows():
+                batch.append(row)
+                if len(batch) == self.__batchSize:
+                    self.__put(batch)
+                    batch = []
+
+            if batch:
+                self.__put(batch)
+
+            self.__put(DataImportPipeline._END)
+        except DataImportCancelledError:
+            raise
+        except:
+            # The consumers re-raise the original error.
+            self.__error = sys.exc_info()
+            self.__started.set()
+            self.cancel()
+            raise
+
+
+    def cancel(self):
+        '''
+        Stops the reader and any consumers waiting for rows.
+        '''
+        self.__cancelled.set()
+
+
+    def isCancelled(self):
+        '''
+        :returns: whether the pipeline has been cancelled
+        :rtype: boolean
+        '''
+        return self.__cancelled.is_set()
+
+
+    def waitForMetadata(self):
+        '''
+        Waits for the reader to start, then returns the column names and types
+        of the data import.
+
+        :rtype: tuple of (list of str, list of str)
+        '''
+        while not self.__started.wait(0.5):
+            self.raiseIfFailed()
+
+        self.raiseIfFailed()
+
+        return self.__columns, self.__types
+
+
+    def raiseIfFailed(self):
+        '''
+        Re-raises the error which stopped the reader, if any.
+
+        :raises: :exc:`.DataImportCancelledError` if the pipeline was cancelled
+        '''
+        if self.__error:
+            excType, excValue, excTraceback = self.__error
+            raise excType, excValue, excTraceback
+
+        if self.isCancelled():
+            raise DataImportCancelledError(self.getName())
+
+
+class _PipelineConsumer(DataImport):
+    '''
+    A :class:`.DataImport` which reads rows from a :class:`.DataImportPipeline`.
+    Each row is a new list, so consumers are free to modify the rows.
+
+    :param pipeline: the pipeline to read rows from
+    :type pipeline: :class:`.DataImportPipeline`
+    :param queue: this consumer's row buffer
+    :type queue: Queue.Queue
+    '''
+
+    def __init__(self, pipeline, queue):
+        self.__pipeline = pipeline
+        self.__queue = queue
+
+
+    def getName(self):
+        '''
+        See :meth:`.DataImport.getName`.
+        '''
+        return self.__pipeline.getDataImport().getName()
+
+
+    def getDestination(self):
+        '''
+        See :meth:`.DataImport.getDestination`.
+        '''
+        return self.__pipeline.getDataImport().getDestination()
+
+
+    def getTitleColumn(self):
+        '''
+        See :meth:`.DataImport.getTitleColumn`.
+        '''
+        return self.__pipeline.getDataImport().getTitleColumn()
+
+
+    def getSourcePath(self):
+        '''
+        See :meth:`.DataImport.getSourcePath`.
+        '''
+        return self.__pipeline.getDataImport().getSourcePath()
+
+
+    def getOptions(self):
+        '''
+        See :meth:`.DataImport.getOptions`.
+        '''
+        return self.__pipeline.getDataImport().getOptions()
+
+
+    def getColumns(self):
+        '''
+        See :meth:`.DataImport.getColumns`.
+        '''
+        columns, _ = self.__pipeline.waitForMetadata()
+        return list(columns)
+
+
+    def getTypes(self):
+        '''
+        See :meth:`.DataImport.getTypes`.
+        '''
+        _, types = self.__pipeline.waitForMetadata()
+        return list(types)
+
+
+    def getRows(self):
+        '''
+        See :meth:`.DataImport.getRows`.
+        '''
+        while True:
+            self.__pipeline.raiseIfFailed()
+            try:
+                batch = self.__queue.get(timeout=0.5)
+            except Queue.Empty:
+                continue
+
+            if batch is DataImportPipeline._END:
+                return
+
+            for row in batch:
+                yield list(row)
@@ -0,0 +1,188 @@
+# core
+import tempfile
+import cPickle
+
+# MincePy
+from DataImport import DataImport
+
+class MaterializedDataImport(DataImport):
+    '''
+    Reads a :class:`.DataImport` once and replays its rows any number of times,
+    so that the same source file can be imported into several databases
+    without being parsed again for each one.
+
+    Rows are held in memory up to a limit; beyond that they are spilled to a
+    temporary file in column-wise chunks, which is removed by :meth:`close`.
+
+    :param dataImport: the data import to read
+    :type dataImport: :class:`.DataImport`
+    :param bufferRows: the maximum number of rows to hold in memory
+    :type bufferRows: int
+    :param chunkRows: the number of rows in each chunk of the spill file
+    :type chunkRows: int
+    '''
+
+    def __init__(self, dataImport, bufferRows=100000, chunkRows=10000):
+        self.__dataImport = dataImport
+        self.__bufferRows = bufferRows
+        self.__chunkRows = chunkRows
+        self.__columns = None
+        self.__types = None
+        self.__rows = None
+        self.__spillFile = None
+        self.__numRows = 0
+
+
+    def __materialize(self):
+        if self.__rows is not None:
+            return
+
+        self.__columns = list(self.__dataImport.getColumns() or [])
+        self.__types = list(self.__dataImport.getTypes() or [])
+        self.__rows = []
+
+        chunkRows = self.__chunkRows
+        chunk = []
+        for row in self.__dataImport.getRows():
+            self.__numRows += 1
+            if self.__spillFile is None:
+                self.__rows.append(row)
+                if len(self.__rows) <= self.__bufferRows:
+                    continue
+
+                # The rows held so far are spilled in chunks of the same size
+                # as the rest, so that no chunk read back is larger.
+                self.__spillFile = tempfile.TemporaryFile(prefix="mincepy")
+                chunk = self.__rows
+                self.__rows = []
+            else:
+                chunk.append(row)
+
+            while len(chunk) >= chunkRows:
+                self.__spill(chunk[:chunkRows])
+                chunk = chunk[chunkRows:]
+
+        if chunk:
+            self.__spill(chunk)
+
+
+    def __spill(self, rows):
+        # Stored column-wise: one list per column pickles more compactly than
+        # one list per row. Ragged rows are stored as they are.
+        width = len(rows[0])
+        if all(len(row) == width for row in rows):
+            chunk = (len(rows), zip(*rows), None)
+        else:
+            chunk = (len(rows), None, rows)
+
+        cPickle.dump(chunk, self.__spillFile, cPickle.HIGHEST_PROTOCOL)
+
+
+    def getName(self):
+        '''
+        See :meth:`.DataImport.getName`.
+        '''
+        return self.__dataImport.getName()
+
+
+    def getDestination(self):
+        '''
+        See :meth:`.DataImport.getDestination`.
+        '''
+        return self.__dataImport.getDestination()
+
+
+    def getTitleColumn(self):
+        '''
+        See :meth:`.DataImport.getTitleColumn`.
+        '''
+        return self.__dataImport.getTitleColumn()
+
+
+    def getSourcePath(self):
+        '''
+        See :meth:`.DataImport.getSourcePath`.
+        '''
+        return self.__dataImport.getSourcePath()
+
+
+    def getOptions(self):
+        '''
+        See :meth:`.DataImport.getOptions`.
+        '''
+        return self.__dataImport.getOptions()
+
+
+    def getColumns(self):
+        '''
+        See :meth:`.DataImport.getColumns`.
+        '''
+        self.__materialize()
+        return list(self.__columns)
+
+
+    def getTypes(self):
+        '''
+        See :meth:`.DataImport.getTypes`.
+        '''
+        self.__materialize()
+        return list(self.__types)
+
+
+    def getNumRows(self):
+        '''
+        :returns: the number of rows read from the data import
+        :rtype: int
+        '''
+        self.__materialize()
+        return self.__numRows
+
+
+    def isSpilled(self):
+        '''
+        :returns: whether the rows were spilled to a temporary file because
+            there were too many to hold in memory
+        :rtype: boolean
+        '''
+        self.__materialize()
+        return self.__spillFile is not None
+
+
+    def getRows(self):
+        '''
+        See :meth:`.DataImport.getRows`. Each row is a new list, so callers are
+        free to modify the rows.
+        '''
+        self.__materialize()
+        if self.__spillFile is None:
+            for row in self.__rows:
+                yield list(row)
+            return
+
+        self.__spillFile.seek(0)
+        while True:
+            try:
+                numRows, columns, rows = cPickle.load(self.__spillFile)
+            except EOFError:
+                return
+
+            if rows is not None:
+                for row in rows:
+                    yield list(row)
+            elif columns:
+                for row in zip(*columns):
+                    yield list(row)
+            else:
+                for _ in xrange(numRows):
+                    yield []
+
+
+    def close(self):
+        '''
+        Releases the buffered rows and removes the spill file, if any.
+        '''
+        self.__rows = None
+        self.__numRows = 0
+        if self.__spillFile is not None:
+            self.__spillFile.close()
+            self.__spillFile = None
@@ -3,18 +3,37 @@ from DataImport import DataImport
 
 class SQLDataImport(DataImport):
     '''
-    Imports data from a database.
+    Imports data from a database. The database is opened through the
+    :class:`.ConnectionManager` by whichever thread reads the data.
+    
+    :param name: the default name of the destination table
+    :type name: str
+    :param destination: the name of the table to import data into
+    :type destination: str
+    :param connectionManager: connection manager service
+    :type connectionManager: :class:`.ConnectionManager`
+    :param connectionParameters: the parameters for connecting to the database
+        to import data from
+    :type connectionParameters: dict
+    :param query: the query to import the results of
+    :type query: str
+    :param stream: optional - whether to fetch the query's results from the
+        database as they are read; see :meth:`.AbstractDatabase.query`
+    :type stream: boolean
     '''
     
-    def __init__(self, name, destination, db, query, titleColumn=None,
-                 nullValues=None, dbNull=None):
+    def __init__(self, name, destination, connectionManager,
+                 connectionParameters, query, titleColumn=None,
+                 nullValues=None, dbNull=None, stream=False):
         self.__name = name
         self.__destination = destination
         self.__titleColumn = titleColumn
         self.__nullValues = nullValues or []
         self.__dbNull = dbNull
-        self.__db = db
+        self.__connectionManager = connectionManager
+        self.__connectionParameters = connectionParameters
         self.__query = query
+        self.__stream = stream
         self.__columns = None
         self.__types = None
         self.__cur = None
@@ -22,7 +41,8 @@ class SQLDataImport(DataImport):
     
     def __getCursor(self):
         if not self.__cur:
-            self.__cur = self.__db.query(self.__query)
+            db = self.__connectionManager.open(**self.__connectionParameters)
+            self.__cur = db.query(self.__query, stream=self.__stream)
         
         return self.__cur 
     
@@ -48,6 +68,24 @@ class SQLDataImport(DataImport):
         return self.__titleColumn
     
     
+    def getSourcePath(self):
+        '''
+        See :meth:`.DataImport.getSourcePath`. Only databases stored in a file
+        have a source path.
+        '''
+        return self.__connectionParameters.get("path")
+    
+    
+    def getOptions(self):
+        '''
+        See :meth:`.DataImport.getOptions`.
+        '''
+        return {"query": self.__query,
+                "titleColumn": self.__titleColumn,
+                "nullValues": self.__nullValues,
+                "dbNull": self.__dbNull}
+    
+    
     def getColumns(self):
         '''
         See :meth:`.DataImport.getColumns`.
@@ -62,11 +100,19 @@ class SQLDataImport(DataImport):
     def getRows(self):
         '''
         See :meth:`.DataImport.getRows`.
-        '''        cur = self.__getCursor()        for row in cur:
-            yield [row[i]
-                   if row[i] is not None and unicode(row[i]) not in self.__nullValues
-                   else self.__dbNull
-                   for i in range(len(self.getColumns()))]
+        '''
+        cur = self.__getCursor()
+        nullValues = self.__nullValues
+        dbNull = self.__dbNull
+        for batch in cur.iterBatches():
+            for row in batch:
+                if nullValues:
+                    yield [value
+                           if value is not None and unicode(value) not in nullValues
+                           else dbNull
+                           for value in row]
+                else:
+                    yield [value if value is not None else dbNull for value in row]
         
         self.__cur = None
 
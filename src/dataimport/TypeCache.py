@@ -0,0 +1,104 @@
+# core
+import hashlib
+import json
+import logging
+import os
+import threading
+
+class TypeCache(object):
+    '''
+    Keeps the column types inferred from data import files, so that a file is
+    not scanned again until it changes. Each entry is a small JSON file in the
+    cache directory, holding the types with the modification time and size of
+    the file they were inferred from: the entry is ignored once either changes.
+
+    Entries are keyed by the file and by the options the types were inferred
+    with, i.e. the delimiter and how many rows were sampled.
+
+    :param path: the directory to keep the cache in
+    :type path: str
+    '''
+
+    def __init__(self, path):
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
+
+
+    def get(self, sourcePath, options):
+        '''
+        :param sourcePath: the file the types were inferred from
+        :type sourcePath: str
+        :param options: the options the types were inferred with
+        :type options: dict
+        :returns: the cached types, or None if there are none or the file has
+            changed since they were inferred
+        :rtype: list of str
+        '''
+        entryPath = self.__getEntryPath(sourcePath, options)
+        if not os.path.isfile(entryPath):
+            return None
+
+        try:
+            with open(entryPath, "rb") as inFile:
+                entry = json.load(inFile)
+        except (IOError, ValueError) as e:
+            self.__log.debug("Ignoring unreadable type cache entry %s: %s",
+                             entryPath, e)
+            return None
+
+        if [entry.get("mtime"), entry.get("size")] != self.__getState(sourcePath):
+            return None
+
+        return [str(columnType) for columnType in entry.get("types") or []] \
+            or None
+
+
+    def put(self, sourcePath, options, types):
+        '''
+        Caches the types inferred from a file. Errors writing the cache are
+        logged and otherwise ignored: the file is scanned again next time.
+
+        :param sourcePath: the file the types were inferred from
+        :type sourcePath: str
+        :param options: the options the types were inferred with
+        :type options: dict
+        :param types: the inferred types
+        :type types: list of str
+        '''
+        mtime, size = self.__getState(sourcePath)
+        entryPath = self.__getEntryPath(sourcePath, options)
+        partialPath = "{0}.{1}.partial".format(
+                entryPath, threading.current_thread().ident)
+        try:
+            with self.__lock:
+                if not os.path.exists(self.__path):
+                    os.makedirs(self.__path)
+
+            with open(partialPath, "wb") as outFile:
+                json.dump({"source": os.path.abspath(sourcePath),
+                           "options": options,
+                           "mtime": mtime,
+                           "size": size,
+                           "types": list(types)}, outFile)
+
+            # Replaces any previous entry, which os.rename cannot do on Windows.
+            with self.__lock:
+                if os.path.exists(entryPath):
+                    os.remove(entryPath)
+                os.rename(partialPath, entryPath)
+        except (IOError, OSError) as e:
+            self.__log.warning("Error caching the types of %s: %s", sourcePath,
+                               e)
+
+
+    def __getState(self, sourcePath):
+        stat = os.stat(sourcePath)
+        return [stat.st_mtime, stat.st_size]
+
+
+    def __getEntryPath(self, sourcePath, options):
+        key = json.dumps([os.path.normcase(os.path.abspath(sourcePath)),
+                          options], sort_keys=True)
+        return os.path.join(self.__path, "{0}.json".format(
+                hashlib.sha256(key).hexdigest()))
@@ -48,6 +48,7 @@ class XLSDataImport(DataImport):
                  cellRange=None, columns=None, types=None, trimWhitespace=True,
                  nullValues=None, dbNull=None, titleColumn=None):
         self.__name = name
+        self.__path = path
         self.__destination = destination
         self.__trimWhitespace = trimWhitespace
         self.__nullValues = nullValues or []
@@ -56,6 +57,19 @@ class XLSDataImport(DataImport):
         self.__columns = columns
         self.__types = types
         self.__useFirstRowAsHeader = columns is None
+        # Copied, as the columns are read from the worksheet when not
+        # configured.
+        self.__options = {"worksheet": worksheet,
+                          "cellRange": [str(cellRange.getStartCell()),
+                                        str(cellRange.getEndCell())
+                                        if cellRange.getEndCell() else None]
+                                       if cellRange else None,
+                          "columns": list(columns) if columns else None,
+                          "types": list(types) if types else None,
+                          "trimWhitespace": trimWhitespace,
+                          "nullValues": self.__nullValues,
+                          "dbNull": dbNull,
+                          "titleColumn": titleColumn}
         
         if not os.path.exists(path):
             raise IOError("File not found: {0}".format(os.path.realpath(path)))
@@ -222,6 +236,20 @@ class XLSDataImport(DataImport):
         return self.__titleColumn
 
 
+    def getSourcePath(self):
+        '''
+        See :meth:`.DataImport.getSourcePath`.
+        '''
+        return self.__path
+
+
+    def getOptions(self):
+        '''
+        See :meth:`.DataImport.getOptions`.
+        '''
+        return self.__options
+
+
     def getColumns(self):
         '''
         See :meth:`.DataImport.getColumns`.
@@ -34,4 +34,12 @@ class AbstractDatabaseConfiguration(object):
         :type overwrite: boolean
         '''
         raise NotImplementedError
-        
\ No newline at end of file
+    
+    
+    def isNew(self):
+        '''
+        :returns: whether :meth:`initialize` created the database, or replaced
+            it, so that it holds nothing from previous runs
+        :rtype: boolean
+        '''
+        raise NotImplementedError
@@ -20,14 +20,20 @@ class AccessDatabaseConfiguration(AbstractDatabaseConfiguration):
     :param originalDBPath: (optional) path to the original database to make a
         copy of. If empty, a new working database will be created
     :type originalDBPath: str
+    :param persistent: (optional) whether to keep the database connection open
+        between statements; see :class:`.AccessDatabase`
+    :type persistent: boolean
     '''
 
-    def __init__(self, dbService, title, workingDBPath, originalDBPath=None):
+    def __init__(self, dbService, title, workingDBPath, originalDBPath=None,
+                 persistent=False):
         self.__dbService      = dbService
         self.__title          = title
         self.__originalDBPath = originalDBPath
         self.__workingDBPath  = workingDBPath
+        self.__persistent     = persistent
         self.__initialized    = False
+        self.__new            = False
         
         
     def __str__(self):
@@ -35,7 +41,9 @@ class AccessDatabaseConfiguration(AbstractDatabaseConfiguration):
                Title: %(title)s
                Original DB Path: %(originalDBPath)s
                Working DB Path: %(workingDBPath)s
+               Persistent Connection: %(persistent)s
                """ % {"title"         : self.__title,
+                      "persistent"    : self.__persistent,
                       "originalDBPath": os.path.abspath(self.__originalDBPath)
                                         if self.__originalDBPath else "<new>",
                       "workingDBPath" : os.path.abspath(self.__workingDBPath)}
@@ -51,14 +59,16 @@ class AccessDatabaseConfiguration(AbstractDatabaseConfiguration):
     
     def getConnectionParameters(self):
         '''
-        :returns: the path to the working copy of this database
-        :rtype: str
+        :returns: the path to the working copy of this database and whether to
+            keep its connection open between statements
+        :rtype: dict
         '''
         if not self.__initialized:
             raise RuntimeError("Must call initialize() on DatabaseConfiguration "
                                "before attempting to get its working database path.")
 
-        return {"path": self.__workingDBPath}
+        return {"path"      : self.__workingDBPath,
+                "persistent": self.__persistent}
     
     
     def initialize(self, overwrite=False):
@@ -72,6 +82,7 @@ class AccessDatabaseConfiguration(AbstractDatabaseConfiguration):
             raise RuntimeError("Database has already been initialized!")
         
         if overwrite or not os.path.exists(self.__workingDBPath):
+            self.__new = True
             workingDir = os.path.dirname(self.__workingDBPath)
             if workingDir and not os.path.exists(workingDir):
                 os.makedirs(workingDir)
@@ -82,4 +93,10 @@ class AccessDatabaseConfiguration(AbstractDatabaseConfiguration):
                 self.__dbService.create(self.__workingDBPath)
                 
         self.__initialized = True
-        
\ No newline at end of file
+    
+    
+    def isNew(self):
+        '''
+        See :meth:`.AbstractDatabaseConfiguration.isNew`.
+        '''
+        return self.__new
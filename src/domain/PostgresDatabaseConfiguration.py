@@ -18,16 +18,21 @@ class PostgresDatabaseConfiguration(AbstractDatabaseConfiguration):
     :type pwd: str
     :param schema: optional - the schema to execute queries against
     :type schema: str
+    :param copyFormat: optional - the COPY format used to import data
+    :type copyFormat: str
     '''
 
-    def __init__(self, title, host, db, user, pwd, schema=None):
+    def __init__(self, title, host, db, user, pwd, schema=None,
+                 copyFormat="text"):
         self.__initialized = False
+        self.__new = False
         self.__title = title
         self.__host = host
         self.__db = db
         self.__user = user
         self.__pwd = pwd
         self.__schema = schema
+        self.__copyFormat = copyFormat
         
         
     def __str__(self):
@@ -36,10 +41,12 @@ class PostgresDatabaseConfiguration(AbstractDatabaseConfiguration):
                Host: %(host)s
                DB: %(db)s
                Schema: %(schema)s
+               Copy Format: %(copyFormat)s
                """ % {"title" : self.__title,
                       "host"  : self.__host,
                       "db"    : self.__db,
-                      "schema": self.__schema}
+                      "schema": self.__schema,
+                      "copyFormat": self.__copyFormat}
     
     
     def getTitle(self):
@@ -55,7 +62,8 @@ class PostgresDatabaseConfiguration(AbstractDatabaseConfiguration):
                 "db"    : self.__db,
                 "user"  : self.__user,
                 "pwd"   : self.__pwd,
-                "schema": self.__schema}
+                "schema": self.__schema,
+                "copyFormat": self.__copyFormat}
     
     
     def initialize(self, overwrite=False):
@@ -69,9 +77,17 @@ class PostgresDatabaseConfiguration(AbstractDatabaseConfiguration):
                 if overwrite or not db.hasSchema(self.__schema):
                     db.execute("DROP SCHEMA IF EXISTS {} CASCADE".format(self.__schema))
                     db.execute("CREATE SCHEMA {}".format(self.__schema))
+                    self.__new = True
                     
             self.__initialized = True
         
         finally:
             if db:
                 db.close()
+    
+    
+    def isNew(self):
+        '''
+        See :meth:`.AbstractDatabaseConfiguration.isNew`.
+        '''
+        return self.__new
@@ -17,13 +17,18 @@ class SQLiteDatabaseConfiguration(AbstractDatabaseConfiguration):
     :param originalDBPath: (optional) path to the original database to make a
         copy of. If empty, a new working database will be created
     :type originalDBPath: str
+    :param bulkLoad: (optional) whether to import data in bulk-load mode; see
+        :class:`.SQLiteDatabase`
+    :type bulkLoad: boolean
     '''
 
-    def __init__(self, title, workingDBPath, originalDBPath=None):
+    def __init__(self, title, workingDBPath, originalDBPath=None, bulkLoad=False):
         self.__title          = title
         self.__originalDBPath = originalDBPath
         self.__workingDBPath  = workingDBPath
+        self.__bulkLoad       = bulkLoad
         self.__initialized    = False
+        self.__new            = False
         
         
     def __str__(self):
@@ -31,7 +36,9 @@ class SQLiteDatabaseConfiguration(AbstractDatabaseConfiguration):
                Title: %(title)s
                Original DB Path: %(originalDBPath)s
                Working DB Path: %(workingDBPath)s
+               Bulk Load: %(bulkLoad)s
                """ % {"title"         : self.__title,
+                      "bulkLoad"      : self.__bulkLoad,
                       "originalDBPath": os.path.abspath(self.__originalDBPath)
                                         if self.__originalDBPath else "<new>",
                       "workingDBPath" : os.path.abspath(self.__workingDBPath)}
@@ -47,14 +54,16 @@ class SQLiteDatabaseConfiguration(AbstractDatabaseConfiguration):
     
     def getConnectionParameters(self):
         '''
-        :returns: the path to the working copy of this database
-        :rtype: str
+        :returns: the path to the working copy of this database and whether to
+            import data in bulk-load mode
+        :rtype: dict
         '''
         if not self.__initialized:
             raise RuntimeError("Must call initialize() on DatabaseConfiguration "
                                "before attempting to get its working database path.")
 
-        return {"path": self.__workingDBPath}
+        return {"path"    : self.__workingDBPath,
+                "bulkLoad": self.__bulkLoad}
     
     
     def initialize(self, overwrite=False):
@@ -68,6 +77,7 @@ class SQLiteDatabaseConfiguration(AbstractDatabaseConfiguration):
             raise RuntimeError("Database has already been initialized!")
         
         if overwrite or not os.path.exists(self.__workingDBPath):
+            self.__new = True
             workingDir = os.path.dirname(self.__workingDBPath)
             if workingDir and not os.path.exists(workingDir):
                 os.makedirs(workingDir)
@@ -79,4 +89,10 @@ class SQLiteDatabaseConfiguration(AbstractDatabaseConfiguration):
                 shutil.copyfile(self.__originalDBPath, self.__workingDBPath)
                 
         self.__initialized = True
-        
\ No newline at end of file
+    
+    
+    def isNew(self):
+        '''
+        See :meth:`.AbstractDatabaseConfiguration.isNew`.
+        '''
+        return self.__new
@@ -1,3 +1,6 @@
+# MincePy
+from util.Profiler import Profiler
+
 class System(object):
     '''
     Holds references to system services.
@@ -11,6 +14,7 @@ class System(object):
     
     def __init__(self):
         self.__shutdownRequested = False
+        self.__profiler = Profiler()
 
 
     def getConfig(self):
@@ -58,6 +62,67 @@ class System(object):
         self.__databaseService = databaseService
     
 
+    def getMetricsRecorder(self):
+        '''
+        :rtype: :class:`.MetricsRecorder`
+        '''
+        return self.__metricsRecorder
+    
+    
+    def setMetricsRecorder(self, metricsRecorder):
+        '''
+        :param metricsRecorder: service for recording query timings
+        :type metricsRecorder: :class:`.MetricsRecorder`
+        '''
+        self.__metricsRecorder = metricsRecorder
+    
+
+    def getRunHistory(self):
+        '''
+        :rtype: :class:`.RunHistory`
+        '''
+        return self.__runHistory
+    
+    
+    def setRunHistory(self, runHistory):
+        '''
+        :param runHistory: service for keeping the history of query durations
+        :type runHistory: :class:`.RunHistory`
+        '''
+        self.__runHistory = runHistory
+    
+
+    def getQueryFingerprints(self):
+        '''
+        :rtype: :class:`.QueryFingerprints`
+        '''
+        return self.__queryFingerprints
+    
+    
+    def setQueryFingerprints(self, queryFingerprints):
+        '''
+        :param queryFingerprints: service for skipping unchanged queries in
+            incremental runs
+        :type queryFingerprints: :class:`.QueryFingerprints`
+        '''
+        self.__queryFingerprints = queryFingerprints
+    
+
+    def getProfiler(self):
+        '''
+        :rtype: :class:`.Profiler`
+        '''
+        return self.__profiler
+    
+    
+    def setProfiler(self, profiler):
+        '''
+        :param profiler: service for profiling tasks, databases or queries
+        :type profiler: :class:`.Profiler`
+        '''
+        self.__profiler = profiler
+    
+
     def isShutdownRequested(self):
         '''
         :returns: the flag indicating whether or not the system has been
@@ -75,4 +140,5 @@ class System(object):
         '''
         self.__shutdownRequested = True
         self.__connectionManager.closeAll()
+        self.__metricsRecorder.close()
         
\ No newline at end of file
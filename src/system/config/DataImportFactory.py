@@ -16,6 +16,7 @@ from dataimport.DBFDataImport import DBFDataImport
 from dataimport.Cell import Cell
 from dataimport.CellRange import CellRange
 from dataimport.DataImportError import DataImportError
+from dataimport.TypeCache import TypeCache
 from system.config.ConfigError import ConfigError
 
 class DataImportFactory(object):
@@ -34,6 +35,7 @@ class DataImportFactory(object):
     def __init__(self, system, configHelper):
         self.__system = system
         self.__configHelper = configHelper
+        self.__typeCache = None
         self.__importFactoryMethods = {".xls"  : self.__createXlsDataImport,
                                        ".xlsx" : self.__createXlsDataImport,
                                        ".xlsm" : self.__createXlsDataImport,
@@ -68,11 +70,10 @@ class DataImportFactory(object):
         nullValues = importInfo.get("null_values")
         dbNull = importInfo.get("db_null")
         
-        conn = self.__system.getConnectionManager().open(path=path)
-
         return SQLDataImport(name=importTitle,
                              destination=destination,
-                             db=conn,
+                             connectionManager=self.__system.getConnectionManager(),
+                             connectionParameters={"path": path},
                              query=query,
                              titleColumn=titleColumn,
                              nullValues=nullValues,
@@ -105,14 +106,18 @@ class DataImportFactory(object):
         sql = importInfo.get("sql")
         query = self.__getQuery(sql, table)
         titleColumn = importInfo.get("import_title_column")
-        conn = self.__system.getConnectionManager().open(
-                host=host, db=db, user=user, pwd=pwd, schema=schema)
+        connectionParameters = {"host": host, "db": db, "user": user,
+                                "pwd": pwd, "schema": schema}
+        stream = importInfo.as_bool("server_side_cursor") \
+            if "server_side_cursor" in importInfo else False
 
         return SQLDataImport(name=importTitle,
                              destination=destination,
-                             db=conn,
+                             connectionManager=self.__system.getConnectionManager(),
+                             connectionParameters=connectionParameters,
                              query=query,
-                             titleColumn=titleColumn)
+                             titleColumn=titleColumn,
+                             stream=stream)
 
     
     def __createCsvDataImport(self, importTitle, importInfo):
@@ -130,6 +135,28 @@ class DataImportFactory(object):
         if delimiter:
             delimiter = delimiter.decode("string_escape")
         
+        engine = importInfo.get("engine", "standard")
+        if engine not in CSVDataImport.ENGINES:
+            raise ConfigError("Data import '{0}': engine must be one of {1}."
+                              .format(importTitle,
+                                      ", ".join(CSVDataImport.ENGINES)))
+        
+        inferTypes = importInfo.get("infer_types", "head")
+        if inferTypes not in CSVDataImport.INFER_TYPES:
+            raise ConfigError("Data import '{0}': infer_types must be one of "
+                              "{1}.".format(importTitle, ", ".join(
+                                      CSVDataImport.INFER_TYPES)))
+        
+        inferRows = importInfo.as_int("infer_rows") \
+            if "infer_rows" in importInfo else 1000
+        
+        processes = importInfo.as_int("processes") \
+            if "processes" in importInfo else 1
+        ordered = importInfo.as_bool("preserve_order") \
+            if "preserve_order" in importInfo else True
+        memoryMap = importInfo.as_bool("memory_map") \
+            if "memory_map" in importInfo else False
+        
         if columns:
             expandedColumns = []
             for i, col in enumerate(columns):
@@ -161,7 +188,14 @@ class DataImportFactory(object):
                              delimiter=delimiter,
                              nullValues=nullValues,
                              dbNull=dbNull,
-                             titleColumn=titleColumn)
+                             titleColumn=titleColumn,
+                             engine=engine,
+                             inferTypes=inferTypes,
+                             inferRows=inferRows,
+                             typeCache=self.__getTypeCache(),
+                             processes=processes,
+                             ordered=ordered,
+                             memoryMap=memoryMap)
 
 
     def __createXlsDataImport(self, importTitle, importInfo):
@@ -242,6 +276,14 @@ class DataImportFactory(object):
         return outPath
     
     
+    def __getTypeCache(self):
+        if not self.__typeCache:
+            self.__typeCache = TypeCache(os.path.join(
+                    self.__system.getConfig().getOutputPath(), "type_cache"))
+        
+        return self.__typeCache
+    
+    
     def __getLog(self):
         return logging.getLogger("app.%s" % self.__class__.__name__)
     
@@ -48,6 +48,15 @@ class QueryFactory(object):
                 raise ConfigError(str(e))
             
             query = Query(queryTitle, sql)
+            dependsOn = queryInfo.get("depends_on")
+            if dependsOn is not None:
+                if isinstance(dependsOn, basestring):
+                    dependsOn = [dependsOn] if dependsOn.strip() else []
+                query.setDependencies(dependsOn)
+            
+            if "server_side_cursor" in queryInfo:
+                query.setStreamed(queryInfo.as_bool("server_side_cursor"))
+                
             queryFeaturesSection = queryInfo.get("features")
             if queryFeaturesSection:
                 for featureName, featureConfig in queryFeaturesSection.iteritems():
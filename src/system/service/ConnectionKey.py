@@ -0,0 +1,83 @@
+# core
+import hashlib
+import os
+
+class ConnectionKey(object):
+    '''
+    Identifies a database by its connection parameters, for pooling its
+    connections in the :class:`.ConnectionManager`. Keys made from equivalent
+    parameters are equal, regardless of the order the parameters were passed
+    in, or how the database path is written.
+
+    Passwords are never held in plain text: they are replaced by a digest, so
+    that keys can safely be logged, while connections made with different
+    passwords are still kept apart.
+
+    :param kwargs: the connection parameters
+    '''
+
+    passwordParameters = ("pwd", "password")
+
+    def __init__(self, **kwargs):
+        items = []
+        for name, value in sorted(kwargs.iteritems()):
+            if name == "path" and value:
+                value = os.path.normcase(os.path.abspath(value))
+            elif name in ConnectionKey.passwordParameters and value is not None:
+                value = _Digest(value)
+            elif isinstance(value, list):
+                value = tuple(value)
+
+            items.append((name, value))
+
+        self.__items = tuple(items)
+        self.__hash = hash(self.__items)
+
+
+    def __eq__(self, other):
+        return isinstance(other, ConnectionKey) and self.__items == other.__items
+
+
+    def __ne__(self, other):
+        return not self == other
+
+
+    def __hash__(self):
+        return self.__hash
+
+
+    def __str__(self):
+        return ";".join("{0}={1}".format(name, value)
+                        for name, value in self.__items)
+
+
+    def __repr__(self):
+        return "ConnectionKey({0})".format(self)
+
+
+class _Digest(object):
+    '''
+    Stands in for a password in a :class:`.ConnectionKey`.
+    '''
+
+    def __init__(self, value):
+        if isinstance(value, unicode):
+            value = value.encode("utf-8")
+
+        self.__digest = hashlib.sha256(str(value)).hexdigest()
+
+
+    def __eq__(self, other):
+        return isinstance(other, _Digest) and self.__digest == other.__digest
+
+
+    def __ne__(self, other):
+        return not self == other
+
+
+    def __hash__(self):
+        return hash(self.__digest)
+
+
+    def __str__(self):
+        return "***"
@@ -1,55 +1,302 @@
 # core
 import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# MincePy
+from system.service.ConnectionKey import ConnectionKey
 
 class ConnectionManager(object):
     '''
     Manages opening, closing, and pooling database connections.
-    
+
+    Connections are pooled by :class:`.ConnectionKey`. A connection is checked
+    out to one thread at a time: most database drivers do not allow a
+    connection to be used by two threads at once, so each thread which opens a
+    database receives its own connection to it, which it keeps until it
+    releases its connections with :meth:`releaseThreadConnections`. Released
+    connections are kept for reuse by other threads until they have been idle
+    for too long.
+
     :param connectionFactory: factory for creating database connections
     :type connectionFactory: object
+    :param minSize: optional - the number of idle connections to keep for each
+        set of connection parameters, regardless of how long they are idle
+    :type minSize: int
+    :param maxSize: optional - the maximum number of connections open at once
+        for each set of connection parameters; threads wait for a connection
+        to be released once the limit is reached. Unlimited if 0 or None
+    :type maxSize: int
+    :param maxIdleSeconds: optional - how long a released connection is kept
+        before being closed
+    :type maxIdleSeconds: float
     '''
 
-    def __init__(self, connectionFactory):
+    def __init__(self, connectionFactory, minSize=0, maxSize=None,
+                 maxIdleSeconds=300):
         self.__connectionFactory = connectionFactory
+        self.__minSize = minSize or 0
+        self.__maxSize = maxSize or None
+        self.__maxIdleSeconds = maxIdleSeconds
         self.__log = logging.getLogger("%s.%s"
                                        % (__name__, self.__class__.__name__))
-        self.__connections = {}
-        
-        
-    def __close(self, connectionKey):
-        '''
-        Closes a database connection and removes it from the pool.
-        
-        :param connectionKey: the unique internal identifier for the connection
-        '''
-        if connectionKey in self.__connections:
-            self.__connections[connectionKey].close()
-            del self.__connections[connectionKey]
-            self.__log.debug("Closed connection to %s", connectionKey)
-    
-    
+        self.__pools = {}
+        self.__checkedOut = {}
+        self.__condition = threading.Condition(threading.RLock())
+
+
+    def __getKey(self, kwargs):
+        return ConnectionKey(**kwargs)
+
+
+    def __getPool(self, key):
+        pool = self.__pools.get(key)
+        if pool is None:
+            pool = self.__pools[key] = _ConnectionPool()
+
+        return pool
+
+
+    def __close(self, key, connection):
+        # The connection must already have been removed from its pool's count
+        # of open connections, under the lock.
+        try:
+            connection.close()
+        except Exception as e:
+            self.__log.warning("Error closing connection to %s: %s", key, e)
+        else:
+            self.__log.debug("Closed connection to %s", key)
+
+
+    def __evictIdle(self, pool):
+        '''
+        Removes connections which have been idle for too long from a pool,
+        keeping at least the minimum number. Must be called holding the lock;
+        the evicted connections no longer count towards the pool's size.
+
+        :returns: the connections to close
+        :rtype: list
+        '''
+        expiry = time.time() - self.__maxIdleSeconds
+        evicted = []
+        while len(pool.idle) > self.__minSize and pool.idle[0][1] < expiry:
+            evicted.append(pool.idle.pop(0)[0])
+
+        pool.evictions += len(evicted)
+        pool.numOpen -= len(evicted)
+        if evicted:
+            self.__condition.notify_all()
+
+        return evicted
+
+
+    def __isHealthy(self, key, connection):
+        try:
+            return connection.isHealthy()
+        except Exception as e:
+            self.__log.warning("Health check failed for %s: %s", key, e)
+            return False
+
+
+    def __checkout(self, key, kwargs):
+        threadKey = (threading.current_thread().ident, key)
+        waited = False
+        while True:
+            connection = None
+            with self.__condition:
+                pool = self.__getPool(key)
+                if threadKey in self.__checkedOut:
+                    pool.hits += 1
+                    return self.__checkedOut[threadKey]
+
+                toClose = self.__evictIdle(pool)
+                if pool.idle:
+                    connection = pool.idle.pop()[0]
+                    pool.hits += 1
+                elif not self.__maxSize or pool.numOpen < self.__maxSize:
+                    pool.numOpen += 1
+                    pool.misses += 1
+                else:
+                    if not waited:
+                        pool.waits += 1
+                        waited = True
+                        self.__log.debug("Waiting for a connection to %s", key)
+
+                    # Nothing can have been evicted, since evicting frees room
+                    # for a new connection.
+                    self.__condition.wait(0.5)
+                    continue
+
+            for evicted in toClose:
+                self.__close(key, evicted)
+
+            if connection is None:
+                try:
+                    connection = self.__connectionFactory.getConnection(**kwargs)
+                except:
+                    with self.__condition:
+                        pool.numOpen -= 1
+                        self.__condition.notify_all()
+                    raise
+
+                self.__log.debug("Opened new connection to %s", key)
+            elif not self.__isHealthy(key, connection):
+                with self.__condition:
+                    pool.unhealthy += 1
+                    pool.numOpen -= 1
+                    self.__condition.notify_all()
+                self.__close(key, connection)
+                continue
+
+            with self.__condition:
+                self.__checkedOut[threadKey] = connection
+
+            return connection
+
+
+    def __release(self, threadKey):
+        with self.__condition:
+            connection = self.__checkedOut.pop(threadKey, None)
+            if connection is None:
+                return
+
+            key = threadKey[1]
+            self.__pools[key].idle.append((connection, time.time()))
+            toClose = self.__evictIdle(self.__pools[key])
+            self.__condition.notify_all()
+
+        for evicted in toClose:
+            self.__close(key, evicted)
+
+
     def open(self, **kwargs):
         '''
-        Opens a database connection.  Attempts to retrieve an existing
-        connection from the pool before creating a new connection.
-        
+        Opens a database connection. The calling thread keeps the same
+        connection for each set of connection parameters until it releases it;
+        otherwise, a connection is taken from the pool, or a new connection is
+        created if none are available.
+
+        :param kwargs: the connection parameters to use
+        :rtype: :class:`.AbstractDatabase`
+        '''
+        return self.__checkout(self.__getKey(kwargs), kwargs)
+
+
+    def release(self, **kwargs):
+        '''
+        Returns the calling thread's connection for a set of connection
+        parameters to the pool, if it has one.
+
+        :param kwargs: the connection parameters the connection was opened with
+        '''
+        self.__release((threading.current_thread().ident, self.__getKey(kwargs)))
+
+
+    @contextmanager
+    def checkout(self, **kwargs):
+        '''
+        Context manager which opens a database connection and releases it
+        afterwards, unless the calling thread already had it open.
+
         :param kwargs: the connection parameters to use
         :rtype: :class:`.AbstractDatabase`
         '''
-        connectionKey = ";".join((":".join((k, v))
-                                  for k, v in kwargs.iteritems()))
-        
-        if not connectionKey in self.__connections:
-            connection = self.__connectionFactory.getConnection(**kwargs)
-            self.__connections[connectionKey] = connection
-            self.__log.debug("Opened new connection to %s", connectionKey)
-
-        return self.__connections[connectionKey]
-    
-    
+        threadKey = (threading.current_thread().ident, self.__getKey(kwargs))
+        with self.__condition:
+            alreadyOpen = threadKey in self.__checkedOut
+
+        connection = self.open(**kwargs)
+        try:
+            yield connection
+        finally:
+            if not alreadyOpen:
+                self.__release(threadKey)
+
+
+    def releaseThreadConnections(self):
+        '''
+        Returns all of the connections opened by the calling thread to the
+        pool.
+        '''
+        threadId = threading.current_thread().ident
+        with self.__condition:
+            threadKeys = [threadKey for threadKey in self.__checkedOut
+                          if threadKey[0] == threadId]
+
+        for threadKey in threadKeys:
+            self.__release(threadKey)
+
+
+    def getStats(self):
+        '''
+        :returns: statistics for each pool, by connection parameters: the
+            number of connections open, idle, and checked out; the number of
+            checkouts which reused a connection (hits), created one (misses),
+            or had to wait for one; and the number of connections closed for
+            being idle too long (evictions) or failing a health check
+        :rtype: dict of :class:`.ConnectionKey` to dict of str to int
+        '''
+        with self.__condition:
+            stats = {}
+            for key, pool in self.__pools.iteritems():
+                stats[key] = {"open"      : pool.numOpen,
+                              "idle"      : len(pool.idle),
+                              "checkedOut": sum(1 for threadKey in self.__checkedOut
+                                                if threadKey[1] == key),
+                              "hits"      : pool.hits,
+                              "misses"    : pool.misses,
+                              "waits"     : pool.waits,
+                              "evictions" : pool.evictions,
+                              "unhealthy" : pool.unhealthy}
+
+            return stats
+
+
+    def getReuseCount(self):
+        '''
+        :returns: the number of times an open connection was reused rather
+            than a new one being created, across all pools
+        :rtype: int
+        '''
+        with self.__condition:
+            return sum(pool.hits for pool in self.__pools.itervalues())
+
+
     def closeAll(self):
         '''
-        Closes all open database connections.
+        Closes all open database connections, whether idle or checked out.
         '''
-        for key in self.__connections.keys():
-            self.__close(key)
+        with self.__condition:
+            for key, stats in self.getStats().iteritems():
+                self.__log.debug("Connection pool for %s: %s", key, stats)
+
+            toClose = [(threadKey[1], connection) for threadKey, connection
+                       in self.__checkedOut.iteritems()]
+            self.__checkedOut.clear()
+            for key, pool in self.__pools.iteritems():
+                toClose.extend((key, connection) for connection, _ in pool.idle)
+                pool.idle = []
+                pool.numOpen = 0
+
+            self.__condition.notify_all()
+
+        for key, connection in toClose:
+            self.__close(key, connection)
+
+
+class _ConnectionPool(object):
+    '''
+    The idle connections and statistics for one set of connection parameters
+    in a :class:`.ConnectionManager`.
+    '''
+
+    def __init__(self):
+        # Idle connections and the time each was released, oldest first.
+        self.idle = []
+        self.numOpen = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self.unhealthy = 0
@@ -0,0 +1,173 @@
+# core
+import datetime
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+
+class MetricsRecorder(object):
+    '''
+    Records timings and row counts for each query and data import in a run,
+    so that slow queries can be found without reading the logs.
+
+    Each record is written as one line of JSON, or as one row of the
+    ``query_metrics`` table if the metrics path is a SQLite database (ending in
+    .db). Every record holds the fields in :attr:`FIELDS`:
+
+        run_id          - identifies the run the record belongs to
+        started         - when the query started, in ISO 8601 format (UTC)
+        kind            - "query" or "import"
+        db              - the title of the database
+        name            - the title of the query or data import
+        variant         - the index of the prepared SQL statement, for queries
+                          which prepare several statements
+        sql             - the prepared SQL statement
+        seconds         - the wall time taken to run the statement and handle
+                          its output
+        prepare_seconds - the time taken preparing the query's statements
+        rows            - the number of rows returned, or affected by a
+                          statement with no output handler
+        bytes_written   - the growth of the output handler's file
+        status          - "ok", "error", or "skipped" for queries and data
+                          imports skipped by an incremental run
+        error           - the error message, if the query failed
+
+    Records may be written from several threads at once.
+
+    :param path: optional - the file to write to; nothing is recorded if None
+    :type path: str
+    '''
+
+    FIELDS = ("run_id", "started", "kind", "db", "name", "variant", "sql",
+              "seconds", "prepare_seconds", "rows", "bytes_written", "status",
+              "error")
+
+    def __init__(self, path=None):
+        self.__path = path
+        self.__runId = uuid.uuid4().hex
+        self.__sink = None
+        self.__lock = threading.Lock()
+        self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
+
+
+    def __getSink(self):
+        if self.__sink is None:
+            if self.__path.endswith(".db"):
+                self.__sink = _SQLiteSink(self.__path)
+            else:
+                self.__sink = _JsonLinesSink(self.__path)
+
+        return self.__sink
+
+
+    def isEnabled(self):
+        '''
+        :returns: whether metrics are being recorded
+        :rtype: boolean
+        '''
+        return self.__path is not None
+
+
+    def getPath(self):
+        '''
+        :returns: the file metrics are written to, or None if disabled
+        :rtype: str
+        '''
+        return self.__path
+
+
+    def getRunId(self):
+        '''
+        :returns: the identifier of the current run
+        :rtype: str
+        '''
+        return self.__runId
+
+
+    def record(self, kind, db, name, started, seconds, **fields):
+        '''
+        Records the metrics for one query statement or data import.
+
+        :param kind: "query" or "import"
+        :type kind: str
+        :param db: the title of the database
+        :type db: str
+        :param name: the title of the query or data import
+        :type name: str
+        :param started: when the query started, as returned by
+            :func:`time.time`
+        :type started: float
+        :param seconds: the wall time taken
+        :type seconds: float
+        :param fields: optional - values for any of the other :attr:`FIELDS`
+        '''
+        if not self.isEnabled():
+            return
+
+        metrics = dict.fromkeys(MetricsRecorder.FIELDS)
+        metrics.update(fields)
+        metrics.update(run_id=self.__runId,
+                       started=datetime.datetime.utcfromtimestamp(started)
+                               .isoformat(),
+                       kind=kind,
+                       db=db,
+                       name=name,
+                       seconds=round(seconds, 6))
+        if metrics["status"] is None:
+            metrics["status"] = "ok"
+
+        with self.__lock:
+            try:
+                self.__getSink().write(metrics)
+            except Exception as e:
+                self.__log.warning("Error recording metrics to %s: %s",
+                                   self.__path, e)
+
+
+    def close(self):
+        '''
+        Closes the metrics file.
+        '''
+        with self.__lock:
+            if self.__sink is not None:
+                self.__sink.close()
+                self.__sink = None
+
+
+class _JsonLinesSink(object):
+
+    def __init__(self, path):
+        self.__file = open(path, "a")
+
+
+    def write(self, metrics):
+        self.__file.write(json.dumps(metrics, sort_keys=True) + "\n")
+        self.__file.flush()
+
+
+    def close(self):
+        self.__file.close()
+
+
+class _SQLiteSink(object):
+
+    def __init__(self, path):
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS query_metrics ({0})".format(
+                        ", ".join(MetricsRecorder.FIELDS)))
+        self.__connection.commit()
+        self.__sql = "INSERT INTO query_metrics ({0}) VALUES ({1})".format(
+                ", ".join(MetricsRecorder.FIELDS),
+                ", ".join("?" * len(MetricsRecorder.FIELDS)))
+
+
+    def write(self, metrics):
+        self.__connection.execute(
+                self.__sql, [metrics[field] for field in MetricsRecorder.FIELDS])
+        self.__connection.commit()
+
+
+    def close(self):
+        self.__connection.close()
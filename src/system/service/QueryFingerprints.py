@@ -0,0 +1,274 @@
+# core
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+
+# MincePy
+from database.SQLiteDatabase import SQLiteDatabase
+from system.service.ConnectionKey import ConnectionKey
+
+class QueryFingerprints(object):
+    '''
+    Keeps a fingerprint of every query and data import which ran successfully
+    against each database, so that incremental runs can skip the ones whose
+    inputs have not changed since.
+
+    A query's fingerprint covers its prepared SQL, the identity of the database
+    and the state of every data import whose table the SQL refers to: the
+    modification time and size of its source file and its configured options
+    (see :meth:`.DataImport.getOptions`). A data import's fingerprint covers
+    its destination table, that same state and the database; data imports
+    without a source file, i.e. from a Postgres server, or without known
+    options never match. Fingerprints are kept in the ``fingerprints`` table,
+    keyed by configuration file, kind ("query" or "import"), database title
+    and name.
+
+    A matching fingerprint only shows that a query's own inputs are unchanged:
+    whether it can be skipped also depends on the queries it depends on, which
+    is decided by the :class:`.MincePyTask`. Changes made to a database outside
+    of MincePy are not detected.
+
+    Fingerprints may be recorded from several threads at once.
+
+    :param path: optional - the SQLite database to keep fingerprints in;
+        incremental runs are disabled if None
+    :type path: str
+    :param configPath: the configuration file the run belongs to
+    :type configPath: str
+    '''
+
+    def __init__(self, path=None, configPath=None):
+        self.__path = path
+        self.__configPath = os.path.normcase(os.path.abspath(configPath)) \
+            if configPath else ""
+        self.__previous = None
+        self.__pending = {}
+        self.__sources = {}
+        self.__changedTables = set()
+        self.__lock = threading.Lock()
+
+
+    def isEnabled(self):
+        '''
+        :returns: whether queries with unchanged fingerprints are skipped
+        :rtype: boolean
+        '''
+        return self.__path is not None
+
+
+    def addDataImports(self, dataImports):
+        '''
+        Registers the data imports of the current run, so that queries referring
+        to their tables include the state of their source files in their
+        fingerprints.
+
+        :param dataImports: the data imports
+        :type dataImports: list of :class:`.DataImport`
+        '''
+        with self.__lock:
+            for dataImport in dataImports:
+                self.__sources.setdefault(
+                        dataImport.getDestination().lower(), []).append(
+                                self.__getSourceState(dataImport))
+
+
+    def markTableChanged(self, dbTitle, table):
+        '''
+        Records that a table was replaced in the current run, i.e. by a data
+        import, so that the queries referring to it are not skipped.
+
+        :param dbTitle: the title of the database
+        :type dbTitle: str
+        :param table: the name of the table
+        :type table: str
+        '''
+        with self.__lock:
+            self.__changedTables.add((dbTitle, table.lower()))
+
+
+    def getChangedTables(self, dbTitle, preparedQueries):
+        '''
+        :param dbTitle: the title of the database
+        :type dbTitle: str
+        :param preparedQueries: the prepared SQL of a query
+        :type preparedQueries: list of str
+        :returns: the tables referred to by the query which were replaced in
+            the current run
+        :rtype: list of str
+        '''
+        with self.__lock:
+            tables = [table for db, table in self.__changedTables
+                      if db == dbTitle]
+
+        return sorted(self.__getReferencedTables(tables, preparedQueries))
+
+
+    def getImportFingerprint(self, dbConfig, dataImport):
+        '''
+        :param dbConfig: the database the data is imported into
+        :type dbConfig: :class:`.AbstractDatabaseConfiguration`
+        :param dataImport: the data import
+        :type dataImport: :class:`.DataImport`
+        :returns: the fingerprint of the data import, or None if the state of
+            its source cannot be determined
+        :rtype: str
+        '''
+        state = self.__getSourceState(dataImport)
+        if state is None:
+            return None
+
+        return self.__hash(self.__getIdentity(dbConfig),
+                           dataImport.getDestination().lower(), state)
+
+
+    def getQueryFingerprint(self, dbConfig, preparedQueries):
+        '''
+        :param dbConfig: the database the query runs against
+        :type dbConfig: :class:`.AbstractDatabaseConfiguration`
+        :param preparedQueries: the prepared SQL of the query
+        :type preparedQueries: list of str
+        :returns: the fingerprint of the query, or None if the state of one of
+            the data imports it refers to cannot be determined
+        :rtype: str
+        '''
+        with self.__lock:
+            sources = dict(self.__sources)
+
+        inputs = []
+        for table in sorted(self.__getReferencedTables(sources, preparedQueries)):
+            if None in sources[table]:
+                return None
+
+            inputs.append([table, sorted(sources[table])])
+
+        return self.__hash(self.__getIdentity(dbConfig), preparedQueries, inputs)
+
+
+    def isUnchanged(self, kind, dbTitle, name, fingerprint):
+        '''
+        :param kind: "query" or "import"
+        :type kind: str
+        :param dbTitle: the title of the database
+        :type dbTitle: str
+        :param name: the title of the query, or name of the data import
+        :type name: str
+        :param fingerprint: the current fingerprint
+        :type fingerprint: str
+        :returns: whether incremental runs are enabled and the fingerprint
+            matches the last successful run
+        :rtype: boolean
+        '''
+        if not self.isEnabled() or fingerprint is None:
+            return False
+
+        with self.__lock:
+            if self.__previous is None:
+                self.__previous = self.__load()
+
+            return self.__previous.get((kind, dbTitle, name)) == fingerprint
+
+
+    def record(self, kind, dbTitle, name, fingerprint):
+        '''
+        Records the fingerprint of a query or data import which ran, to be
+        saved by :meth:`save`.
+
+        :param kind: "query" or "import"
+        :type kind: str
+        :param dbTitle: the title of the database
+        :type dbTitle: str
+        :param name: the title of the query, or name of the data import
+        :type name: str
+        :param fingerprint: the fingerprint of the successful run, or None to
+            forget the last one, i.e. before running it again
+        :type fingerprint: str
+        '''
+        if not self.isEnabled():
+            return
+
+        with self.__lock:
+            self.__pending[(kind, dbTitle, name)] = fingerprint
+
+
+    def save(self):
+        '''
+        Saves the fingerprints recorded since the last call.
+        '''
+        if not self.isEnabled():
+            return
+
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = {}
+            if self.__previous is not None:
+                self.__previous.update(pending)
+
+        if not pending:
+            return
+
+        updated = datetime.datetime.utcnow().isoformat()
+        db = SQLiteDatabase(self.__path)
+        try:
+            self.__initialize(db)
+            db.executeMany("DELETE FROM fingerprints WHERE config = ? AND "
+                           "kind = ? AND db = ? AND name = ?",
+                           [[self.__configPath] + list(key) for key in pending])
+            db.executeMany("INSERT INTO fingerprints (config, kind, db, name, "
+                           "fingerprint, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                           [[self.__configPath] + list(key)
+                            + [fingerprint, updated]
+                            for key, fingerprint in pending.iteritems()
+                            if fingerprint is not None])
+        finally:
+            db.close()
+
+
+    def __load(self):
+        db = SQLiteDatabase(self.__path)
+        try:
+            self.__initialize(db)
+            return dict(((kind, dbTitle, name), fingerprint)
+                        for kind, dbTitle, name, fingerprint in db.query(
+                                "SELECT kind, db, name, fingerprint FROM "
+                                "fingerprints WHERE config = ?",
+                                [self.__configPath]))
+        finally:
+            db.close()
+
+
+    def __initialize(self, db):
+        db.execute("CREATE TABLE IF NOT EXISTS fingerprints (config TEXT, "
+                   "kind TEXT, db TEXT, name TEXT, fingerprint TEXT, "
+                   "updated TEXT)")
+        db.execute("CREATE UNIQUE INDEX IF NOT EXISTS fingerprints_name ON "
+                   "fingerprints (config, kind, db, name)")
+
+
+    def __getIdentity(self, dbConfig):
+        return str(ConnectionKey(**dbConfig.getConnectionParameters()))
+
+
+    def __getSourceState(self, dataImport):
+        path = dataImport.getSourcePath()
+        options = dataImport.getOptions()
+        if not path or not os.path.isfile(path) or options is None:
+            return None
+
+        stat = os.stat(path)
+        # Sorted, so that the options hash the same in every run.
+        return [os.path.normcase(os.path.abspath(path)), stat.st_mtime,
+                stat.st_size, sorted(options.iteritems())]
+
+
+    def __getReferencedTables(self, tables, preparedQueries):
+        sql = "\n".join(preparedQueries).lower()
+        return [table for table in tables
+                if table in sql and re.search(
+                        r"(?<![\w$]){0}(?![\w$])".format(re.escape(table)), sql)]
+
+
+    def __hash(self, *components):
+        return hashlib.sha256(json.dumps(components)).hexdigest()
@@ -0,0 +1,151 @@
+# core
+import datetime
+import logging
+import os
+import threading
+
+# MincePy
+from database.SQLiteDatabase import SQLiteDatabase
+
+class RunHistory(object):
+    '''
+    Keeps the duration of every query in every run in a SQLite database, and
+    flags queries which have become much slower than usual.
+
+    Durations are kept in the ``run_history`` table, keyed by configuration
+    file, database title and query title, which can be read like any other
+    database with :class:`.SQLiteDatabase`. At the end of each run, a query is
+    flagged as a regression if it took more than ``threshold`` times the
+    median of its durations in the previous ``window`` runs of the same
+    configuration file, provided that it has run at least ``minRuns`` times.
+    Queries taking less than :attr:`minSeconds` are never flagged, since small
+    differences in their timings are mostly noise.
+
+    Durations may be recorded from several threads at once.
+
+    :param path: optional - the SQLite database to keep the run history in;
+        nothing is recorded if None
+    :type path: str
+    :param configPath: the configuration file the run belongs to
+    :type configPath: str
+    :param threshold: optional - how many times slower than the median a query
+        has to be to be flagged
+    :type threshold: float
+    :param window: optional - the number of previous runs to take the median of
+    :type window: int
+    :param minRuns: optional - the number of previous runs required before a
+        query can be flagged
+    :type minRuns: int
+    '''
+
+    minSeconds = 1.0
+
+    def __init__(self, path=None, configPath=None, threshold=2.0, window=10,
+                 minRuns=3):
+        self.__path = path
+        self.__configPath = os.path.normcase(os.path.abspath(configPath)) \
+            if configPath else ""
+        self.__threshold = threshold
+        self.__window = window
+        self.__minRuns = minRuns
+        self.__started = datetime.datetime.utcnow().isoformat()
+        self.__durations = []
+        self.__lock = threading.Lock()
+        self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
+
+
+    def isEnabled(self):
+        '''
+        :returns: whether the run history is being recorded
+        :rtype: boolean
+        '''
+        return self.__path is not None
+
+
+    def record(self, dbTitle, queryTitle, seconds):
+        '''
+        Records the duration of a query in the current run.
+
+        :param dbTitle: the title of the database the query ran against
+        :type dbTitle: str
+        :param queryTitle: the title of the query
+        :type queryTitle: str
+        :param seconds: the time taken by the query
+        :type seconds: float
+        '''
+        if not self.isEnabled():
+            return
+
+        with self.__lock:
+            self.__durations.append((dbTitle, queryTitle, seconds))
+
+
+    def save(self, runId):
+        '''
+        Saves the durations recorded in the current run, and logs a warning for
+        each query which regressed.
+
+        :param runId: identifies the current run
+        :type runId: str
+        :returns: the regressed queries, as (database title, query title,
+            seconds, median seconds)
+        :rtype: list of tuples
+        '''
+        if not self.isEnabled():
+            return []
+
+        with self.__lock:
+            durations = self.__durations
+            self.__durations = []
+
+        db = SQLiteDatabase(self.__path)
+        try:
+            self.__initialize(db)
+            regressions = [regression for regression
+                           in (self.__checkRegression(db, *duration)
+                               for duration in durations)
+                           if regression]
+
+            db.executeMany("INSERT INTO run_history (run_id, config, started, "
+                           "db, query, seconds) VALUES (?, ?, ?, ?, ?, ?)",
+                           [[runId, self.__configPath, self.__started, dbTitle,
+                             queryTitle, seconds]
+                            for dbTitle, queryTitle, seconds in durations])
+        finally:
+            db.close()
+
+        for dbTitle, queryTitle, seconds, median in regressions:
+            self.__log.warning(
+                    "Query '%s' regressed in %s: took %.2fs, %.1fx its median "
+                    "of %.2fs.", queryTitle, dbTitle, seconds, seconds / median,
+                    median)
+
+        return regressions
+
+
+    def __initialize(self, db):
+        db.execute("CREATE TABLE IF NOT EXISTS run_history (run_id TEXT, "
+                   "config TEXT, started TEXT, db TEXT, query TEXT, "
+                   "seconds REAL)")
+        db.execute("CREATE INDEX IF NOT EXISTS run_history_query ON "
+                   "run_history (config, db, query, started)")
+
+
+    def __checkRegression(self, db, dbTitle, queryTitle, seconds):
+        previous = sorted(row[0] for row in db.query(
+                "SELECT seconds FROM run_history WHERE config = ? AND db = ? "
+                "AND query = ? ORDER BY started DESC LIMIT ?",
+                [self.__configPath, dbTitle, queryTitle, self.__window]))
+
+        if seconds < RunHistory.minSeconds \
+                or len(previous) < max(self.__minRuns, 1):
+            return None
+
+        middle = len(previous) // 2
+        median = previous[middle] if len(previous) % 2 \
+            else (previous[middle - 1] + previous[middle]) / 2.0
+
+        if median > 0 and seconds > median * self.__threshold:
+            return (dbTitle, queryTitle, seconds, median)
+
+        return None
@@ -1,6 +1,12 @@
 # core
 import logging
 
+# contrib
+import pythoncom
+
+# MincePy
+from util.ThreadPool import ThreadPool
+
 class AbstractTask(object):
     '''
     Abstract base class for all task modules.
@@ -40,6 +46,36 @@ class AbstractTask(object):
         return self.__log
     
    
+    def createThreadPool(self, maxWorkers, name=None):
+        '''
+        Creates a pool of worker threads for the task module. Each worker thread
+        is initialized for COM (used for MS Access and Excel), and returns the
+        database connections it opened through the
+        :class:`.ConnectionManager` to the pool when it exits.
+        
+        :param maxWorkers: the maximum number of worker threads to run at once
+        :type maxWorkers: int
+        :param name: optional - prefix for the names of the worker threads
+        :type name: str
+        :rtype: :class:`.ThreadPool`
+        '''
+        return ThreadPool(maxWorkers,
+                          name=name or self.__class__.__name__,
+                          initializer=self.__initializeWorker,
+                          finalizer=self.__finalizeWorker)
+    
+    
+    def __initializeWorker(self):
+        pythoncom.CoInitialize()
+    
+    
+    def __finalizeWorker(self):
+        try:
+            self.__system.getConnectionManager().releaseThreadConnections()
+        finally:
+            pythoncom.CoUninitialize()
+    
+   
     def execute(self):
         '''
         The entry point for the task module.  Subclasses are required to
@@ -1,10 +1,28 @@
+# core
+import sys
+import threading
+import time
+
 # MincePy
 from system.task.AbstractTask import AbstractTask
+from dataimport.DataImportPipeline import DataImportPipeline
+from dataimport.MaterializedDataImport import MaterializedDataImport
+from dataimport.DataImportCancelledError import DataImportCancelledError
 
 class DataImporterTask(AbstractTask):
     '''
-    Imports data into each configured database.
-    
+    Imports data into each configured database. Each data import is read once
+    and replayed into every database.
+
+    When :meth:`.Config.getMaxWorkers` is greater than 1, the imports are
+    pipelined: up to that many data imports are read at the same time, each
+    source being read once, while one writer thread per database imports the
+    rows in the configured order.
+
+    In incremental runs (see :class:`.QueryFingerprints`), a data import is
+    skipped if its source file has not changed since it was last imported into
+    every database.
+
     :param system: reference to the system instance
     :type system: :class:`.System`
     :param dataImports: list of data imports to perform
@@ -14,24 +32,181 @@ class DataImporterTask(AbstractTask):
     def __init__(self, system, dataImports):
         super(DataImporterTask, self).__init__(system)
         self.__dataImports = dataImports
+        self.__pipelines = None
+        self.__errorLock = threading.Lock()
+        self.__error = None
+
 
-    
     def execute(self):
         '''
         See :meth:`.AbstractTask.execute`.
         '''
-        activeDBs = self.getSystem().getConfig().getActiveDBs()
-        numImports = len(self.__dataImports)
-        
+        config = self.getSystem().getConfig()
+        activeDBs = config.getActiveDBs()
+
+        fingerprints = self.getSystem().getQueryFingerprints()
+        fingerprints.addDataImports(self.__dataImports)
+        dataImports = [dataImport for dataImport in self.__dataImports
+                       if not self.__isUnchanged(activeDBs, dataImport)]
+
+        try:
+            if config.getMaxWorkers() > 1 and activeDBs and dataImports:
+                self.__executePipelined(activeDBs, dataImports,
+                                        config.getMaxWorkers())
+            else:
+                self.__executeSequential(activeDBs, dataImports)
+        finally:
+            fingerprints.save()
+
+
+    def __isUnchanged(self, activeDBs, dataImport):
+        fingerprints = self.getSystem().getQueryFingerprints()
         for queryRunnerDB in activeDBs:
-            log = self.getLog(queryRunnerDB)
-            db = self.getSystem().getConnectionManager().open(
-                  **queryRunnerDB.getConnectionParameters())
-            
-            for i, dataImport in enumerate(self.__dataImports):
-                log.info("Executing data import %(num)i of %(total)i: %(query)s."
-                         % {"num"  : i + 1,
-                            "total": numImports,
-                            "query": dataImport.getName()})
+            fingerprint = fingerprints.getImportFingerprint(queryRunnerDB,
+                                                            dataImport)
+            if queryRunnerDB.isNew() or not fingerprints.isUnchanged(
+                    "import", queryRunnerDB.getTitle(), dataImport.getName(),
+                    fingerprint):
+                return False
+
+        metrics = self.getSystem().getMetricsRecorder()
+        for queryRunnerDB in activeDBs:
+            self.getLog(queryRunnerDB).info(
+                    "Skipping data import %s: unchanged since the last run."
+                    % dataImport.getName())
+            metrics.record("import", queryRunnerDB.getTitle(),
+                           dataImport.getName(), time.time(), 0.0,
+                           status="skipped")
+
+        return True
+
+
+    def __executeSequential(self, activeDBs, dataImports):
+        numImports = len(dataImports)
+        bufferRows = self.getSystem().getConfig().getImportBufferRows()
+
+        for i, dataImport in enumerate(dataImports):
+            if len(activeDBs) > 1:
+                dataImport = MaterializedDataImport(dataImport, bufferRows)
+
+            try:
+                for queryRunnerDB in activeDBs:
+                    log = self.getLog(queryRunnerDB)
+                    db = self.getSystem().getConnectionManager().open(
+                          **queryRunnerDB.getConnectionParameters())
+
+                    log.info("Executing data import %(num)i of %(total)i: %(query)s."
+                             % {"num"  : i + 1,
+                                "total": numImports,
+                                "query": dataImport.getName()})
+
+                    self.__importData(queryRunnerDB, db, dataImport,
+                                      dataImport.getName())
+            finally:
+                if isinstance(dataImport, MaterializedDataImport):
+                    dataImport.close()
 
+
+    def __executePipelined(self, activeDBs, dataImports, maxWorkers):
+        self.__error = None
+        self.__pipelines = [DataImportPipeline(dataImport, len(activeDBs))
+                            for dataImport in dataImports]
+
+        # One writer per database, listed first so that every writer has its
+        # own thread; the remaining threads read the data imports in order.
+        work = [(self.__writeDatabase, (i, queryRunnerDB))
+                for i, queryRunnerDB in enumerate(activeDBs)]
+        work.extend((self.__read, pipeline) for pipeline in self.__pipelines)
+
+        pool = self.createThreadPool(len(activeDBs) + maxWorkers)
+        try:
+            pool.map(lambda (func, item): func(item), work)
+        except DataImportCancelledError:
+            if self.__error is None:
+                raise
+        finally:
+            self.__cancel()
+
+        # Reports the error which caused the other imports to be cancelled,
+        # rather than one of the cancellations.
+        if self.__error:
+            excType, excValue, excTraceback = self.__error
+            raise excType, excValue, excTraceback
+
+
+    def __read(self, pipeline):
+        try:
+            pipeline.read()
+        except DataImportCancelledError:
+            pass
+        except:
+            self.__fail(sys.exc_info())
+            raise
+
+
+    def __writeDatabase(self, (dbIndex, queryRunnerDB)):
+        log = self.getLog(queryRunnerDB)
+        numImports = len(self.__pipelines)
+        db = self.getSystem().getConnectionManager().open(
+              **queryRunnerDB.getConnectionParameters())
+
+        for i, pipeline in enumerate(self.__pipelines):
+            log.info("Executing data import %(num)i of %(total)i: %(query)s."
+                     % {"num"  : i + 1,
+                        "total": numImports,
+                        "query": pipeline.getName()})
+
+            try:
+                self.__importData(queryRunnerDB, db,
+                                  pipeline.getConsumer(dbIndex),
+                                  pipeline.getName())
+            except DataImportCancelledError:
+                log.warning("Cancelled due to an error in another data import.")
+                raise
+            except:
+                self.__fail(sys.exc_info())
+                raise
+            finally:
+                # The reader would otherwise wait for any rows the import
+                # did not read.
+                pipeline.release(dbIndex)
+
+
+    def __importData(self, queryRunnerDB, db, dataImport, name):
+        metrics = self.getSystem().getMetricsRecorder()
+        profiler = self.getSystem().getProfiler()
+        fingerprints = self.getSystem().getQueryFingerprints()
+        fingerprint = fingerprints.getImportFingerprint(queryRunnerDB,
+                                                        dataImport)
+        # Forgets the last fingerprint first, since a failed import can leave
+        # the table half replaced.
+        fingerprints.record("import", queryRunnerDB.getTitle(), name, None)
+        fingerprints.markTableChanged(queryRunnerDB.getTitle(),
+                                      dataImport.getDestination())
+        started = time.time()
+        try:
+            with profiler.profileImport(self.__class__.__name__,
+                                        queryRunnerDB.getTitle(), name):
                 db.importData(dataImport)
+        except Exception as e:
+            metrics.record("import", queryRunnerDB.getTitle(), name, started,
+                           time.time() - started, status="error", error=str(e))
+            raise
+
+        metrics.record("import", queryRunnerDB.getTitle(), name, started,
+                       time.time() - started)
+        fingerprints.record("import", queryRunnerDB.getTitle(), name,
+                            fingerprint)
+
+
+    def __fail(self, excInfo):
+        with self.__errorLock:
+            if self.__error is None:
+                self.__error = excInfo
+
+        self.__cancel()
+
+
+    def __cancel(self):
+        for pipeline in self.__pipelines:
+            pipeline.cancel()
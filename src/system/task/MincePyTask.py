@@ -1,50 +1,269 @@
+# core
+import os
+import threading
+import time
+
 # MincePy
 from system.task.AbstractTask import AbstractTask
+from system.task.QueryGraph import QueryGraph
+from database.CountingCursor import CountingCursor
 from database.query.CurrentDatabaseTitleFeatureProvider import CurrentDatabaseTitleFeatureProvider
 from database.query.CurrentDatabaseFeatureProvider import CurrentDatabaseFeatureProvider
 
 class MincePyTask(AbstractTask):
     '''
-    Runs a generic set of queries against all active databases.
-    
+    Runs a generic set of queries against all active databases. Up to
+    :meth:`.Config.getMaxWorkers` databases are processed at the same time, each
+    on its own connection; the first error cancels the remaining databases.
+
+    Queries run in their configured order unless they declare dependencies on
+    other queries, in which case up to :meth:`.Config.getMaxQueryWorkers`
+    independent queries run at the same time against databases which support
+    concurrent queries.
+
+    In incremental runs (see :class:`.QueryFingerprints`), a query is skipped
+    if its fingerprint matches its last successful run against the database,
+    unless the database is new, a data import it refers to was imported again,
+    its output file is missing, or a query it depends on ran and changed the
+    database. Queries writing to a reporting table always run, since its rows
+    are replaced or appended to by every run.
+
     :param system: reference to the system instance
     :type system: :class:`.System`
     :param queries: list of queries to execute
     :type queries: list of :class:`.Query`
+    :raises: :exc:`.ConfigError` if the query dependencies are invalid
     '''
-    
+
     def __init__(self, system, queries):
         super(MincePyTask, self).__init__(system)
         self.__queries = queries
-    
-    
+        self.__queryGraph = QueryGraph(queries)
+        self.__pool = None
+        # Output handlers and reporting tables are shared by every database, so
+        # only one database writes its output at a time.
+        self.__outputLock = threading.RLock()
+
+
     def execute(self):
         '''
         See :meth:`.AbstractTask.execute`.
         '''
-        activeDBs = self.getSystem().getConfig().getActiveDBs()
-        numQueries = len(self.__queries)
-        
-        for queryRunnerDB in activeDBs:
-            log = self.getLog(queryRunnerDB)
-            
-            db = self.getSystem().getConnectionManager().open(
-                    **queryRunnerDB.getConnectionParameters())
-            
-            queryFeatureProviders = [
-                CurrentDatabaseTitleFeatureProvider(queryRunnerDB.getTitle()),
-                CurrentDatabaseFeatureProvider(db)]
-
-            for i, query in enumerate(self.__queries):
-                log.info("Executing query %(num)i of %(total)i: %(query)s."
-                         % {"num"  : i + 1,
-                            "total": numQueries,
-                            "query": query.getTitle()})
-
-                for sql in query.getPreparedQueries(queryFeatureProviders):
-                    outputHandler = query.getOutputHandler()
-                    if outputHandler:
-                        output = db.query(sql)
-                        outputHandler.handle(queryRunnerDB.getTitle(), output)
-                    else:
-                        db.execute(sql)
+        config = self.getSystem().getConfig()
+        activeDBs = config.getActiveDBs()
+
+        self.__pool = self.createThreadPool(config.getMaxWorkers())
+
+        try:
+            self.__pool.map(self.__processDatabase, activeDBs)
+        finally:
+            self.getSystem().getQueryFingerprints().save()
+
+        self.getSystem().getRunHistory().save(
+                self.getSystem().getMetricsRecorder().getRunId())
+
+
+    def __getMaxQueryWorkers(self, queryRunnerDB, db):
+        maxQueryWorkers = self.getSystem().getConfig().getMaxQueryWorkers()
+        if maxQueryWorkers <= 1 or not self.__queryGraph.hasExplicitDependencies():
+            return 1
+
+        if not db.supportsConcurrentQueries():
+            self.getLog(queryRunnerDB).info(
+                    "Running queries one at a time: database does not support "
+                    "concurrent queries.")
+            return 1
+
+        return maxQueryWorkers
+
+
+    def __processDatabase(self, queryRunnerDB):
+        with self.getSystem().getProfiler().profileScope(
+                self.__class__.__name__, queryRunnerDB.getTitle()):
+            self.__processQueries(queryRunnerDB)
+
+
+    def __processQueries(self, queryRunnerDB):
+        db = self.getSystem().getConnectionManager().open(
+                **queryRunnerDB.getConnectionParameters())
+
+        queryPool = self.createThreadPool(
+                self.__getMaxQueryWorkers(queryRunnerDB, db),
+                name="{0}-{1}".format(self.__class__.__name__,
+                                      queryRunnerDB.getTitle()))
+
+        durations = {}
+        changed = {}
+        queryPool.map(
+                lambda i: self.__processQuery(queryRunnerDB, queryPool, i,
+                                              durations, changed),
+                range(len(self.__queries)),
+                self.__queryGraph.getDependencies())
+
+        runHistory = self.getSystem().getRunHistory()
+        for index, seconds in sorted(durations.iteritems()):
+            runHistory.record(queryRunnerDB.getTitle(),
+                              self.__queries[index].getTitle(), seconds)
+
+        if self.__queryGraph.hasExplicitDependencies():
+            criticalPath, seconds = self.__queryGraph.getCriticalPath(durations)
+            self.getLog(queryRunnerDB).info(
+                    "Critical path (%(seconds).2fs): %(path)s"
+                    % {"seconds": seconds,
+                       "path"   : " -> ".join(query.getTitle()
+                                              for query in criticalPath)})
+
+
+    def __processQuery(self, queryRunnerDB, queryPool, index, durations,
+                       changed):
+        log = self.getLog(queryRunnerDB)
+        if self.__pool.isCancelled():
+            log.warning("Cancelled due to an error in another database.")
+            queryPool.cancel()
+            return
+
+        query = self.__queries[index]
+        log.info("Executing query %(num)i of %(total)i: %(query)s."
+                 % {"num"  : index + 1,
+                    "total": len(self.__queries),
+                    "query": query.getTitle()})
+
+        # Each worker thread has its own connection to the database.
+        db = self.getSystem().getConnectionManager().open(
+                **queryRunnerDB.getConnectionParameters())
+
+        queryFeatureProviders = [
+            CurrentDatabaseTitleFeatureProvider(queryRunnerDB.getTitle()),
+            CurrentDatabaseFeatureProvider(db)]
+
+        # The queries this query depends on have all finished by now.
+        dependencyChanged = any(
+                changed.get(dependency) for dependency
+                in self.__queryGraph.getDependencies()[index])
+
+        profiler = self.getSystem().getProfiler()
+        startTime = time.time()
+        with profiler.profileScope(self.__class__.__name__,
+                                   queryRunnerDB.getTitle(), query.getTitle()):
+            if query.writesSharedOutput():
+                with self.__outputLock:
+                    ran = self.__runQuery(queryRunnerDB, db, query,
+                                          queryFeatureProviders,
+                                          dependencyChanged)
+            else:
+                ran = self.__runQuery(queryRunnerDB, db, query,
+                                      queryFeatureProviders, dependencyChanged)
+
+        if ran:
+            durations[index] = time.time() - startTime
+
+        # Only statements without an output handler change the database's own
+        # tables; reporting queries write to the reporting database.
+        changed[index] = ran and not query.getOutputHandler() \
+            and not query.writesSharedOutput()
+
+
+    def __runQuery(self, queryRunnerDB, db, query, queryFeatureProviders,
+                   dependencyChanged):
+        '''
+        :returns: whether the query ran, or was skipped as unchanged
+        :rtype: boolean
+        '''
+        metrics = self.getSystem().getMetricsRecorder()
+        started = time.time()
+        try:
+            preparedQueries = query.getPreparedQueries(queryFeatureProviders)
+        except Exception as e:
+            metrics.record("query", queryRunnerDB.getTitle(), query.getTitle(),
+                           started, time.time() - started, status="error",
+                           error=str(e))
+            raise
+
+        prepareSeconds = time.time() - started
+        fingerprints = self.getSystem().getQueryFingerprints()
+        fingerprint = None if query.writesSharedOutput() \
+            else fingerprints.getQueryFingerprint(queryRunnerDB, preparedQueries)
+        if not dependencyChanged and self.__isUnchanged(
+                queryRunnerDB, query, preparedQueries, fingerprint):
+            self.getLog(queryRunnerDB).info(
+                    "Skipping query %s: unchanged since the last run."
+                    % query.getTitle())
+            metrics.record("query", queryRunnerDB.getTitle(), query.getTitle(),
+                           started, time.time() - started,
+                           prepare_seconds=round(prepareSeconds, 6),
+                           status="skipped")
+            return False
+
+        # Forgets the last fingerprint first, since a failed query can leave
+        # the database partly changed.
+        fingerprints.record("query", queryRunnerDB.getTitle(), query.getTitle(),
+                            None)
+        for variant, sql in enumerate(preparedQueries):
+            started = time.time()
+            try:
+                rows, bytesWritten = self.__runStatement(queryRunnerDB, db,
+                                                         query, sql)
+            except Exception as e:
+                metrics.record("query", queryRunnerDB.getTitle(),
+                               query.getTitle(), started, time.time() - started,
+                               variant=variant, sql=sql,
+                               prepare_seconds=round(prepareSeconds, 6),
+                               status="error",
+                               error=str(e))
+                raise
+
+            metrics.record("query", queryRunnerDB.getTitle(), query.getTitle(),
+                           started, time.time() - started, variant=variant,
+                           sql=sql, prepare_seconds=round(prepareSeconds, 6),
+                           rows=rows,
+                           bytes_written=bytesWritten)
+
+        fingerprints.record("query", queryRunnerDB.getTitle(), query.getTitle(),
+                            fingerprint)
+        return True
+
+
+    def __isUnchanged(self, queryRunnerDB, query, preparedQueries, fingerprint):
+        fingerprints = self.getSystem().getQueryFingerprints()
+        if queryRunnerDB.isNew() or not fingerprints.isUnchanged(
+                "query", queryRunnerDB.getTitle(), query.getTitle(),
+                fingerprint):
+            return False
+
+        if fingerprints.getChangedTables(queryRunnerDB.getTitle(),
+                                         preparedQueries):
+            return False
+
+        outputHandler = query.getOutputHandler()
+        outputPath = outputHandler.getOutputPath() if outputHandler else None
+        return not outputPath or os.path.exists(outputPath)
+
+
+    def __runStatement(self, queryRunnerDB, db, query, sql):
+        '''
+        :returns: the number of rows returned, or affected if the query has no
+            output handler, and the number of bytes the output handler wrote
+        :rtype: tuple of (int, int or None)
+        '''
+        outputHandler = query.getOutputHandler()
+        if not outputHandler:
+            # Drivers report -1 when the number of rows is not applicable.
+            rowCount = db.execute(sql)
+            return rowCount if rowCount >= 0 else None, None
+
+        output = CountingCursor(db.query(sql, stream=query.isStreamed()))
+        outputPath = outputHandler.getOutputPath()
+        with self.__outputLock:
+            sizeBefore = self.__getFileSize(outputPath)
+            outputHandler.handle(queryRunnerDB.getTitle(), output)
+            bytesWritten = self.__getFileSize(outputPath) - sizeBefore \
+                if outputPath else None
+
+        return output.getRowCount(), bytesWritten
+
+
+    def __getFileSize(self, path):
+        if path and os.path.isfile(path):
+            return os.path.getsize(path)
+
+        return 0
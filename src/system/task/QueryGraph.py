@@ -0,0 +1,120 @@
+# MincePy
+from system.config.ConfigError import ConfigError
+
+class QueryGraph(object):
+    '''
+    The dependency graph of a set of queries. A query which declares its
+    dependencies (see :meth:`.Query.getDependencies`) can run as soon as those
+    queries have finished; a query which does not declare any dependencies
+    waits for every query before it in the configured order, which preserves
+    the original sequential behaviour.
+
+    :param queries: the queries, in configured order
+    :type queries: list of :class:`.Query`
+    :raises: :exc:`.ConfigError` if a query depends on an unknown query or the
+        dependencies contain a cycle
+    '''
+
+    def __init__(self, queries):
+        self.__queries = queries
+        self.__dependencies = {}
+        self.__order = []
+        self.__explicit = False
+
+        indexes = dict((query.getTitle(), i) for i, query in enumerate(queries))
+        for i, query in enumerate(queries):
+            declared = query.getDependencies()
+            if declared is None:
+                self.__dependencies[i] = range(i)
+                continue
+
+            self.__explicit = True
+            self.__dependencies[i] = []
+            for title in declared:
+                if title not in indexes:
+                    raise ConfigError(
+                            "Query '{0}' depends on unknown query '{1}'.".format(
+                                    query.getTitle(), title))
+
+                self.__dependencies[i].append(indexes[title])
+
+        self.__sort()
+
+
+    def __sort(self):
+        visiting = set()
+        visited = set()
+
+        def visit(i, path):
+            if i in visited:
+                return
+            if i in visiting:
+                cycle = path[path.index(i):] + [i]
+                raise ConfigError("Query dependencies contain a cycle: {0}".format(
+                        " -> ".join(self.__queries[j].getTitle() for j in cycle)))
+
+            visiting.add(i)
+            for dependency in self.__dependencies[i]:
+                visit(dependency, path + [i])
+            visiting.remove(i)
+            visited.add(i)
+            self.__order.append(i)
+
+        for i in range(len(self.__queries)):
+            visit(i, [])
+
+
+    def hasExplicitDependencies(self):
+        '''
+        :returns: whether any query declares its own dependencies; if not, the
+            queries can only run one at a time in their configured order
+        :rtype: boolean
+        '''
+        return self.__explicit
+
+
+    def getDependencies(self):
+        '''
+        :returns: the indexes of the queries each query must wait for, by query
+            index - suitable for :meth:`.ThreadPool.map`
+        :rtype: dict of int to list of int
+        '''
+        return self.__dependencies
+
+
+    def getCriticalPath(self, durations):
+        '''
+        Finds the chain of dependent queries which took the longest to run,
+        which is the lower bound on the run time no matter how many queries are
+        run at once.
+
+        :param durations: the number of seconds each query took, by query index;
+            queries which did not run can be left out
+        :type durations: dict of int to float
+        :returns: the queries on the critical path in the order they ran, and
+            the total number of seconds they took
+        :rtype: tuple of (list of :class:`.Query`, float)
+        '''
+        finish = {}
+        previous = {}
+        for i in self.__order:
+            start = 0.0
+            previous[i] = None
+            for dependency in self.__dependencies[i]:
+                if finish[dependency] > start:
+                    start = finish[dependency]
+                    previous[i] = dependency
+
+            finish[i] = start + durations.get(i, 0.0)
+
+        if not finish:
+            return [], 0.0
+
+        last = max(finish, key=finish.get)
+        path = []
+        i = last
+        while i is not None:
+            path.append(self.__queries[i])
+            i = previous[i]
+
+        return list(reversed(path)), finish[last]
@@ -6,3 +6,12 @@ class AbstractOutputHandler(object):
     
     def handle(self, dbTitle, output):
         raise NotImplementedError
+    
+    
+    def getOutputPath(self):
+        '''
+        :returns: the file the output handler writes to, if any, for measuring
+            how much it writes
+        :rtype: str or None
+        '''
+        return None
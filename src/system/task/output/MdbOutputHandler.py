@@ -58,16 +58,15 @@ class MdbOutputHandler(AbstractOutputHandler):
         sql = "INSERT INTO {0} ({1}) VALUES ({2})".format(
                 self.__outputTable, ",".join(fields), ",".join("?" * len(fields)))
         
-        batch = []
-        for i, row in enumerate(output):
+        for batch in output.iterBatches():
             if self.__db_title_column:
-                row.insert(0, dbTitle)
+                batch = [[dbTitle] + list(row) for row in batch]
                 
-            batch.append(row)
-            if i % 10000 == 0:
-                if batch:
-                    db.executeMany(sql, batch)
-                    batch = []
-
-        if batch:
             db.executeMany(sql, batch)
+
+
+    def getOutputPath(self):
+        '''
+        See :meth:`.AbstractOutputHandler.getOutputPath`.
+        '''
+        return self.__outputDBPath
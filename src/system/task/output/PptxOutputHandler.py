@@ -52,3 +52,10 @@ class PptxOutputHandler(AbstractOutputHandler):
         textFrame.word_wrap = True
         textFrame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
         ppt.save(self.__outputPath)
+
+
+    def getOutputPath(self):
+        '''
+        See :meth:`.AbstractOutputHandler.getOutputPath`.
+        '''
+        return self.__outputPath
@@ -44,8 +44,11 @@ class XlsOutputHandler(AbstractOutputHandler):
         if self.__header:
             ws.append(output.getColumns())
             
-        for row in output:
-            ws.append((value for value in row))
+        for batch in output.iterBatches():
+            for row in batch:
+                # Rows may be pyodbc.Row objects, which openpyxl does not
+                # accept.
+                ws.append(list(row))
 
         wb.save(self.__outputPath)
         
@@ -70,12 +73,16 @@ class XlsOutputHandler(AbstractOutputHandler):
                 cells.Value = colNames
                 currentRowIndex += 1
             
-            for row in output:
+            # Writes each batch of rows in one call, which is much faster than
+            # writing one row at a time through COM.
+            numCols = len(output.getColumns())
+            for batch in output.iterBatches():
                 cells = ws.Range(
                     ws.Cells(currentRowIndex, firstColIndex),
-                    ws.Cells(currentRowIndex, firstColIndex + len(row) - 1))
-                cells.Value = row
-                currentRowIndex += 1
+                    ws.Cells(currentRowIndex + len(batch) - 1,
+                             firstColIndex + numCols - 1))
+                cells.Value = [tuple(row) for row in batch]
+                currentRowIndex += len(batch)
 
             excel.CalculateFull()
         except Exception as e:
@@ -95,3 +102,10 @@ class XlsOutputHandler(AbstractOutputHandler):
             self.__writeExisting(output)
         else:
             self.__writeNew(output)
+
+
+    def getOutputPath(self):
+        '''
+        See :meth:`.AbstractOutputHandler.getOutputPath`.
+        '''
+        return self.__outputPath
@@ -0,0 +1,87 @@
+# core
+import logging
+import threading
+import Queue
+
+class BackgroundFileHandler(logging.FileHandler):
+    '''
+    A :class:`logging.FileHandler` which formats and writes log records in a
+    background thread, so that the threads doing the logging do not wait for
+    the disk. Records are queued in the order they are logged; :meth:`flush`
+    waits for the queue to be written, and :meth:`close` writes any remaining
+    records before closing the file.
+
+    Takes the same arguments as :class:`logging.FileHandler`, and can be used
+    in the logging configuration in the same way.
+
+    :param queueSize: optional - the maximum number of records waiting to be
+        written; logging blocks when the queue is full. Unlimited if 0
+    :type queueSize: int
+    '''
+
+    def __init__(self, filename, mode="a", encoding=None, delay=False,
+                 queueSize=10000):
+        logging.FileHandler.__init__(self, filename, mode, encoding, delay)
+        self.__queue = Queue.Queue(queueSize)
+        self.__closed = False
+        self.__writer = threading.Thread(target=self.__write,
+                                         name="BackgroundFileHandler")
+        self.__writer.daemon = True
+        self.__writer.start()
+
+
+    def __write(self):
+        while True:
+            record = self.__queue.get()
+            try:
+                if record is None:
+                    return
+
+                logging.FileHandler.emit(self, record)
+            finally:
+                self.__queue.task_done()
+
+
+    def emit(self, record):
+        '''
+        Queues a record to be written.
+
+        :param record: the record to write
+        :type record: :class:`logging.LogRecord`
+        '''
+        if self.__closed:
+            logging.FileHandler.emit(self, record)
+        else:
+            self.__queue.put(record)
+
+
+    def flush(self):
+        '''
+        Waits for the queued records to be written, then flushes the file.
+        '''
+        # The file is also flushed after each record is written, by the
+        # background thread. It must neither wait for itself nor take the
+        # handler's lock: a thread logging while the queue is full holds the
+        # lock until the background thread has made room.
+        if threading.current_thread() is self.__writer:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+            return
+
+        if not self.__closed:
+            self.__queue.join()
+
+        logging.FileHandler.flush(self)
+
+
+    def close(self):
+        '''
+        Writes the queued records, stops the background thread and closes the
+        file.
+        '''
+        if not self.__closed:
+            self.__closed = True
+            self.__queue.put(None)
+            self.__writer.join()
+
+        logging.FileHandler.close(self)
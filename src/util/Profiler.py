@@ -0,0 +1,320 @@
+# core
+import cProfile
+import logging
+import os
+import pstats
+import re
+import StringIO
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+class Profiler(object):
+    '''
+    Profiles the tasks, databases or queries selected on the command line, and
+    writes the results to the log directory.
+
+    Two profilers are available:
+        cprofile - Python's deterministic profiler: writes a .pstats file for
+                   each profile, which can be loaded with :mod:`pstats` or a
+                   viewer such as SnakeViz, and a summary of the top functions
+        sampling - samples the call stacks of the profiled threads at a fixed
+                   interval, which adds much less overhead: writes the top
+                   functions and a .folded file of call stacks for flame graphs
+
+    By default each task is profiled as a whole. If a database or query title
+    is given, only the matching databases or queries are profiled, each
+    separately. Data imports are not run within a database, so if only a
+    database title is given, each data import into it is profiled. cProfile
+    only profiles the thread it was started in, so with several workers,
+    whole tasks are best profiled with the sampling profiler, which samples
+    every thread.
+
+    :param outputDir: optional - the directory to write profiles to; nothing is
+        profiled if None
+    :type outputDir: str
+    :param mode: optional - "cprofile" or "sampling"
+    :type mode: str
+    :param top: optional - the number of functions to list in each summary
+    :type top: int
+    :param dbTitle: optional - only profile the database with this title
+    :type dbTitle: str
+    :param queryTitle: optional - only profile the query or data import with
+        this title
+    :type queryTitle: str
+    :param interval: optional - the number of seconds between samples, for the
+        sampling profiler
+    :type interval: float
+    :raises: :exc:`ValueError` if the mode is not supported
+    '''
+
+    MODES = ("cprofile", "sampling")
+
+    def __init__(self, outputDir=None, mode="cprofile", top=30, dbTitle=None,
+                 queryTitle=None, interval=0.005):
+        if mode not in Profiler.MODES:
+            raise ValueError("Unsupported profiler '{0}': expected one of {1}"
+                             .format(mode, ", ".join(Profiler.MODES)))
+
+        self.__outputDir = outputDir
+        self.__mode = mode
+        self.__top = top
+        self.__dbTitle = dbTitle
+        self.__queryTitle = queryTitle
+        self.__interval = interval
+        self.__names = set()
+        self.__lock = threading.Lock()
+        self.__log = logging.getLogger("app.%s" % self.__class__.__name__)
+
+
+    def isEnabled(self):
+        '''
+        :returns: whether anything is being profiled
+        :rtype: boolean
+        '''
+        return self.__outputDir is not None
+
+
+    def isScoped(self):
+        '''
+        :returns: whether only selected databases or queries are profiled,
+            rather than whole tasks
+        :rtype: boolean
+        '''
+        return self.__dbTitle is not None or self.__queryTitle is not None
+
+
+    @contextmanager
+    def profileTask(self, taskName):
+        '''
+        Context manager which profiles a whole task, unless only selected
+        databases or queries are being profiled.
+
+        :param taskName: the name of the task
+        :type taskName: str
+        '''
+        if not self.isEnabled() or self.isScoped():
+            yield
+            return
+
+        with self.__profile(taskName, allThreads=True):
+            yield
+
+
+    @contextmanager
+    def profileScope(self, taskName, dbTitle, queryTitle=None):
+        '''
+        Context manager which profiles the processing of a database, or of a
+        query or data import against a database, if it was selected.
+        Databases are only profiled as a whole if no query was selected.
+
+        :param taskName: the name of the task
+        :type taskName: str
+        :param dbTitle: the title of the database
+        :type dbTitle: str
+        :param queryTitle: optional - the title of the query or data import
+        :type queryTitle: str
+        '''
+        with self.__profileIf(self.__matches(dbTitle, queryTitle), taskName,
+                              dbTitle, queryTitle):
+            yield
+
+
+    @contextmanager
+    def profileImport(self, taskName, dbTitle, importTitle):
+        '''
+        Context manager which profiles a data import against a database, if
+        the data import was selected, or if only the database was.
+
+        :param taskName: the name of the task
+        :type taskName: str
+        :param dbTitle: the title of the database
+        :type dbTitle: str
+        :param importTitle: the title of the data import
+        :type importTitle: str
+        '''
+        selected = self.__matches(dbTitle, importTitle) \
+            or (self.__queryTitle is None and self.__matches(dbTitle, None))
+        with self.__profileIf(selected, taskName, dbTitle, importTitle):
+            yield
+
+
+    @contextmanager
+    def __profileIf(self, selected, taskName, dbTitle, queryTitle):
+        if not selected:
+            yield
+            return
+
+        name = ".".join(part for part in (taskName, dbTitle, queryTitle)
+                        if part)
+        with self.__profile(name, allThreads=False):
+            yield
+
+
+    def __matches(self, dbTitle, queryTitle):
+        if not self.isEnabled() or not self.isScoped():
+            return False
+
+        if self.__dbTitle is not None and dbTitle != self.__dbTitle:
+            return False
+
+        if self.__queryTitle is None:
+            return queryTitle is None
+
+        return queryTitle == self.__queryTitle
+
+
+    def __getBasePath(self, name):
+        # Names are made unique, i.e. for a query which is profiled once for
+        # each database.
+        baseName = "profile_" + re.sub(r"[^\w.-]+", "_", name)
+        with self.__lock:
+            uniqueName = baseName
+            count = 1
+            while uniqueName in self.__names:
+                count += 1
+                uniqueName = "{0}_{1}".format(baseName, count)
+            self.__names.add(uniqueName)
+
+        if not os.path.exists(self.__outputDir):
+            os.makedirs(self.__outputDir)
+
+        return os.path.join(self.__outputDir, uniqueName)
+
+
+    @contextmanager
+    def __profile(self, name, allThreads):
+        if self.__mode == "sampling":
+            profiler = _Sampler(self.__interval, allThreads)
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        started = time.time()
+        try:
+            yield
+        finally:
+            if self.__mode == "sampling":
+                profiler.stop()
+            else:
+                profiler.disable()
+
+            try:
+                self.__write(name, profiler, time.time() - started)
+            except Exception as e:
+                self.__log.warning("Error writing profile '%s': %s", name, e)
+
+
+    def __write(self, name, profiler, seconds):
+        basePath = self.__getBasePath(name)
+        if isinstance(profiler, _Sampler):
+            summary = profiler.getSummary(self.__top)
+            profiler.writeFolded(basePath + ".folded")
+        else:
+            statsPath = basePath + ".pstats"
+            profiler.dump_stats(statsPath)
+
+            output = StringIO.StringIO()
+            stats = pstats.Stats(statsPath, stream=output)
+            stats.sort_stats("cumulative").print_stats(self.__top)
+            summary = output.getvalue()
+
+        summaryPath = basePath + ".txt"
+        with open(summaryPath, "w") as outFile:
+            outFile.write(summary)
+
+        self.__log.info("Profiled %s (%.2fs): %s\n%s", name, seconds,
+                        summaryPath, summary)
+
+
+class _Sampler(object):
+    '''
+    Samples the call stacks of the thread which started it, or of every
+    thread, in a background thread.
+    '''
+
+    def __init__(self, interval, allThreads):
+        self.__interval = interval
+        self.__threadId = None if allThreads \
+            else threading.current_thread().ident
+        self.__stacks = {}
+        self.__numSamples = 0
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name="Profiler")
+        self.__thread.daemon = True
+
+
+    def start(self):
+        self.__thread.start()
+
+
+    def stop(self):
+        self.__stopped.set()
+        self.__thread.join()
+
+
+    def __run(self):
+        ownThreadId = threading.current_thread().ident
+        while not self.__stopped.wait(self.__interval):
+            for threadId, frame in sys._current_frames().items():
+                if threadId == ownThreadId or (
+                        self.__threadId is not None
+                        and threadId != self.__threadId):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno,
+                                  code.co_name))
+                    frame = frame.f_back
+
+                stack = tuple(reversed(stack))
+                self.__stacks[stack] = self.__stacks.get(stack, 0) + 1
+                self.__numSamples += 1
+
+
+    def __formatFunction(self, function):
+        filename, line, name = function
+        return "{0}:{1}({2})".format(os.path.basename(filename), line, name)
+
+
+    def getSummary(self, top):
+        '''
+        :returns: the functions most often on the stack (total) and at the top
+            of it (self), with the share of the samples they appear in
+        :rtype: str
+        '''
+        selfCounts = {}
+        totalCounts = {}
+        for stack, count in self.__stacks.iteritems():
+            selfCounts[stack[-1]] = selfCounts.get(stack[-1], 0) + count
+            for function in set(stack):
+                totalCounts[function] = totalCounts.get(function, 0) + count
+
+        lines = ["{0} samples".format(self.__numSamples)]
+        for title, counts in (("Total", totalCounts), ("Self", selfCounts)):
+            lines.append("")
+            lines.append("{0:>7}  {1}".format(title, "function"))
+            for function, count in sorted(counts.iteritems(),
+                                          key=lambda item: -item[1])[:top]:
+                lines.append("{0:>6.1%}  {1}".format(
+                        float(count) / max(self.__numSamples, 1),
+                        self.__formatFunction(function)))
+
+        return "\n".join(lines) + "\n"
+
+
+    def writeFolded(self, path):
+        '''
+        Writes the sampled stacks in the folded format read by flame graph
+        tools: one line per stack, with its functions separated by semicolons,
+        followed by its number of samples.
+        '''
+        with open(path, "w") as outFile:
+            for stack, count in sorted(self.__stacks.iteritems()):
+                outFile.write("{0} {1}\n".format(
+                        ";".join(self.__formatFunction(function)
+                                 for function in stack), count))
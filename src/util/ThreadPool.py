@@ -0,0 +1,245 @@
+# core
+import sys
+import heapq
+import threading
+
+class ThreadPool(object):
+    '''
+    Runs a function over a list of work items using a fixed number of worker
+    threads. The first error raised by a worker cancels any work items which
+    have not started yet, and is re-raised in the calling thread once all of
+    the workers have stopped. Work items which are already running are left to
+    finish, but can poll :meth:`isCancelled` to stop early.
+
+    A pool with a single worker processes the work items in the calling thread.
+
+    :param maxWorkers: the maximum number of worker threads to run at once
+    :type maxWorkers: int
+    :param name: optional - prefix for the names of the worker threads
+    :type name: str
+    :param initializer: optional - function called by each worker thread when
+        it starts, i.e. to set up thread-local resources
+    :type initializer: function
+    :param finalizer: optional - function called by each worker thread just
+        before it exits, i.e. to release thread-local resources
+    :type finalizer: function
+    '''
+
+    def __init__(self, maxWorkers, name=None, initializer=None, finalizer=None):
+        self.__maxWorkers = max(1, int(maxWorkers or 1))
+        self.__name = name or self.__class__.__name__
+        self.__initializer = initializer
+        self.__finalizer = finalizer
+        self.__cancelled = threading.Event()
+        self.__lock = threading.Lock()
+        self.__error = None
+
+
+    def __work(self, func, items, results, graph):
+        try:
+            if self.__initializer:
+                self.__initializer()
+
+            while True:
+                i = graph.take()
+                if i is None:
+                    return
+
+                try:
+                    results[i] = func(items[i])
+                except:
+                    self.__fail(sys.exc_info(), graph)
+                finally:
+                    graph.complete(i)
+        except:
+            self.__fail(sys.exc_info(), graph)
+        finally:
+            if self.__finalizer:
+                self.__finalizer()
+
+
+    def __fail(self, excInfo, graph=None):
+        with self.__lock:
+            if self.__error is None:
+                self.__error = excInfo
+
+        self.cancel()
+        if graph:
+            graph.wake()
+
+
+    def getMaxWorkers(self):
+        '''
+        :returns: the maximum number of worker threads run at once
+        :rtype: int
+        '''
+        return self.__maxWorkers
+
+
+    def isCancelled(self):
+        '''
+        :returns: whether the current :meth:`map` has been cancelled, either by
+            a worker raising an error or by a call to :meth:`cancel`
+        :rtype: boolean
+        '''
+        return self.__cancelled.is_set()
+
+
+    def cancel(self):
+        '''
+        Requests that the current :meth:`map` stops handing out work items.
+        '''
+        self.__cancelled.set()
+
+
+    def map(self, func, items, dependencies=None):
+        '''
+        Calls a function once for each work item, spreading the calls over the
+        pool's worker threads. Work items start in the order given, except that
+        a work item never starts before the work items it depends on have
+        finished.
+
+        :param func: the function to call with each work item
+        :type func: function
+        :param items: the work items
+        :type items: iterable
+        :param dependencies: optional - the indexes of the work items which
+            must finish before each work item can start, by work item index
+        :type dependencies: dict of int to list of int
+        :returns: the value returned by each call, in the same order as the
+            work items
+        :rtype: list
+        :raises: :exc:`ValueError` if the dependencies contain a cycle
+        '''
+        items = list(items)
+        results = [None] * len(items)
+        graph = _WorkGraph(len(items), dependencies or {}, self.isCancelled)
+        self.__cancelled.clear()
+        self.__error = None
+
+        numWorkers = min(self.__maxWorkers, len(items))
+        if numWorkers <= 1:
+            for i in graph.getOrder():
+                if self.isCancelled():
+                    break
+                results[i] = func(items[i])
+
+            return results
+
+        workers = []
+        for n in range(numWorkers):
+            worker = threading.Thread(target=self.__work,
+                                      args=(func, items, results, graph),
+                                      name="{0}-{1}".format(self.__name, n + 1))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        # Joins with a timeout so that the calling thread stays responsive to
+        # KeyboardInterrupt.
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(0.5)
+
+        if self.__error:
+            excType, excValue, excTraceback = self.__error
+            raise excType, excValue, excTraceback
+
+        return results
+
+
+class _WorkGraph(object):
+    '''
+    Tracks which of a :class:`.ThreadPool`'s work items are ready to start.
+    
+    :param numItems: the number of work items
+    :type numItems: int
+    :param dependencies: the indexes of the work items which must finish before
+        each work item can start, by work item index
+    :type dependencies: dict of int to list of int
+    :param isCancelled: function returning whether to stop handing out work
+    :type isCancelled: function
+    '''
+    
+    def __init__(self, numItems, dependencies, isCancelled):
+        self.__isCancelled = isCancelled
+        self.__condition = threading.Condition()
+        self.__waitingOn = [set(dependencies.get(i, ())) for i in range(numItems)]
+        self.__dependents = [[] for _ in range(numItems)]
+        for i, waitingOn in enumerate(self.__waitingOn):
+            for dependency in waitingOn:
+                self.__dependents[dependency].append(i)
+        
+        self.__order = self.__sort()
+        self.__ready = [i for i in range(numItems) if not self.__waitingOn[i]]
+        self.__notStarted = numItems
+        
+    
+    def __sort(self):
+        waitingOn = [set(deps) for deps in self.__waitingOn]
+        ready = [i for i, deps in enumerate(waitingOn) if not deps]
+        order = []
+        while ready:
+            i = heapq.heappop(ready)
+            order.append(i)
+            for dependent in self.__dependents[i]:
+                waitingOn[dependent].discard(i)
+                if not waitingOn[dependent]:
+                    heapq.heappush(ready, dependent)
+
+        if len(order) != len(waitingOn):
+            raise ValueError("Work item dependencies contain a cycle.")
+        
+        return order
+    
+    
+    def getOrder(self):
+        '''
+        :returns: the indexes of the work items in an order which satisfies
+            their dependencies, keeping the original order where possible
+        :rtype: list of int
+        '''
+        return self.__order
+    
+    
+    def take(self):
+        '''
+        Waits for a work item to become ready and marks it as started.
+        
+        :returns: the index of the work item to run, or None if there is no
+            more work to hand out
+        :rtype: int
+        '''
+        with self.__condition:
+            while not self.__isCancelled() and self.__notStarted:
+                if self.__ready:
+                    self.__notStarted -= 1
+                    return heapq.heappop(self.__ready)
+
+                self.__condition.wait()
+            
+            return None
+    
+    
+    def complete(self, i):
+        '''
+        Marks a work item as finished, releasing any work items waiting on it.
+        
+        :param i: the index of the finished work item
+        :type i: int
+        '''
+        with self.__condition:
+            for dependent in self.__dependents[i]:
+                self.__waitingOn[dependent].discard(i)
+                if not self.__waitingOn[dependent]:
+                    heapq.heappush(self.__ready, dependent)
+            
+            self.__condition.notify_all()
+    
+    
+    def wake(self):
+        '''
+        Wakes any threads waiting for work, i.e. after cancellation.
+        '''
+        with self.__condition:
+            self.__condition.notify_all()
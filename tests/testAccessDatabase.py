@@ -0,0 +1,167 @@
+'''
+Checks when :class:`.AccessDatabase` opens, commits, rolls back and closes
+its ODBC connection, with and without a persistent connection. The ODBC
+driver is replaced by a fake, but pyodbc and the Windows COM modules must be
+installed for AccessDatabase to be imported.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+try:
+    from database import AccessDatabase as accessDatabaseModule
+    from database.query.QueryError import QueryError
+except ImportError:
+    accessDatabaseModule = None
+
+
+class FakeError(Exception):
+    pass
+
+
+class FakeCursor(object):
+
+    rowcount = 1
+
+    def __init__(self, connection):
+        self.__connection = connection
+
+
+    def execute(self, sql, params=None):
+        self.__connection.log.append("execute")
+        if "fail" in sql:
+            raise FakeError(sql)
+        return self
+
+
+    def executemany(self, sql, params):
+        self.__connection.log.append("executemany")
+        return self
+
+
+    def tables(self, table):
+        self.__connection.log.append("tables")
+        return self
+
+
+    def fetchone(self):
+        return None
+
+
+class FakeConnection(object):
+    '''
+    Records what is done with it in the fake driver's shared log.
+    '''
+
+    def __init__(self, log):
+        self.log = log
+        self.healthy = True
+        log.append("connect")
+
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+    def commit(self):
+        self.log.append("commit")
+
+
+    def rollback(self):
+        self.log.append("rollback")
+
+
+    def close(self):
+        self.log.append("close")
+
+
+    def getinfo(self, infoType):
+        if not self.healthy:
+            raise FakeError("connection lost")
+        return "ACCESS"
+
+
+class FakePyodbc(object):
+
+    Error = FakeError
+    SQL_DBMS_NAME = 17
+
+    def __init__(self):
+        self.log = []
+        self.connections = []
+
+
+    def connect(self, connectString):
+        connection = FakeConnection(self.log)
+        self.connections.append(connection)
+        return connection
+
+
+@unittest.skipIf(accessDatabaseModule is None,
+                 "pyodbc and pywin32 are not installed")
+class AccessDatabaseConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__pyodbc = accessDatabaseModule.pyodbc
+        self.__fake = accessDatabaseModule.pyodbc = FakePyodbc()
+
+
+    def tearDown(self):
+        accessDatabaseModule.pyodbc = self.__pyodbc
+
+
+    def __runStatements(self, db):
+        db.execute("UPDATE data SET a = ?", [1])
+        db.executeMany("INSERT INTO data VALUES (?)", [[1], [2]])
+        db.hasTable("data")
+
+
+    def testConnectionClosedAfterEachStatement(self):
+        db = accessDatabaseModule.AccessDatabase("test.mdb")
+        self.assertFalse(db.isPersistent())
+        self.__runStatements(db)
+        self.assertEqual(self.__fake.log,
+                         ["connect", "execute", "commit", "close",
+                          "connect", "executemany", "commit", "close",
+                          "connect", "tables", "close"])
+
+
+    def testPersistentConnectionIsReused(self):
+        db = accessDatabaseModule.AccessDatabase("test.mdb", persistent=True)
+        self.assertTrue(db.isPersistent())
+        self.__runStatements(db)
+        db.close()
+        self.assertEqual(self.__fake.log,
+                         ["connect", "execute", "commit",
+                          "executemany", "commit", "tables", "close"])
+
+
+    def testPersistentConnectionRolledBackOnError(self):
+        db = accessDatabaseModule.AccessDatabase("test.mdb", persistent=True)
+        with self.assertRaises(QueryError):
+            db.execute("fail")
+        db.execute("UPDATE data SET a = 1")
+        self.assertEqual(self.__fake.log,
+                         ["connect", "execute", "rollback",
+                          "execute", "commit"])
+
+
+    def testHealthCheck(self):
+        db = accessDatabaseModule.AccessDatabase("test.mdb", persistent=True)
+        self.assertTrue(db.isHealthy())
+        db.execute("UPDATE data SET a = 1")
+        self.assertTrue(db.isHealthy())
+        self.__fake.connections[0].healthy = False
+        self.assertFalse(db.isHealthy())
+
+
+if __name__ == "__main__":
+    unittest.main()
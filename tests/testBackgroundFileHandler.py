@@ -0,0 +1,116 @@
+'''
+Stress tests for :class:`.BackgroundFileHandler`.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from util.BackgroundFileHandler import BackgroundFileHandler
+
+
+class BackgroundFileHandlerTest(unittest.TestCase):
+
+    # Seconds to wait for logging to finish before reporting a deadlock.
+    TIMEOUT = 60
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__path = os.path.join(self.__dir, "test.log")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __log(self, handler, numThreads, numRecords):
+        '''
+        Logs records through a logger, so that each is handled with the
+        handler's lock held, from several threads at once, then flushes and
+        closes the handler as logging.shutdown does.
+
+        :returns: the number of lines written
+        :rtype: int
+        '''
+        logger = logging.getLogger("test.%s.%d" % (self.id(), numThreads))
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+
+        def logRecords(thread):
+            for i in xrange(numRecords):
+                logger.info("thread %d record %d", thread, i)
+
+        threads = [threading.Thread(target=logRecords, args=(thread,))
+                   for thread in xrange(numThreads)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        for thread in threads:
+            thread.join(BackgroundFileHandlerTest.TIMEOUT)
+            self.assertFalse(thread.is_alive(), "logging deadlocked")
+
+        finisher = threading.Thread(target=self.__shutdown, args=(handler,))
+        finisher.daemon = True
+        finisher.start()
+        finisher.join(BackgroundFileHandlerTest.TIMEOUT)
+        self.assertFalse(finisher.is_alive(), "flushing deadlocked")
+        logger.removeHandler(handler)
+
+        with open(self.__path) as inFile:
+            return sum(1 for _ in inFile)
+
+
+    def __shutdown(self, handler):
+        handler.acquire()
+        try:
+            handler.flush()
+            handler.close()
+        finally:
+            handler.release()
+
+
+    def testFullQueueSingleThread(self):
+        handler = BackgroundFileHandler(self.__path, queueSize=2)
+        self.assertEqual(self.__log(handler, 1, 20000), 20000)
+
+
+    def testFullQueueSeveralThreads(self):
+        handler = BackgroundFileHandler(self.__path, queueSize=10)
+        self.assertEqual(self.__log(handler, 4, 20000), 80000)
+
+
+    def testDefaultQueueSeveralThreads(self):
+        handler = BackgroundFileHandler(self.__path)
+        self.assertEqual(self.__log(handler, 4, 50000), 200000)
+
+
+    def testFlushWhileLogging(self):
+        handler = BackgroundFileHandler(self.__path, queueSize=2)
+        logger = logging.getLogger("test.flush")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        for i in xrange(1000):
+            logger.info("record %d", i)
+            if i % 100 == 0:
+                handler.flush()
+
+        self.assertEqual(self.__log(handler, 1, 0), 1000)
+        logger.removeHandler(handler)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+'''
+Runs a few small cases of the benchmark suite, checking that every row is
+counted, that unavailable cases are skipped, and how results are compared.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import json
+import os
+import shutil
+import StringIO
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "..", "benchmarks")
+sys.path.insert(0, BENCHMARKS_DIR)
+
+# MincePy
+import suite
+
+
+class BenchmarkSuiteTest(unittest.TestCase):
+
+    NUM_ROWS = 200
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__output = os.path.join(self.__dir, "results.json")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __runSuite(self, cases, *options):
+        '''
+        :returns: the report, and what the suite wrote to stderr
+        :rtype: tuple of (dict, str)
+        '''
+        process = subprocess.Popen(
+                [sys.executable, os.path.join(BENCHMARKS_DIR, "suite.py"),
+                 "--sizes", str(self.NUM_ROWS), "--cases", cases,
+                 "--data-dir", os.path.join(self.__dir, "data"),
+                 "--output", self.__output] + list(options),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, errors = process.communicate()
+        self.assertEqual(process.returncode, 0, errors)
+        with open(self.__output) as inFile:
+            return json.load(inFile), errors
+
+
+    def testCasesProcessEveryRow(self):
+        cases = ["read.csv", "read.csv-variable", "read.sqlite",
+                 "import.sqlite", "import.sqlite-bulk"]
+        report, _ = self.__runSuite(",".join(cases))
+        self.assertEqual([result["case"] for result in report["results"]],
+                         cases)
+        for result in report["results"]:
+            self.assertEqual(result["status"], "ok", result)
+            self.assertEqual(result["rows"], self.NUM_ROWS)
+            self.assertGreater(result["rows_per_sec"], 0)
+
+
+    def testCasePatterns(self):
+        report, _ = self.__runSuite("import.sqlite-*")
+        self.assertEqual([result["case"] for result in report["results"]],
+                         ["import.sqlite-bulk", "import.sqlite-variable"])
+
+
+    @unittest.skipIf(sys.platform == "win32", "Access is available")
+    def testUnavailableCaseIsSkipped(self):
+        report, errors = self.__runSuite("import.access")
+        self.assertEqual(report["results"][0]["status"], "skipped")
+        self.assertIn("import.access", errors)
+
+
+    def testCompare(self):
+        previousPath = os.path.join(self.__dir, "previous.json")
+        with open(previousPath, "w") as outFile:
+            json.dump({"results": [
+                    {"case": "read.csv", "rows": 10, "rows_per_sec": 100},
+                    {"case": "read.dbf", "rows": 10, "rows_per_sec": 100},
+                    {"case": "read.xlsx", "rows": 10, "rows_per_sec": None}]},
+                      outFile)
+
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            suite._compare([{"case": "read.csv", "rows": 10,
+                             "rows_per_sec": 150},
+                            {"case": "read.dbf", "rows": 20,
+                             "rows_per_sec": 150},
+                            {"case": "read.xlsx", "rows": 10,
+                             "rows_per_sec": 150}], previousPath)
+            lines = sys.stderr.getvalue().splitlines()
+        finally:
+            sys.stderr = stderr
+
+        self.assertEqual([line.split() for line in lines],
+                         [["read.csv", "10", "rows", "+50.0%"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+'''
+Checks that :class:`.CSVDataImport` reads the same rows on a process pool,
+and through memory-mapped windows, as it does in a single buffered read, and
+how it fills in the variable columns missing from short rows.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# contrib
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# MincePy
+from database.SQLiteDatabase import SQLiteDatabase
+from dataimport.CSVDataImport import CSVDataImport
+from dataimport.DataImportError import DataImportError
+
+
+class CSVDataImportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.path = os.path.join(self.dir, "data.csv")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+    def writeFile(self, text):
+        with open(self.path, "wb") as outFile:
+            outFile.write(text)
+
+
+    def writeLines(self, lines):
+        self.writeFile("".join(line + "\n" for line in lines))
+
+
+    def createImport(self, **kwargs):
+        options = {"delimiter": ","}
+        options.update(kwargs)
+        return CSVDataImport("data", self.path, "data", **options)
+
+
+class ParallelReadTest(CSVDataImportTestCase):
+
+    NUM_ROWS = 500
+
+    def setUp(self):
+        CSVDataImportTestCase.setUp(self)
+        # Rows of different lengths, so that chunks end part-way through them.
+        self.writeLines(["a,b,c"] + ["{0},{1},{2}".format(i, "x" * (i % 7),
+                                                          i / 4.0)
+                                     for i in xrange(self.NUM_ROWS)])
+        self.__expected = list(self.createImport().getRows())
+        self.assertEqual(len(self.__expected), self.NUM_ROWS)
+
+
+    def testOrdered(self):
+        for chunkBytes in (1, 64, 1000, 10 ** 6):
+            dataImport = self.createImport(processes=3, chunkBytes=chunkBytes)
+            self.assertEqual(list(dataImport.getRows()), self.__expected,
+                             chunkBytes)
+
+
+    def testUnordered(self):
+        dataImport = self.createImport(processes=3, chunkBytes=64,
+                                       ordered=False)
+        self.assertEqual(sorted(dataImport.getRows()), self.__expected)
+
+
+    def testStartLine(self):
+        # The header is the line after those skipped.
+        dataImport = self.createImport(startLine=100, processes=3,
+                                       chunkBytes=64)
+        self.assertEqual(dataImport.getColumns(), self.__expected[99])
+        self.assertEqual(list(dataImport.getRows()), self.__expected[100:])
+
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def testFastEngine(self):
+        dataImport = self.createImport(processes=2, chunkBytes=200,
+                                       engine="fast",
+                                       types=["int", "str", "float"])
+        self.assertEqual(list(dataImport.getRows()), self.__expected)
+
+
+    def testLastLineWithoutLineBreak(self):
+        with open(self.path, "ab") as outFile:
+            outFile.write("500,,0")
+        dataImport = self.createImport(processes=3, chunkBytes=64)
+        self.assertEqual(list(dataImport.getRows()),
+                         self.__expected + [[500, "", 0]])
+
+
+    def testErrorInChunk(self):
+        with open(self.path, "ab") as outFile:
+            outFile.write("1,\0,2\n")
+        dataImport = self.createImport(processes=3, chunkBytes=64)
+        with self.assertRaises(DataImportError) as context:
+            list(dataImport.getRows())
+        self.assertIn("line contains NUL", str(context.exception))
+
+
+class MemoryMapTest(CSVDataImportTestCase):
+
+    # The smallest window which can be mapped, so that small files span
+    # several windows.
+    WINDOW_BYTES = mmap.ALLOCATIONGRANULARITY
+
+    def setUp(self):
+        CSVDataImportTestCase.setUp(self)
+        self.__windowBytes = CSVDataImport.MAP_WINDOW_BYTES
+        CSVDataImport.MAP_WINDOW_BYTES = self.WINDOW_BYTES
+        self.writeLines(["a,b,c"] + ["{0},{1},{2}".format(i, "x" * (i % 31),
+                                                          i / 4.0)
+                                     for i in xrange(2000)])
+
+
+    def tearDown(self):
+        CSVDataImport.MAP_WINDOW_BYTES = self.__windowBytes
+        CSVDataImportTestCase.tearDown(self)
+
+
+    def __checkRows(self, **kwargs):
+        expected = self.createImport(**kwargs)
+        mapped = self.createImport(memoryMap=True, **kwargs)
+        self.assertEqual(mapped.getColumns(), expected.getColumns(), kwargs)
+        self.assertEqual(list(mapped.getRows()), list(expected.getRows()),
+                         kwargs)
+
+
+    def testSkippedLinesSpanWindows(self):
+        self.assertGreater(os.path.getsize(self.path), self.WINDOW_BYTES * 5)
+        for startLine in (0, 1, 150, 151, 999, 1999, 2000):
+            self.__checkRows(startLine=startLine)
+
+
+    def testLineEndsAtWindowBoundary(self):
+        header = "a,b\n"
+        lines = [header, "1," + "x" * (self.WINDOW_BYTES - len(header) - 3)
+                 + "\n", "2,y\n"]
+        self.assertEqual(len("".join(lines[:2])), self.WINDOW_BYTES)
+        self.writeFile("".join(lines))
+        for startLine in (0, 1, 2):
+            self.__checkRows(startLine=startLine)
+
+
+    def testLineLongerThanWindow(self):
+        self.writeLines(["a,b,c", "1,2,3", "4,{0},6".format(
+                "x" * self.WINDOW_BYTES * 3), "7,8,9"])
+        for startLine in (0, 1, 2):
+            self.__checkRows(startLine=startLine)
+
+
+    def testLastLineWithoutLineBreak(self):
+        with open(self.path, "ab") as outFile:
+            outFile.write("2000,,0")
+        self.__checkRows()
+        self.__checkRows(startLine=2000)
+
+
+    def testWhitespaceDelimiter(self):
+        self.writeLines(["a b  c"] + ["{0}\t{1}  {2}".format(i, i * 2, i * 3)
+                                     for i in xrange(2000)])
+        self.__checkRows(delimiter=CSVDataImport.WHITESPACE_DELIMITER,
+                         startLine=500)
+
+
+    def testProcesses(self):
+        self.__checkRows(processes=3, chunkBytes=self.WINDOW_BYTES * 2 + 100)
+
+
+class VariableColumnsTest(CSVDataImportTestCase):
+
+    COLUMNS = ["a", "b", "c", "d"]
+
+    def __readRows(self, variableColumns, lines, **kwargs):
+        self.writeLines(lines)
+        rows = {}
+        for engine in CSVDataImport.ENGINES:
+            if engine == "fast" and numpy is None:
+                continue
+
+            dataImport = self.createImport(columns=self.COLUMNS,
+                                           variableColumns=variableColumns,
+                                           types=["int"] * 4, engine=engine,
+                                           **kwargs)
+            rows[engine] = list(dataImport.getRows())
+
+        if len(rows) > 1:
+            self.assertEqual(rows["fast"], rows["standard"])
+        return rows["standard"]
+
+
+    def testMissingValuesFillEndOfVariableColumns(self):
+        # Columns b and c are variable.
+        self.assertEqual(self.__readRows((1, 3), ["1,2,3,4", "1,2,4", "1,4",
+                                                  "4"]),
+                         [[1, 2, 3, 4], [1, 2, None, 4], [1, None, None, 4],
+                          [None, None, None, 4]])
+
+
+    def testMoreMissingThanVariableColumns(self):
+        # Only column a is variable, so rows missing more values are filled
+        # where the original inserts one value at a time put them.
+        self.assertEqual(self.__readRows((0, 1), ["0,1,2,3", "1,2,3", "0,1",
+                                                  "0", ""]),
+                         [[0, 1, 2, 3], [None, 1, 2, 3], [0, None, None, 1],
+                          [None, None, None, 0], [None] * 4])
+
+
+    def testVariableColumnsAtEnd(self):
+        self.assertEqual(self.__readRows((2, 4), ["1,2,3,4", "1,2,3", "1,2",
+                                                  "1"]),
+                         [[1, 2, 3, 4], [1, 2, 3, None], [1, 2, None, None],
+                          [1, None, None, None]])
+
+
+    def testFilledRowsImportWithTitle(self):
+        self.writeLines(["1,2,4", "4"])
+        dataImport = self.createImport(columns=self.COLUMNS,
+                                       variableColumns=(1, 3),
+                                       types=["int"] * 4,
+                                       titleColumn="source")
+        db = SQLiteDatabase(os.path.join(self.dir, "test.db"))
+        try:
+            db.importData(dataImport)
+            self.assertEqual(list(db.query("SELECT * FROM data "
+                                           "ORDER BY rowid")),
+                             [["data", 1, 2, None, 4],
+                              ["data", None, None, None, 4]])
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+'''
+Checks that the fast CSV engine produces the same rows as the standard engine.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from dataimport.CSVDataImport import CSVDataImport
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "the fast engine requires NumPy")
+class ColumnarConverterTest(unittest.TestCase):
+
+    # Fills the first block of rows converted at a time with ints, so that the
+    # values after them are converted in a block of their own.
+    LEADING_ROWS = 10000
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __assertSameRows(self, lines, **kwargs):
+        path = os.path.join(self.__dir, "test.csv")
+        with open(path, "wb") as outFile:
+            outFile.write("\n".join(lines) + "\n")
+
+        def read(engine):
+            dataImport = CSVDataImport("test", path, "test", delimiter=",",
+                                       engine=engine, **kwargs)
+            # Compared by repr, as nan is not equal to itself.
+            return [[(type(value), repr(value)) for value in row]
+                    for row in dataImport.getRows()]
+
+        standard = read("standard")
+        fast = read("fast")
+        self.assertEqual(len(standard), len(fast))
+        for i, (expected, actual) in enumerate(zip(standard, fast)):
+            self.assertEqual(expected, actual, "row {0}: {1} != {2}".format(
+                    i, expected, actual))
+
+
+    def __withLeadingInts(self, values):
+        return (["a,b"]
+                + ["{0},{0}".format(i)
+                   for i in xrange(ColumnarConverterTest.LEADING_ROWS)]
+                + ["{0},1".format(value) for value in values])
+
+
+    def testValuesNumPyMisparses(self):
+        for values in (['"1,2"', "a"], ["1_0"], ["-"], ["+"], ["."], ["1e"],
+                       ["1.5.5"], ["0x10"], ["1 2"], [""], [" "], ["1", ""],
+                       ['"1,2"', "3.5"], ["nan", "-inf", "Infinity"],
+                       ["1e3", " 7 "], ["- 5"], ["99999999999999999999"],
+                       ["007", "+5", "-0"], ["2.0", "2", "2e0"], ["1e500"],
+                       ["9" * 18, "-" + "9" * 18], ["9" * 19]):
+            lines = self.__withLeadingInts(values)
+            self.__assertSameRows(lines, types=["int", "int"])
+            self.__assertSameRows(lines, types=["float", "float"])
+            self.__assertSameRows(lines)
+
+
+    def testSeparatorInValues(self):
+        self.__assertSameRows(['a,b', '"1,2",3', '4,5', '"6,",7', '8,9'])
+
+
+    def testRandomValues(self):
+        rand = random.Random(0)
+        tokens = ["0", "1", "-1", "+2", " 3", "4 ", "1.5", "-.5", "5.", "1e3",
+                  "1E-2", "nan", "inf", "-", "+", ".", "e", "1_0", "0x1",
+                  "1,2", "", " ", "a", "1a", "--1", "1e", "007", "9" * 19,
+                  "-" + "9" * 18]
+        lines = ["a,b,c"]
+        for _ in xrange(30000):
+            lines.append(",".join(
+                    '"{0}"'.format(rand.choice(tokens)) for _ in xrange(3)))
+        self.__assertSameRows(lines)
+        self.__assertSameRows(lines, types=["int", "float", "str"])
+
+
+    def testTypedColumns(self):
+        # Mostly blocks of values of the column's type, which are parsed a
+        # column at a time, with a few blocks holding other values.
+        rand = random.Random(0)
+        lines = ["a,b,c"]
+        for i in xrange(50000):
+            row = [str(rand.randint(-10 ** 9, 10 ** 9)),
+                   rand.choice([repr(rand.uniform(-1e6, 1e6)),
+                                str(rand.randint(0, 9)), "3.0", "1e2"]),
+                   rand.choice(["x", "1", "2.5"])]
+            if 20000 <= i < 20010:
+                row[0] = rand.choice(["1.5", " 4", "x", ""])
+                row[1] = rand.choice(["nan", "-inf", "y", ""])
+            lines.append(",".join(row))
+
+        for types in (["int", "float", "str"], ["float", "int", "int"]):
+            self.__assertSameRows(lines, types=types)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+'''
+Checks how :class:`.ConnectionManager` checks out, reuses, health-checks and
+evicts pooled connections.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from system.service.ConnectionKey import ConnectionKey
+from system.service.ConnectionManager import ConnectionManager
+
+
+class FakeConnection(object):
+
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.closed = False
+
+
+    def isHealthy(self):
+        return self.healthy
+
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnectionFactory(object):
+    '''
+    Numbers each connection it creates, and fails while ``error`` is set.
+    '''
+
+    def __init__(self):
+        self.connections = []
+        self.error = None
+
+
+    def getConnection(self, **kwargs):
+        if self.error:
+            raise self.error
+
+        connection = FakeConnection(len(self.connections))
+        self.connections.append(connection)
+        return connection
+
+
+class ConnectionManagerTest(unittest.TestCase):
+
+    # Seconds to wait for a thread before reporting that it hung.
+    TIMEOUT = 30
+
+    def setUp(self):
+        self.__factory = FakeConnectionFactory()
+
+
+    def __createManager(self, **kwargs):
+        return ConnectionManager(self.__factory, **kwargs)
+
+
+    def __inThread(self, target):
+        '''
+        Runs the target in another thread and returns what it returned.
+        '''
+        outcome = []
+        thread = threading.Thread(target=lambda: outcome.append(target()))
+        thread.daemon = True
+        thread.start()
+        thread.join(self.TIMEOUT)
+        self.assertFalse(thread.is_alive(), "thread hung")
+        return outcome[0]
+
+
+    def __getStats(self, manager, path="a.db"):
+        return manager.getStats()[ConnectionKey(path=path)]
+
+
+    def testThreadKeepsItsConnection(self):
+        manager = self.__createManager()
+        first = manager.open(path="a.db")
+        self.assertIs(manager.open(path="./a.db"), first)
+        self.assertIsNot(manager.open(path="b.db"), first)
+        self.assertIsNot(self.__inThread(lambda: manager.open(path="a.db")),
+                         first)
+        self.assertEqual(len(self.__factory.connections), 3)
+
+
+    def testReleasedConnectionIsReused(self):
+        manager = self.__createManager()
+        first = manager.open(path="a.db")
+        manager.releaseThreadConnections()
+
+        def checkout():
+            with manager.checkout(path="a.db") as connection:
+                return connection
+
+        self.assertIs(self.__inThread(checkout), first)
+        stats = self.__getStats(manager)
+        self.assertEqual((stats["open"], stats["idle"], stats["checkedOut"],
+                          stats["hits"], stats["misses"]), (1, 1, 0, 1, 1))
+        self.assertEqual(manager.getReuseCount(), 1)
+
+
+    def testCheckoutKeepsConnectionAlreadyOpen(self):
+        manager = self.__createManager()
+        connection = manager.open(path="a.db")
+        with manager.checkout(path="a.db") as checkedOut:
+            self.assertIs(checkedOut, connection)
+        self.assertEqual(self.__getStats(manager)["checkedOut"], 1)
+
+
+    def testWaitsForConnectionAtMaxSize(self):
+        manager = self.__createManager(maxSize=1)
+        first = manager.open(path="a.db")
+        opened = []
+
+        def waitForConnection():
+            opened.append(manager.open(path="a.db"))
+            manager.releaseThreadConnections()
+
+        thread = threading.Thread(target=waitForConnection)
+        thread.daemon = True
+        thread.start()
+        thread.join(0.2)
+        self.assertEqual(opened, [])
+
+        manager.releaseThreadConnections()
+        thread.join(self.TIMEOUT)
+        self.assertEqual(opened, [first])
+        self.assertEqual(self.__getStats(manager)["waits"], 1)
+
+
+    def testUnhealthyConnectionIsReplaced(self):
+        manager = self.__createManager()
+        first = manager.open(path="a.db")
+        manager.releaseThreadConnections()
+        first.healthy = False
+
+        second = manager.open(path="a.db")
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        stats = self.__getStats(manager)
+        self.assertEqual((stats["open"], stats["unhealthy"]), (1, 1))
+
+
+    def testIdleConnectionsAreEvicted(self):
+        manager = self.__createManager(minSize=1, maxIdleSeconds=0.05)
+        opened = []
+        done = threading.Event()
+
+        def hold():
+            opened.append(manager.open(path="a.db"))
+            done.wait(self.TIMEOUT)
+            manager.releaseThreadConnections()
+
+        # The threads hold their connections at once, so each opens its own.
+        threads = [threading.Thread(target=hold) for _ in xrange(3)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        deadline = time.time() + self.TIMEOUT
+        while len(opened) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        done.set()
+        for thread in threads:
+            thread.join(self.TIMEOUT)
+        self.assertEqual(self.__getStats(manager)["idle"], 3)
+
+        time.sleep(0.1)
+        self.assertIn(manager.open(path="a.db"), opened)
+        self.assertEqual(sum(connection.closed for connection in opened), 2)
+        stats = self.__getStats(manager)
+        self.assertEqual((stats["open"], stats["idle"], stats["evictions"]),
+                         (1, 0, 2))
+
+
+    def testOpenErrorFreesRoom(self):
+        manager = self.__createManager(maxSize=1)
+        self.__factory.error = IOError("cannot connect")
+        with self.assertRaises(IOError):
+            manager.open(path="a.db")
+        self.__factory.error = None
+        manager.open(path="a.db")
+        self.assertEqual(self.__getStats(manager)["open"], 1)
+
+
+    def testCloseAll(self):
+        manager = self.__createManager()
+        manager.open(path="a.db")
+        manager.open(path="b.db")
+        manager.release(path="b.db")
+        manager.closeAll()
+        self.assertTrue(all(connection.closed
+                            for connection in self.__factory.connections))
+        stats = self.__getStats(manager)
+        self.assertEqual((stats["open"], stats["idle"], stats["checkedOut"]),
+                         (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
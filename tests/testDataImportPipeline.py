@@ -0,0 +1,157 @@
+'''
+Checks that :class:`.DataImportPipeline` passes every row to each consumer,
+and that neither the reader nor the consumers are left waiting.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from dataimport.DataImport import DataImport
+from dataimport.DataImportCancelledError import DataImportCancelledError
+from dataimport.DataImportPipeline import DataImportPipeline
+
+
+class ListDataImport(DataImport):
+    '''
+    Reads rows from a list, raising an error after ``failAfter`` rows if given.
+    '''
+
+    def __init__(self, rows, failAfter=None):
+        self.__rows = rows
+        self.__failAfter = failAfter
+
+
+    def getName(self):
+        return "test"
+
+
+    def getDestination(self):
+        return "test"
+
+
+    def getTitleColumn(self):
+        return None
+
+
+    def getColumns(self):
+        return ["a", "b"]
+
+
+    def getTypes(self):
+        return ["int", "int"]
+
+
+    def getRows(self):
+        for i, row in enumerate(self.__rows):
+            if i == self.__failAfter:
+                raise ValueError("cannot read row {0}".format(i))
+            yield row
+
+
+class DataImportPipelineTest(unittest.TestCase):
+
+    # Seconds to wait for a thread before reporting that it hung.
+    TIMEOUT = 30
+
+    ROWS = [[i, i * 2] for i in xrange(1000)]
+
+    def __start(self, target, *args):
+        '''
+        Runs the target in a thread, keeping what it returns or raises.
+        '''
+        outcome = {}
+        def run():
+            try:
+                outcome["result"] = target(*args)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return thread, outcome
+
+
+    def __join(self, thread):
+        thread.join(self.TIMEOUT)
+        self.assertFalse(thread.is_alive(), "thread hung")
+
+
+    def __consume(self, pipeline, i, maxRows=None):
+        # Releases the consumer once done, as the DataImporterTask does.
+        consumer = pipeline.getConsumer(i)
+        try:
+            self.assertEqual(consumer.getColumns(), ["a", "b"])
+            rows = []
+            for row in consumer.getRows():
+                rows.append(row)
+                if len(rows) == maxRows:
+                    break
+            return rows
+        finally:
+            pipeline.release(i)
+
+
+    def testEveryConsumerReadsEveryRow(self):
+        pipeline = DataImportPipeline(ListDataImport(self.ROWS), 3,
+                                      bufferSize=20, batchSize=7)
+        consumers = [self.__start(self.__consume, pipeline, i)
+                     for i in xrange(3)]
+        reader, readerOutcome = self.__start(pipeline.read)
+        for thread, outcome in consumers + [(reader, readerOutcome)]:
+            self.__join(thread)
+            self.assertNotIn("error", outcome)
+
+        for _, outcome in consumers:
+            self.assertEqual(outcome["result"], self.ROWS)
+
+
+    def testReleasedConsumerDoesNotBlockReader(self):
+        pipeline = DataImportPipeline(ListDataImport(self.ROWS), 2,
+                                      bufferSize=20, batchSize=10)
+        partial, partialOutcome = self.__start(self.__consume, pipeline, 0, 5)
+        full, fullOutcome = self.__start(self.__consume, pipeline, 1)
+        reader, readerOutcome = self.__start(pipeline.read)
+        for thread in (partial, full, reader):
+            self.__join(thread)
+
+        self.assertEqual(partialOutcome["result"], self.ROWS[:5])
+        self.assertEqual(fullOutcome["result"], self.ROWS)
+        self.assertNotIn("error", readerOutcome)
+
+
+    def testCancelStopsBlockedReader(self):
+        # Nothing reads the rows, so the reader waits on a full buffer.
+        pipeline = DataImportPipeline(ListDataImport(self.ROWS), 1,
+                                      bufferSize=10, batchSize=10)
+        reader, outcome = self.__start(pipeline.read)
+        reader.join(1)
+        self.assertTrue(reader.is_alive())
+        pipeline.cancel()
+        self.__join(reader)
+        self.assertIsInstance(outcome["error"], DataImportCancelledError)
+
+
+    def testReaderErrorIsRaisedByConsumers(self):
+        pipeline = DataImportPipeline(ListDataImport(self.ROWS, failAfter=50),
+                                      2, bufferSize=20, batchSize=10)
+        consumers = [self.__start(self.__consume, pipeline, i)
+                     for i in xrange(2)]
+        reader, readerOutcome = self.__start(pipeline.read)
+        for thread, outcome in consumers + [(reader, readerOutcome)]:
+            self.__join(thread)
+            self.assertIsInstance(outcome["error"], ValueError)
+            self.assertEqual(str(outcome["error"]), "cannot read row 50")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+'''
+Checks that :class:`.MaterializedDataImport` replays every row, whether the
+rows are held in memory or spilled to disk.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import cPickle
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from database.SQLiteDatabase import SQLiteDatabase
+from dataimport.CSVDataImport import CSVDataImport
+from dataimport.MaterializedDataImport import MaterializedDataImport
+
+
+class MaterializedDataImportTest(unittest.TestCase):
+
+    NUM_ROWS = 95
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__path = os.path.join(self.__dir, "data.csv")
+        self.__writeCSV(["a,b,c"] + ["{0},{1},row {0}".format(i, i * 2)
+                                     for i in xrange(self.NUM_ROWS)])
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __writeCSV(self, lines):
+        with open(self.__path, "wb") as outFile:
+            outFile.write("\n".join(lines) + "\n")
+
+
+    def __createImport(self):
+        return CSVDataImport("data", self.__path, "data", delimiter=",")
+
+
+    def __getChunkSizes(self, materialized):
+        spillFile = materialized._MaterializedDataImport__spillFile
+        spillFile.seek(0)
+        sizes = []
+        while True:
+            try:
+                sizes.append(cPickle.load(spillFile)[0])
+            except EOFError:
+                return sizes
+
+
+    def testSpilledChunksHaveTheSameSize(self):
+        for bufferRows in (0, 9, 10, 20, 31):
+            materialized = MaterializedDataImport(self.__createImport(),
+                                                  bufferRows=bufferRows,
+                                                  chunkRows=10)
+            try:
+                self.assertTrue(materialized.isSpilled())
+                self.assertEqual(self.__getChunkSizes(materialized),
+                                 [10] * 9 + [5], bufferRows)
+            finally:
+                materialized.close()
+
+
+    def testReplaysRows(self):
+        expected = list(self.__createImport().getRows())
+        for bufferRows in (0, 20, self.NUM_ROWS):
+            materialized = MaterializedDataImport(self.__createImport(),
+                                                  bufferRows=bufferRows,
+                                                  chunkRows=10)
+            try:
+                self.assertEqual(materialized.isSpilled(),
+                                 bufferRows < self.NUM_ROWS)
+                self.assertEqual(materialized.getNumRows(), self.NUM_ROWS)
+                self.assertEqual(list(materialized.getRows()), expected)
+                self.assertEqual(list(materialized.getRows()), expected)
+            finally:
+                materialized.close()
+
+
+    def testReplaysRaggedRows(self):
+        self.__writeCSV(["a,b,c"] + [",".join(str(j) for j in xrange(i % 4))
+                                     for i in xrange(1, 45)])
+        expected = list(self.__createImport().getRows())
+        materialized = MaterializedDataImport(self.__createImport(),
+                                              bufferRows=7, chunkRows=5)
+        try:
+            self.assertEqual(list(materialized.getRows()), expected)
+        finally:
+            materialized.close()
+
+
+    def testImportsIntoSeveralDatabases(self):
+        expected = list(self.__createImport().getRows())
+        materialized = MaterializedDataImport(self.__createImport(),
+                                              bufferRows=20, chunkRows=10)
+        try:
+            for name in ("first.db", "second.db"):
+                db = SQLiteDatabase(os.path.join(self.__dir, name))
+                try:
+                    db.importData(materialized)
+                    self.assertEqual(
+                            list(db.query("SELECT a, b, c FROM data "
+                                          "ORDER BY rowid")),
+                            expected, name)
+                finally:
+                    db.close()
+        finally:
+            materialized.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
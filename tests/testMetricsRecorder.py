@@ -0,0 +1,153 @@
+'''
+Checks that :class:`.MetricsRecorder` writes one complete record per query or
+data import, as JSON lines or to SQLite.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from system.service.MetricsRecorder import MetricsRecorder
+
+
+class MetricsRecorderTest(unittest.TestCase):
+
+    # 2020-01-02T03:04:05.5 UTC
+    STARTED = 1577934245.5
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __readJsonLines(self, path):
+        with open(path) as inFile:
+            return [json.loads(line) for line in inFile]
+
+
+    def __readSQLite(self, path):
+        connection = sqlite3.connect(path)
+        try:
+            cursor = connection.execute(
+                    "SELECT * FROM query_metrics ORDER BY rowid")
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+        finally:
+            connection.close()
+
+
+    def __recordQueries(self, recorder):
+        recorder.record("query", "db", "totals", self.STARTED, 1.23456789,
+                        variant=0, sql="SELECT 1", rows=10, bytes_written=100)
+        recorder.record("import", "db", "data", self.STARTED, 2,
+                        status="error", error="cannot read")
+        recorder.close()
+
+
+    def __checkRecords(self, recorder, records):
+        self.assertEqual(len(records), 2)
+        for record in records:
+            self.assertEqual(sorted(record), sorted(MetricsRecorder.FIELDS))
+            self.assertEqual(record["run_id"], recorder.getRunId())
+            self.assertEqual(record["started"], "2020-01-02T03:04:05.500000")
+
+        self.assertEqual(
+                [(record["kind"], record["name"], record["seconds"],
+                  record["rows"], record["status"], record["error"])
+                 for record in records],
+                [("query", "totals", 1.234568, 10, "ok", None),
+                 ("import", "data", 2, None, "error", "cannot read")])
+        self.assertEqual(records[0]["sql"], "SELECT 1")
+        self.assertEqual(records[0]["bytes_written"], 100)
+
+
+    def testJsonLines(self):
+        path = os.path.join(self.__dir, "metrics.jsonl")
+        recorder = MetricsRecorder(path)
+        self.__recordQueries(recorder)
+        self.__checkRecords(recorder, self.__readJsonLines(path))
+
+
+    def testSQLite(self):
+        path = os.path.join(self.__dir, "metrics.db")
+        recorder = MetricsRecorder(path)
+        self.__recordQueries(recorder)
+        self.__checkRecords(recorder, self.__readSQLite(path))
+
+
+    def testRunsAreAppended(self):
+        path = os.path.join(self.__dir, "metrics.jsonl")
+        recorders = [MetricsRecorder(path), MetricsRecorder(path)]
+        for recorder in recorders:
+            self.__recordQueries(recorder)
+        self.assertNotEqual(recorders[0].getRunId(), recorders[1].getRunId())
+        self.assertEqual([record["run_id"]
+                          for record in self.__readJsonLines(path)],
+                         [recorder.getRunId() for recorder in recorders
+                          for _ in xrange(2)])
+
+
+    def testDisabled(self):
+        recorder = MetricsRecorder()
+        self.assertFalse(recorder.isEnabled())
+        self.__recordQueries(recorder)
+        self.assertEqual(os.listdir(self.__dir), [])
+
+
+    def testRecordsFromSeveralThreads(self):
+        path = os.path.join(self.__dir, "metrics.db")
+        recorder = MetricsRecorder(path)
+
+        def work(thread):
+            for i in xrange(50):
+                recorder.record("query", "db", "{0}-{1}".format(thread, i),
+                                self.STARTED, 0.1)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in xrange(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        recorder.close()
+
+        self.assertEqual(sorted(record["name"]
+                                for record in self.__readSQLite(path)),
+                         sorted("{0}-{1}".format(thread, i)
+                                for thread in xrange(4) for i in xrange(50)))
+
+
+    def testWriteErrorIsLogged(self):
+        warnings = []
+        handler = logging.Handler()
+        handler.emit = warnings.append
+        log = logging.getLogger("app.MetricsRecorder")
+        log.addHandler(handler)
+        try:
+            recorder = MetricsRecorder(os.path.join(self.__dir, "missing",
+                                                    "metrics.jsonl"))
+            self.__recordQueries(recorder)
+        finally:
+            log.removeHandler(handler)
+        self.assertEqual([record.levelname for record in warnings],
+                         ["WARNING", "WARNING"])
+
+
+if __name__ == "__main__":
+    unittest.main()
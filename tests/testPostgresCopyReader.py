@@ -0,0 +1,189 @@
+'''
+Checks the data :class:`.PostgresCopyReader` writes for each COPY format, by
+decoding it as the server would.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from database.PostgresCopyReader import PostgresCopyReader
+from dataimport.CSVDataImport import CSVDataImport
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# As PostgresDatabase.pyToSqlTypes, which cannot be imported without psycopg2.
+PY_TO_SQL_TYPES = {"int"  : "INTEGER",
+                   "float": "REAL",
+                   "str"  : "TEXT"}
+
+
+def decodeCopy(data, format, sqlTypes):
+    '''
+    Decodes COPY data into rows of values, with None for NULL, parsing the
+    values of INTEGER and REAL columns as the server would: values it would
+    reject raise ValueError.
+    '''
+    if format == "binary":
+        return _decodeBinary(data, sqlTypes)
+
+    rows = []
+    for line in data.splitlines():
+        if format == "text":
+            fields = [None if field == "\\N" else field
+                      for field in line.split("\t")]
+        else:
+            fields = _splitCSV(line)
+
+        rows.append([_parse(field, sqlType)
+                     for field, sqlType in zip(fields, sqlTypes)])
+
+    return rows
+
+
+def _parse(field, sqlType):
+    if field is None:
+        return None
+    if sqlType == "INTEGER":
+        return int(field)
+    if sqlType == "REAL":
+        return float(field)
+
+    return field
+
+
+def _splitCSV(line):
+    # Unquoted empty fields are NULL; quoted fields are strings.
+    fields = []
+    position = 0
+    while True:
+        if line.startswith('"', position):
+            end = position + 1
+            while True:
+                end = line.index('"', end)
+                if line.startswith('""', end):
+                    end += 2
+                else:
+                    break
+            fields.append(line[position + 1:end].replace('""', '"'))
+            position = end + 1
+        else:
+            end = line.find(",", position)
+            if end < 0:
+                end = len(line)
+            fields.append(line[position:end] or None)
+            position = end
+
+        if position >= len(line):
+            return fields
+
+        position += 1
+
+
+def _decodeBinary(data, sqlTypes):
+    header = "PGCOPY\n\xff\r\n\x00"
+    assert data.startswith(header)
+    position = len(header) + 8
+    rows = []
+    while True:
+        numFields, = struct.unpack_from(">h", data, position)
+        position += 2
+        if numFields == -1:
+            assert position == len(data)
+            return rows
+
+        row = []
+        for sqlType in sqlTypes[:numFields]:
+            length, = struct.unpack_from(">i", data, position)
+            position += 4
+            if length == -1:
+                row.append(None)
+                continue
+
+            field = data[position:position + length]
+            position += length
+            if sqlType == "INTEGER":
+                row.append(struct.unpack(">i", field)[0])
+            elif sqlType == "REAL":
+                row.append(struct.unpack(">f", field)[0])
+            else:
+                row.append(field)
+
+        rows.append(row)
+
+
+class PostgresCopyReaderTest(unittest.TestCase):
+
+    SQL_TYPES = ["INTEGER", "REAL", "TEXT"]
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __copy(self, rows, format, sqlTypes=SQL_TYPES):
+        reader = PostgresCopyReader(rows, sqlTypes, format=format)
+        # Read in small pieces, as psycopg2 does.
+        data = []
+        while True:
+            chunk = reader.read(7)
+            if not chunk:
+                break
+            data.append(chunk)
+
+        return decodeCopy("".join(data), format, sqlTypes)
+
+
+    def testBlankValuesAreNull(self):
+        rows = [["1", "", "a"],
+                ["", "2.5", ""],
+                [" ", "\t", " "],
+                [u"", u" ", u"b"],
+                [3, 4.5, "c,\"d\""]]
+        for format in PostgresCopyReader.FORMATS:
+            self.assertEqual(self.__copy(rows, format),
+                             [[1, None, "a"],
+                              [None, 2.5, None],
+                              [None, None, None],
+                              [None, None, "b"],
+                              [3, 4.5, "c,\"d\""]], format)
+
+
+    def testInferredTypesWithBlankValues(self):
+        # Blank values do not count towards the inferred types, so they must
+        # be copied as NULL for the rows to fit those types.
+        path = os.path.join(self.__dir, "test.csv")
+        with open(path, "wb") as outFile:
+            outFile.write("a,b,c\n1,2.5,x\n,,\n3, , \n 4,,y\n")
+
+        engines = ["standard"] + (["fast"] if numpy else [])
+        for engine in engines:
+            dataImport = CSVDataImport("test", path, "test", delimiter=",",
+                                       engine=engine)
+            types = list(dataImport.getTypes())
+            self.assertEqual(types, ["int", "float", "str"], engine)
+
+            sqlTypes = [PY_TO_SQL_TYPES[columnType] for columnType in types]
+            for format in PostgresCopyReader.FORMATS:
+                self.assertEqual(self.__copy(dataImport.getRows(), format,
+                                             sqlTypes),
+                                 [[1, 2.5, "x"],
+                                  [None, None, None],
+                                  [3, None, None],
+                                  [4, None, "y"]], (engine, format))
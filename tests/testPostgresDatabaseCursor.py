@@ -0,0 +1,122 @@
+'''
+Checks that :class:`.PostgresDatabaseCursor` returns the rows fetched while
+a streamed query started, followed by the rest of the server-side cursor.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from database.PostgresDatabaseCursor import PostgresDatabaseCursor
+
+
+class NamedCursor(object):
+    '''
+    Stands in for a psycopg2 server-side cursor, counting the round trips to
+    the server: one for each fetch, or for each ``itersize`` rows iterated.
+    '''
+
+    def __init__(self, rows, itersize):
+        self.__rows = rows
+        self.__position = 0
+        self.itersize = itersize
+        self.roundTrips = 0
+        self.closed = False
+
+
+    def __iter__(self):
+        while True:
+            batch = self.fetchmany(self.itersize)
+            if not batch:
+                return
+            for row in batch:
+                yield row
+
+
+    def fetchone(self):
+        batch = self.fetchmany(1)
+        return batch[0] if batch else None
+
+
+    def fetchmany(self, size):
+        assert not self.closed
+        self.roundTrips += 1
+        batch = self.__rows[self.__position:self.__position + size]
+        self.__position += len(batch)
+        return batch
+
+
+    def close(self):
+        self.closed = True
+
+
+class TypeNames(object):
+    '''
+    Stands in for the :class:`.PostgresDatabase` which looks up type names.
+    '''
+
+    def getTypeNames(self, typeOids):
+        return {23: "int4", 25: "text", 1700: "numeric"}
+
+
+class PostgresDatabaseCursorTest(unittest.TestCase):
+
+    ROWS = [(i, "row {0}".format(i)) for i in xrange(95)]
+
+    def __query(self, peekedRows=10, itersize=20):
+        # As PostgresDatabase.query does when streaming.
+        cur = NamedCursor(self.ROWS, itersize)
+        peeked = cur.fetchmany(peekedRows)
+        return cur, PostgresDatabaseCursor(TypeNames(), cur,
+                                           [("a", 23), ("b", 25)], peeked)
+
+
+    def testReplaysPeekedRows(self):
+        cur, cursor = self.__query()
+        self.assertEqual(list(cursor), [list(row) for row in self.ROWS])
+        self.assertTrue(cur.closed)
+
+
+    def testFetchesInBatches(self):
+        cur, cursor = self.__query(peekedRows=10, itersize=20)
+        list(cursor)
+        # The peek, then 85 rows in batches of 20 and a final empty fetch.
+        self.assertEqual(cur.roundTrips, 1 + 5 + 1)
+
+
+    def testIterBatchesReplaysPeekedRows(self):
+        cur, cursor = self.__query(peekedRows=25)
+        batches = list(cursor.iterBatches(10))
+        self.assertEqual([len(batch) for batch in batches],
+                         [10, 10, 5] + [10] * 7)
+        self.assertEqual([tuple(row) for batch in batches for row in batch],
+                         self.ROWS)
+        self.assertTrue(cur.closed)
+
+
+    def testNoRows(self):
+        cur = NamedCursor([], 20)
+        cursor = PostgresDatabaseCursor(TypeNames(), cur, [("a", 23)],
+                                        cur.fetchmany(10))
+        self.assertEqual(list(cursor), [])
+        self.assertTrue(cur.closed)
+
+
+    def testColumnsAndTypes(self):
+        cursor = PostgresDatabaseCursor(
+                TypeNames(), NamedCursor([], 20),
+                [("a", 23), ("b", 25), ("c", 1700), ("d", 114)])
+        self.assertEqual(cursor.getColumns(), ["a", "b", "c", "d"])
+        self.assertEqual(cursor.getTypes(),
+                         ["int", "str", "decimal.Decimal", "str"])
+
+
+if __name__ == "__main__":
+    unittest.main()
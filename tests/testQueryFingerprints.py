@@ -0,0 +1,161 @@
+'''
+Checks when :class:`.QueryFingerprints` lets incremental runs skip data
+imports and queries.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from dataimport.CSVDataImport import CSVDataImport
+from domain.SQLiteDatabaseConfiguration import SQLiteDatabaseConfiguration
+from system.service.QueryFingerprints import QueryFingerprints
+
+
+class QueryFingerprintsTest(unittest.TestCase):
+
+    QUERY = ["SELECT a, SUM(b) FROM data GROUP BY a"]
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__csvPath = os.path.join(self.__dir, "data.csv")
+        self.__writeCSV("a,b\n1,2\n3,4\n")
+        self.__fingerprintsPath = os.path.join(self.__dir, "fingerprints.db")
+        self.__configPath = os.path.join(self.__dir, "config.ini")
+        self.__db = SQLiteDatabaseConfiguration(
+                "test", os.path.join(self.__dir, "test.db"))
+        self.__db.initialize()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __writeCSV(self, text):
+        with open(self.__csvPath, "wb") as outFile:
+            outFile.write(text)
+
+
+    def __createImport(self, **kwargs):
+        options = {"delimiter": ","}
+        options.update(kwargs)
+        return CSVDataImport("data", self.__csvPath, "data", **options)
+
+
+    def __createFingerprints(self, path=True):
+        return QueryFingerprints(self.__fingerprintsPath if path else None,
+                                 self.__configPath)
+
+
+    def __recordImport(self, dataImport):
+        '''
+        Records a successful run of the data import and of the query, as the
+        tasks do, and returns their fingerprints.
+        '''
+        fingerprints = self.__createFingerprints()
+        fingerprints.addDataImports([dataImport])
+        importFingerprint = fingerprints.getImportFingerprint(self.__db,
+                                                              dataImport)
+        queryFingerprint = fingerprints.getQueryFingerprint(self.__db,
+                                                            self.QUERY)
+        fingerprints.record("import", "test", "data", importFingerprint)
+        fingerprints.record("query", "test", "query", queryFingerprint)
+        fingerprints.save()
+        return importFingerprint, queryFingerprint
+
+
+    def __isUnchanged(self, dataImport):
+        '''
+        :returns: whether the data import and the query would be skipped by
+            the next run
+        :rtype: tuple of boolean
+        '''
+        fingerprints = self.__createFingerprints()
+        fingerprints.addDataImports([dataImport])
+        return (fingerprints.isUnchanged(
+                        "import", "test", "data",
+                        fingerprints.getImportFingerprint(self.__db,
+                                                          dataImport)),
+                fingerprints.isUnchanged(
+                        "query", "test", "query",
+                        fingerprints.getQueryFingerprint(self.__db,
+                                                         self.QUERY)))
+
+
+    def testUnchangedInputsAreSkipped(self):
+        self.__recordImport(self.__createImport())
+        self.assertEqual(self.__isUnchanged(self.__createImport()),
+                         (True, True))
+
+
+    def testChangedSourceIsNotSkipped(self):
+        self.__recordImport(self.__createImport())
+        self.__writeCSV("a,b\n1,2\n3,4\n5,6\n")
+        self.assertEqual(self.__isUnchanged(self.__createImport()),
+                         (False, False))
+
+
+    def testChangedOptionsAreNotSkipped(self):
+        self.__recordImport(self.__createImport())
+        for options in ({"types": ["int", "float"]},
+                        {"delimiter": ";"},
+                        {"startLine": 1},
+                        {"columns": ["x", "y"]},
+                        {"nullValues": ["3"]},
+                        {"dbNull": "0"},
+                        {"titleColumn": "source"}):
+            self.assertEqual(self.__isUnchanged(self.__createImport(**options)),
+                             (False, False), options)
+
+
+    def testReadingRowsDoesNotChangeOptions(self):
+        # The columns and types filled in from the file are not options.
+        dataImport = self.__createImport()
+        self.__recordImport(dataImport)
+        dataImport.getColumns()
+        dataImport.getTypes()
+        list(dataImport.getRows())
+        self.assertEqual(self.__isUnchanged(dataImport), (True, True))
+
+
+    def testForgottenFingerprintIsNotSkipped(self):
+        dataImport = self.__createImport()
+        self.__recordImport(dataImport)
+        fingerprints = self.__createFingerprints()
+        fingerprints.record("import", "test", "data", None)
+        fingerprints.save()
+        self.assertEqual(self.__isUnchanged(dataImport), (False, True))
+
+
+    def testDisabled(self):
+        dataImport = self.__createImport()
+        self.__recordImport(dataImport)
+        fingerprints = self.__createFingerprints(path=False)
+        self.assertFalse(fingerprints.isEnabled())
+        self.assertFalse(fingerprints.isUnchanged(
+                "import", "test", "data",
+                fingerprints.getImportFingerprint(self.__db, dataImport)))
+
+
+    def testChangedTables(self):
+        fingerprints = self.__createFingerprints()
+        fingerprints.markTableChanged("test", "Data")
+        self.assertEqual(fingerprints.getChangedTables("test", self.QUERY),
+                         ["data"])
+        self.assertEqual(fingerprints.getChangedTables("other", self.QUERY),
+                         [])
+        self.assertEqual(fingerprints.getChangedTables(
+                "test", ["SELECT * FROM data_2"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
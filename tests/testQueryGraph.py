@@ -0,0 +1,155 @@
+'''
+Checks how :class:`.QueryGraph` orders queries and how :class:`.ThreadPool`
+runs work items with dependencies.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import random
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from database.query.Query import Query
+from system.config.ConfigError import ConfigError
+from system.task.QueryGraph import QueryGraph
+from util.ThreadPool import ThreadPool
+
+
+def createQueries(dependencies):
+    '''
+    :param dependencies: the titles each query depends on, or None, by title,
+        in configured order
+    :type dependencies: list of tuples of (str, list of str)
+    :rtype: list of :class:`.Query`
+    '''
+    queries = []
+    for title, dependsOn in dependencies:
+        query = Query(title, "SELECT 1")
+        if dependsOn is not None:
+            query.setDependencies(dependsOn)
+        queries.append(query)
+
+    return queries
+
+
+class QueryGraphTest(unittest.TestCase):
+
+    def testUndeclaredDependenciesKeepConfiguredOrder(self):
+        graph = QueryGraph(createQueries([("a", None), ("b", None),
+                                          ("c", None)]))
+        self.assertFalse(graph.hasExplicitDependencies())
+        self.assertEqual(graph.getDependencies(), {0: [], 1: [0], 2: [0, 1]})
+
+
+    def testDeclaredDependencies(self):
+        graph = QueryGraph(createQueries([("a", []), ("b", []),
+                                          ("c", ["a"]), ("d", None)]))
+        self.assertTrue(graph.hasExplicitDependencies())
+        self.assertEqual(graph.getDependencies(),
+                         {0: [], 1: [], 2: [0], 3: [0, 1, 2]})
+
+
+    def testDependencyOnLaterQuery(self):
+        graph = QueryGraph(createQueries([("a", ["b"]), ("b", [])]))
+        self.assertEqual(graph.getDependencies(), {0: [1], 1: []})
+
+
+    def testUnknownDependency(self):
+        with self.assertRaises(ConfigError) as context:
+            QueryGraph(createQueries([("a", []), ("b", ["missing"])]))
+        self.assertIn("missing", str(context.exception))
+
+
+    def testCycle(self):
+        with self.assertRaises(ConfigError) as context:
+            QueryGraph(createQueries([("a", ["c"]), ("b", ["a"]),
+                                      ("c", ["b"])]))
+        self.assertIn("a -> c -> b -> a", str(context.exception))
+
+
+    def testCriticalPath(self):
+        graph = QueryGraph(createQueries([("a", []), ("b", []),
+                                          ("c", ["a"]), ("d", ["b", "c"])]))
+        path, seconds = graph.getCriticalPath({0: 1.0, 1: 5.0, 2: 1.0,
+                                               3: 2.0})
+        self.assertEqual([query.getTitle() for query in path], ["b", "d"])
+        self.assertEqual(seconds, 7.0)
+
+        # Queries which did not run take no time.
+        path, seconds = graph.getCriticalPath({0: 3.0, 1: 1.0, 2: 3.0})
+        self.assertEqual([query.getTitle() for query in path], ["a", "c"])
+        self.assertEqual(seconds, 6.0)
+
+
+    def testCriticalPathOfNoQueries(self):
+        self.assertEqual(QueryGraph([]).getCriticalPath({}), ([], 0.0))
+
+
+class ThreadPoolDependenciesTest(unittest.TestCase):
+
+    def testDependenciesFinishFirst(self):
+        rand = random.Random(0)
+        numItems = 60
+        dependencies = dict((i, rand.sample(range(i), min(i, 3)))
+                            for i in xrange(numItems))
+        finished = set()
+        lock = threading.Lock()
+
+        def work(i):
+            with lock:
+                missing = [j for j in dependencies[i] if j not in finished]
+            time.sleep(rand.random() * 0.002)
+            with lock:
+                finished.add(i)
+            return missing
+
+        for maxWorkers in (1, 4):
+            finished.clear()
+            results = ThreadPool(maxWorkers).map(work, range(numItems),
+                                                 dependencies)
+            self.assertEqual(results, [[]] * numItems, maxWorkers)
+
+
+    def testIndependentItemsRunAtOnce(self):
+        # Item 2 depends on item 0 only, so it can run while item 1 waits for
+        # it to finish.
+        done = threading.Event()
+
+        def work(i):
+            if i == 1:
+                return done.wait(10)
+            if i == 2:
+                done.set()
+
+        results = ThreadPool(2).map(work, range(3), {1: [], 2: [0]})
+        self.assertTrue(results[1])
+
+
+    def testCycle(self):
+        with self.assertRaises(ValueError):
+            ThreadPool(2).map(lambda i: i, range(3), {0: [2], 1: [0], 2: [1]})
+
+
+    def testErrorCancelsDependents(self):
+        ran = []
+
+        def work(i):
+            ran.append(i)
+            if i == 0:
+                raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            ThreadPool(3).map(work, range(3), {1: [0], 2: [1]})
+        self.assertEqual(ran, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+'''
+Checks when :class:`.RunHistory` flags a query as having regressed against
+its earlier runs.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from system.service.RunHistory import RunHistory
+
+
+class RunHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__path = os.path.join(self.__dir, "history.db")
+        self.__runs = 0
+        # Regressions are logged as warnings.
+        logging.getLogger("app.RunHistory").disabled = True
+
+
+    def tearDown(self):
+        logging.getLogger("app.RunHistory").disabled = False
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __run(self, seconds, configPath="config.ini", db="db",
+              query="totals", **kwargs):
+        '''
+        Records and saves a run of a single query.
+
+        :returns: the regressions found
+        :rtype: list of tuples
+        '''
+        self.__runs += 1
+        history = RunHistory(self.__path, configPath, **kwargs)
+        history.record(db, query, seconds)
+        return history.save("run {0}".format(self.__runs))
+
+
+    def testNeedsEarlierRuns(self):
+        self.assertEqual(self.__run(2.0), [])
+        self.assertEqual(self.__run(2.0), [])
+        self.assertEqual(self.__run(10.0), [])
+        self.assertEqual(self.__run(10.0, minRuns=2), [("db", "totals", 10.0,
+                                                        2.0)])
+
+
+    def testRegressionAgainstMedian(self):
+        # Each run is compared with the median of those before it.
+        for seconds in (2.0, 3.0, 100.0):
+            self.__run(seconds)
+        self.assertEqual(self.__run(6.5), [("db", "totals", 6.5, 3.0)])
+        self.assertEqual(self.__run(9.0), [])
+        self.assertEqual(self.__run(19.0, threshold=3.0), [])
+        self.assertEqual(self.__run(24.0, threshold=3.0),
+                         [("db", "totals", 24.0, 7.75)])
+
+
+    def testOnlyRecentRunsCount(self):
+        for seconds in (100.0, 100.0, 100.0, 2.0, 2.0, 2.0):
+            self.__run(seconds)
+        self.assertEqual(self.__run(50.0, window=3), [("db", "totals", 50.0,
+                                                       2.0)])
+        self.assertEqual(self.__run(50.0, window=20), [])
+
+
+    def testFastQueriesAreNotFlagged(self):
+        for _ in xrange(3):
+            self.__run(0.01)
+        self.assertEqual(self.__run(RunHistory.minSeconds * 0.9), [])
+
+
+    def testHistoryIsKeptPerQuery(self):
+        for _ in xrange(3):
+            self.__run(2.0)
+        self.assertEqual(self.__run(10.0, configPath="other.ini"), [])
+        self.assertEqual(self.__run(10.0, db="other"), [])
+        self.assertEqual(self.__run(10.0, query="other"), [])
+        self.assertEqual(self.__run(10.0, configPath="./config.ini"),
+                         [("db", "totals", 10.0, 2.0)])
+
+
+    def testSeveralQueriesInOneRun(self):
+        for _ in xrange(3):
+            history = RunHistory(self.__path, "config.ini")
+            history.record("db", "a", 2.0)
+            history.record("db", "b", 2.0)
+            history.save("earlier")
+
+        history = RunHistory(self.__path, "config.ini")
+        history.record("db", "a", 2.0)
+        history.record("db", "b", 5.0)
+        self.assertEqual(history.save("latest"), [("db", "b", 5.0, 2.0)])
+
+
+    def testDisabled(self):
+        history = RunHistory(None, "config.ini")
+        self.assertFalse(history.isEnabled())
+        history.record("db", "totals", 10.0)
+        self.assertEqual(history.save("run"), [])
+        self.assertEqual(os.listdir(self.__dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
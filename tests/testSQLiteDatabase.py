@@ -0,0 +1,216 @@
+'''
+Checks how :class:`.SQLiteDatabase` imports data in bulk-load mode, and how
+it finds the column types of query results.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from database.SQLiteDatabase import SQLiteDatabase
+from database.query.QueryError import QueryError
+from dataimport.DataImport import DataImport
+from dataimport.DataImportError import DataImportError
+
+
+class ListDataImport(DataImport):
+    '''
+    Reads (id, name) rows from a list, raising a :class:`.DataImportError`
+    after ``failAfter`` rows if given.
+    '''
+
+    def __init__(self, rows, failAfter=None):
+        self.__rows = rows
+        self.__failAfter = failAfter
+
+
+    def getName(self):
+        return "test"
+
+
+    def getDestination(self):
+        return "data"
+
+
+    def getTitleColumn(self):
+        return None
+
+
+    def getColumns(self):
+        return ["id", "name"]
+
+
+    def getTypes(self):
+        return ["int", "str"]
+
+
+    def getRows(self):
+        for i, row in enumerate(self.__rows):
+            if i == self.__failAfter:
+                raise DataImportError("cannot read row {0}".format(i))
+            yield row
+
+
+class SQLiteBulkLoadTest(unittest.TestCase):
+
+    ROWS = [[i, "row {0}".format(i)] for i in xrange(100)]
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__db = SQLiteDatabase(os.path.join(self.__dir, "test.db"),
+                                   bulkLoad=True)
+        self.__db.importData(ListDataImport(self.ROWS))
+        self.__db.execute("CREATE UNIQUE INDEX data_id ON data (id)")
+        self.__db.execute("CREATE INDEX data_name ON data (name)")
+        self.__pragmas = self.__getPragmas()
+
+
+    def tearDown(self):
+        self.__db.close()
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def __getPragmas(self):
+        return [list(self.__db.query("PRAGMA {0}".format(name)))
+                for name, _ in SQLiteDatabase.bulkLoadPragmas]
+
+
+    def __getIndexes(self):
+        return [name for name, in self.__db.query(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "ORDER BY name")]
+
+
+    def __getIds(self):
+        return [id for id, in self.__db.query(
+                "SELECT id FROM data ORDER BY id")]
+
+
+    def __checkRestored(self, expectedIds):
+        self.assertEqual(self.__getIndexes(), ["data_id", "data_name"])
+        self.assertEqual(self.__getPragmas(), self.__pragmas)
+        connection = self.__db._SQLiteDatabase__getConnection()
+        self.assertEqual(connection.isolation_level, "")
+        self.assertEqual(self.__getIds(), expectedIds)
+
+
+    def testImport(self):
+        self.__db.importData(ListDataImport([[i, "new"]
+                                             for i in xrange(100, 150)]))
+        self.__checkRestored(range(150))
+        self.assertEqual(list(self.__db.query(
+                "SELECT COUNT(*) FROM data INDEXED BY data_name "
+                "WHERE name = 'new'")), [[50]])
+
+
+    def testReadErrorRollsBack(self):
+        rows = [[i, "new"] for i in xrange(100, 150)]
+        with self.assertRaises(DataImportError):
+            self.__db.importData(ListDataImport(rows, failAfter=30))
+        self.__checkRestored(range(100))
+
+
+    def testDuplicateRollsBack(self):
+        # The unique index is only created again once every row is in, so the
+        # duplicate is found then.
+        rows = [[i, "new"] for i in xrange(100, 150)] + [[5, "duplicate"]]
+        with self.assertRaises(QueryError):
+            self.__db.importData(ListDataImport(rows))
+        self.__checkRestored(range(100))
+
+
+    def testImportAfterError(self):
+        with self.assertRaises(DataImportError):
+            self.__db.importData(ListDataImport([[100, "new"]], failAfter=0))
+        self.__db.importData(ListDataImport([[100, "new"]]))
+        self.__checkRestored(range(101))
+
+
+class SQLiteQueryTypesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp(prefix="mincepy-test")
+        self.__db = SQLiteDatabase(os.path.join(self.__dir, "test.db"))
+        self.__db.execute("CREATE TABLE data (a INTEGER, b REAL, c TEXT)")
+        self.__db.executeMany("INSERT INTO data VALUES (?, ?, ?)",
+                              [[i, None if i < 3 else i / 2.0,
+                                None if i < 150 else "row {0}".format(i)]
+                               for i in xrange(200)])
+        SQLiteDatabase._SQLiteDatabase__typeCache.clear()
+
+
+    def tearDown(self):
+        self.__db.close()
+        SQLiteDatabase._SQLiteDatabase__typeCache.clear()
+        shutil.rmtree(self.__dir, ignore_errors=True)
+
+
+    def testTypesFromFirstValues(self):
+        cursor = self.__db.query("SELECT a, b FROM data ORDER BY a")
+        self.assertEqual(cursor.getColumns(), ["a", "b"])
+        self.assertEqual(cursor.getTypes(), ["int", "float"])
+        self.assertEqual(list(cursor),
+                         [[i, None if i < 3 else i / 2.0]
+                          for i in xrange(200)])
+
+
+    def testPeekedRowsAreReplayedInBatches(self):
+        cursor = self.__db.query("SELECT a, b FROM data ORDER BY a")
+        batches = list(cursor.iterBatches(2))
+        self.assertEqual([len(batch) for batch in batches], [2] * 100)
+        self.assertEqual([row[0] for batch in batches for row in batch],
+                         range(200))
+
+
+    def testQueryRunsOnce(self):
+        calls = []
+        connection = self.__db._SQLiteDatabase__getConnection()
+        connection.create_function("track", 1,
+                                   lambda value: calls.append(value) or value)
+        cursor = self.__db.query("SELECT track(a) FROM data WHERE a < 5")
+        self.assertEqual(cursor.getTypes(), ["int"])
+        self.assertEqual(list(cursor), [[i] for i in xrange(5)])
+        self.assertEqual(calls, range(5))
+
+
+    def testUnknownTypesAreStr(self):
+        # Column c has no values among the rows read ahead.
+        cursor = self.__db.query("SELECT a, c FROM data ORDER BY a")
+        self.assertEqual(cursor.getTypes(), ["int", "str"])
+        self.assertEqual(len(list(cursor)), 200)
+
+        cursor = self.__db.query("SELECT a, b FROM data WHERE a < 0")
+        self.assertEqual(cursor.getColumns(), ["a", "b"])
+        self.assertEqual(cursor.getTypes(), ["str", "str"])
+        self.assertEqual(list(cursor), [])
+
+
+    def testUnknownTypesFromEarlierRun(self):
+        sql = "SELECT a, b FROM data WHERE a >= ? ORDER BY a"
+        self.assertEqual(self.__db.query(sql, [150]).getTypes(),
+                         ["int", "float"])
+
+        # The types are shared by every database.
+        other = SQLiteDatabase(os.path.join(self.__dir, "test.db"))
+        try:
+            cursor = other.query(sql, [1000])
+            self.assertEqual(cursor.getTypes(), ["int", "float"])
+            self.assertEqual(list(cursor), [])
+        finally:
+            other.close()
+
+        self.assertEqual(self.__db.query(sql.replace("a >=", "a <"),
+                                         [0]).getTypes(), ["str", "str"])
+
+
+if __name__ == "__main__":
+    unittest.main()
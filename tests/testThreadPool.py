@@ -0,0 +1,160 @@
+'''
+Checks the ordering and error handling of :class:`.ThreadPool`.
+
+Run from the repository root with: python -m unittest discover tests
+'''
+
+# core
+import os
+import random
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "src"))
+
+# MincePy
+from util.ThreadPool import ThreadPool
+
+
+class ThreadPoolTest(unittest.TestCase):
+
+    def testResultsAreInItemOrder(self):
+        rand = random.Random(0)
+        delays = [rand.random() * 0.005 for _ in xrange(100)]
+
+        def work(i):
+            time.sleep(delays[i])
+            return i * 2
+
+        pool = ThreadPool(8)
+        self.assertEqual(pool.map(work, range(100)), range(0, 200, 2))
+
+
+    def testItemsStartInOrder(self):
+        # Items are handed out in order, but a worker may be interrupted
+        # before recording its item, so another worker's can come first.
+        started = []
+        lock = threading.Lock()
+
+        def work(i):
+            with lock:
+                started.append(i)
+            time.sleep(0.001)
+
+        maxWorkers = 4
+        ThreadPool(maxWorkers).map(work, range(50))
+        self.assertEqual(sorted(started), range(50))
+        for position, i in enumerate(started):
+            self.assertLess(abs(position - i), maxWorkers)
+
+
+    def testSingleWorkerRunsInCallingThread(self):
+        threads = []
+        pool = ThreadPool(1)
+        pool.map(lambda i: threads.append((i, threading.current_thread())),
+                 range(5))
+        self.assertEqual(threads, [(i, threading.current_thread())
+                                   for i in range(5)])
+
+
+    def testWorkersRunAtOnce(self):
+        # Every item waits for all of them to start, so the map only finishes
+        # if each has its own worker.
+        numItems = 4
+        started = [0]
+        condition = threading.Condition()
+
+        def work(i):
+            with condition:
+                started[0] += 1
+                condition.notify_all()
+                deadline = time.time() + 10
+                while started[0] < numItems and time.time() < deadline:
+                    condition.wait(0.1)
+                return started[0]
+
+        self.assertEqual(ThreadPool(numItems).map(work, range(numItems)),
+                         [numItems] * numItems)
+
+
+    def testErrorCancelsItemsNotStarted(self):
+        started = []
+        lock = threading.Lock()
+
+        def work(i):
+            with lock:
+                started.append(i)
+            if i == 5:
+                raise ValueError("item 5 failed")
+            time.sleep(0.01)
+
+        for maxWorkers in (1, 3):
+            del started[:]
+            pool = ThreadPool(maxWorkers)
+            with self.assertRaises(ValueError) as context:
+                pool.map(work, range(100))
+            self.assertEqual(str(context.exception), "item 5 failed")
+            self.assertIn(5, started)
+            self.assertLess(len(started), 10, maxWorkers)
+
+
+    def testFirstErrorIsRaised(self):
+        def work(i):
+            if i == 0:
+                raise ValueError("first")
+            if i == 1:
+                time.sleep(0.2)
+                raise KeyError("second")
+
+        with self.assertRaises(ValueError):
+            ThreadPool(2).map(work, range(2))
+
+
+    def testRunningItemsSeeCancellation(self):
+        pool = ThreadPool(2)
+        seen = []
+
+        def work(i):
+            if i == 0:
+                deadline = time.time() + 10
+                while not pool.isCancelled() and time.time() < deadline:
+                    time.sleep(0.001)
+                seen.append(pool.isCancelled())
+            else:
+                time.sleep(0.05)
+                raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            pool.map(work, range(2))
+        self.assertEqual(seen, [True])
+
+
+    def testPoolCanBeReusedAfterError(self):
+        pool = ThreadPool(2)
+
+        def fail(i):
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            pool.map(fail, range(4))
+        self.assertEqual(pool.map(lambda i: i + 1, range(4)), [1, 2, 3, 4])
+
+
+    def testInitializerAndFinalizerRunInEachWorker(self):
+        initialized = []
+        finalized = []
+        pool = ThreadPool(3, initializer=lambda: initialized.append(
+                                  threading.current_thread().name),
+                          finalizer=lambda: finalized.append(
+                                  threading.current_thread().name),
+                          name="test")
+        pool.map(lambda i: time.sleep(0.01), range(9))
+        self.assertEqual(sorted(initialized), ["test-1", "test-2", "test-3"])
+        self.assertEqual(sorted(finalized), sorted(initialized))
+
+
+if __name__ == "__main__":
+    unittest.main()